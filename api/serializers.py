@@ -22,7 +22,7 @@ class DivisionSerializer(serializers.HyperlinkedModelSerializer):
 class GameSerializer(serializers.HyperlinkedModelSerializer):
     class Meta:
         model = Game
-        fields = ['id','game_id','team_home', 'team_away','date','time','location','finalized','is_verified']
+        fields = ['id','game_id','team_home', 'team_away','date','time','location','finalized','is_verified','home_score','away_score']
 
 class PlayerGameStatSerializer(serializers.HyperlinkedModelSerializer):
     class Meta:
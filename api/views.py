@@ -9,10 +9,21 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 import csv
 import io
+import json
+from itertools import islice
 from datetime import datetime
 import uuid  # To generate unique game IDs
 from rest_framework.authentication import TokenAuthentication
+from asgiref.sync import sync_to_async
 from django.utils.timezone import make_aware
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from league import splits as league_splits
+from league.rollups import ROLLUP_DIMENSIONS, rollup_totals
+from league.streaming import streaming_content
+from league.stats import STAT_FIELDS, record_stat_changes, stat_row, stat_team_expression
 
 @api_view(['POST'])
 @authentication_classes([TokenAuthentication]) 
@@ -29,9 +40,19 @@ def upload_box_score(request):
 
     io_string = io.StringIO(data_set)
     headers = next(io_string)  # Skip CSV header row
+    rows = list(csv.reader(io_string, delimiter=','))
+
+    # Resolve every player, team and game named in the file up front, one query each
+    players = {
+        player.user.username: player
+        for player in Player.objects.filter(user__username__in={row[3] for row in rows if len(row) > 3}).select_related('user')
+    }
+    teams = Team.objects.in_bulk({int(row[23]) for row in rows if len(row) > 23 and row[23].strip().lstrip('-').isdecimal()})
+    games = Game.objects.in_bulk({row[0] for row in rows if row and row[0]}, field_name='game_id')
 
     error_rows = []
     game_data_cache = {}
+    stat_values = {}  # (player_id, game_id): stat fields, the last row for a pair wins
 
     # For optional memory of missing date/time/location
     last_date_str = ""
@@ -46,126 +67,124 @@ def upload_box_score(request):
             strikeouts_pitching, home_runs_allowed, team_id, is_home, *_  # ignore trailing values
         ) = row_data
 
-        player = Player.objects.filter(user__username=username).first()
+        player = players.get(username)
         if not player:
             error_rows.append(f"Row {index}: Player '{first_name} {last_name}' (username: '{username}') not found.")
             return
 
-        stat, _ = PlayerGameStat.objects.get_or_create(player=player, game=game)
-
-        # Set all stat fields
-        stat.at_bats = int(at_bats)
-        stat.runs = int(runs)
-        stat.hits = int(hits)
-        stat.rbis = int(rbis)
-        stat.singles = int(singles)
-        stat.doubles = int(doubles)
-        stat.triples = int(triples)
-        stat.home_runs = int(home_runs)
-        stat.strikeouts = int(strikeouts)
-        stat.base_on_balls = int(base_on_balls)
-        stat.hit_by_pitch = int(hit_by_pitch)
-        stat.sacrifice_flies = int(sacrifice_flies)
-
-        stat.innings_pitched = float(innings_pitched)
-        stat.hits_allowed = int(hits_allowed)
-        stat.runs_allowed = int(runs_allowed)
-        stat.earned_runs = int(earned_runs)
-        stat.walks_allowed = int(walks_allowed)
-        stat.strikeouts_pitching = int(strikeouts_pitching)
-        stat.home_runs_allowed = int(home_runs_allowed)
+        # CSV column -> PlayerGameStat field, spelled out so a reordered STAT_FIELDS can't shift columns
+        stat_values[(player.id, game.id)] = {
+            'at_bats': int(at_bats),
+            'runs': int(runs),
+            'hits': int(hits),
+            'rbis': int(rbis),
+            'singles': int(singles),
+            'doubles': int(doubles),
+            'triples': int(triples),
+            'home_runs': int(home_runs),
+            'strikeouts': int(strikeouts),
+            'base_on_balls': int(base_on_balls),
+            'hit_by_pitch': int(hit_by_pitch),
+            'sacrifice_flies': int(sacrifice_flies),
+            'innings_pitched': float(innings_pitched),
+            'hits_allowed': int(hits_allowed),
+            'runs_allowed': int(runs_allowed),
+            'earned_runs': int(earned_runs),
+            'walks_allowed': int(walks_allowed),
+            'strikeouts_pitching': int(strikeouts_pitching),
+            'home_runs_allowed': int(home_runs_allowed),
+        }
+
+    with transaction.atomic():
+        for index, row in enumerate(rows, start=2):
+            try:
+                (
+                    game_id, first_name, last_name, username, at_bats, runs, hits, rbis, singles, doubles,
+                    triples, home_runs, strikeouts, base_on_balls, hit_by_pitch, sacrifice_flies,
+                    innings_pitched, hits_allowed, runs_allowed, earned_runs, walks_allowed,
+                    strikeouts_pitching, home_runs_allowed, team_id, is_home, date_str, time_str, location
+                ) = row
+
+                team = teams.get(int(team_id))
+                if team is None:
+                    error_rows.append(f"Row {index}: Team ID '{team_id}' not found.")
+                    continue
 
-        stat.is_verified = True
-        stat.save()
+                is_home = is_home.lower() == "true"
 
-    for index, row in enumerate(csv.reader(io_string, delimiter=','), start=2):
-        try:
-            (
-                game_id, first_name, last_name, username, at_bats, runs, hits, rbis, singles, doubles,
-                triples, home_runs, strikeouts, base_on_balls, hit_by_pitch, sacrifice_flies,
-                innings_pitched, hits_allowed, runs_allowed, earned_runs, walks_allowed,
-                strikeouts_pitching, home_runs_allowed, team_id, is_home, date_str, time_str, location
-            ) = row
+                # Track last-known date/time/location
+                if date_str.strip():
+                    last_date_str = date_str
+                if time_str.strip():
+                    last_time_str = time_str
+                if location.strip():
+                    last_location = location
 
-            try:
-                team = Team.objects.get(id=int(team_id))
-            except Team.DoesNotExist:
-                error_rows.append(f"Row {index}: Team ID '{team_id}' not found.")
-                continue
-
-            is_home = is_home.lower() == "true"
-
-            # Track last-known date/time/location
-            if date_str.strip():
-                last_date_str = date_str
-            if time_str.strip():
-                last_time_str = time_str
-            if location.strip():
-                last_location = location
-
-            date_str = last_date_str
-            time_str = last_time_str
-            location = last_location
-
-            if not date_str or not time_str or not location:
-                error_rows.append(f"Row {index}: Missing date/time/location.")
-                continue
-
-            # If game_id is provided, use it
-            if game_id:
-                game = Game.objects.filter(game_id=game_id).first()
-                if not game:
-                    error_rows.append(f"Row {index}: Game ID '{game_id}' not found.")
+                date_str = last_date_str
+                time_str = last_time_str
+                location = last_location
+
+                if not date_str or not time_str or not location:
+                    error_rows.append(f"Row {index}: Missing date/time/location.")
+                    continue
+
+                # If game_id is provided, use it
+                if game_id:
+                    game = games.get(game_id)
+                    if not game:
+                        error_rows.append(f"Row {index}: Game ID '{game_id}' not found.")
+                        continue
+                    process_stat_row(row, game, index)
                     continue
-                process_stat_row(row, game, index)
-                continue
-
-            # No game_id, group by date-time-location
-            key = f"{date_str}_{time_str}_{location}"
-            if key not in game_data_cache:
-                game_data_cache[key] = {
-                    "home_team": None,
-                    "away_team": None,
-                    "date": make_aware(datetime.strptime(date_str, "%Y-%m-%d")),
-                    "time": datetime.strptime(time_str, "%H:%M").time(),
-                    "location": location,
-                    "game": None,
-                    "buffered_rows": [],
-                }
-
-            entry = game_data_cache[key]
-
-            # Assign team
-            if is_home:
-                entry["home_team"] = team
-            else:
-                entry["away_team"] = team
-
-            # If game exists now, process this stat row immediately
-            if (entry["home_team"] or entry["away_team"]) and entry["game"] is None:
-                entry["game"] = Game.objects.create(
-                    game_id=str(uuid.uuid4()),
-                    date=entry["date"],
-                    time=entry["time"],
-                    location=entry["location"],
-                    team_home=entry["home_team"],
-                    team_away=entry["away_team"],
-                    finalized=False,
-                    is_verified=False,
-                )
-
-                # Process any rows that were buffered
-                for buffered_row, buffered_index in entry["buffered_rows"]:
-                    process_stat_row(buffered_row, entry["game"], buffered_index)
-                entry["buffered_rows"] = []
-
-            if entry["game"]:
-                process_stat_row(row, entry["game"], index)
-            else:
-                entry["buffered_rows"].append((row, index))
-
-        except ValueError as e:
-            error_rows.append(f"Row {index}: Data format error - {str(e)}")
+
+                # No game_id, group by date-time-location
+                key = f"{date_str}_{time_str}_{location}"
+                if key not in game_data_cache:
+                    game_data_cache[key] = {
+                        "home_team": None,
+                        "away_team": None,
+                        "date": make_aware(datetime.strptime(date_str, "%Y-%m-%d")),
+                        "time": datetime.strptime(time_str, "%H:%M").time(),
+                        "location": location,
+                        "game": None,
+                        "buffered_rows": [],
+                    }
+
+                entry = game_data_cache[key]
+
+                # Assign team
+                if is_home:
+                    entry["home_team"] = team
+                else:
+                    entry["away_team"] = team
+
+                # If game exists now, process this stat row immediately
+                if (entry["home_team"] or entry["away_team"]) and entry["game"] is None:
+                    entry["game"] = Game.objects.create(
+                        game_id=str(uuid.uuid4()),
+                        date=entry["date"],
+                        time=entry["time"],
+                        location=entry["location"],
+                        team_home=entry["home_team"],
+                        team_away=entry["away_team"],
+                        finalized=False,
+                        is_verified=False,
+                    )
+
+                    # Process any rows that were buffered
+                    for buffered_row, buffered_index in entry["buffered_rows"]:
+                        process_stat_row(buffered_row, entry["game"], buffered_index)
+                    entry["buffered_rows"] = []
+
+                if entry["game"]:
+                    process_stat_row(row, entry["game"], index)
+                else:
+                    entry["buffered_rows"].append((row, index))
+
+            except ValueError as e:
+                error_rows.append(f"Row {index}: Data format error - {str(e)}")
+
+        save_box_score_stats(stat_values)
 
     response = {"message": "Box score upload complete."}
     if error_rows:
@@ -173,6 +192,39 @@ def upload_box_score(request):
         return Response(response, status=207)
     return Response(response, status=201)
 
+
+def save_box_score_stats(stat_values):
+    """Write {(player_id, game_id): stat fields} as verified PlayerGameStats, in bulk.
+
+    Bulk writes skip the PlayerGameStat signals, so the stat lines (and everything kept
+    from them) are brought up to date here with one record_stat_changes call.
+    """
+    if not stat_values:
+        return
+    existing = {}
+    for stat in PlayerGameStat.objects.filter(
+        player_id__in={player_id for player_id, _ in stat_values},
+        game_id__in={game_id for _, game_id in stat_values},
+    ).order_by('id'):
+        if (stat.player_id, stat.game_id) in stat_values:
+            existing.setdefault((stat.player_id, stat.game_id), stat)
+
+    before, updated, created = [], [], []
+    for (player_id, game_id), values in stat_values.items():
+        stat = existing.get((player_id, game_id))
+        if stat is None:
+            created.append(PlayerGameStat(player_id=player_id, game_id=game_id, is_verified=True, **values))
+            continue
+        before.append(stat_row(stat))
+        for field, value in values.items():
+            setattr(stat, field, value)
+        stat.is_verified = True
+        updated.append(stat)
+
+    PlayerGameStat.objects.bulk_update(updated, [*STAT_FIELDS, 'is_verified'], batch_size=500)
+    PlayerGameStat.objects.bulk_create(created, batch_size=500)
+    record_stat_changes(before=before, after=[stat_row(stat) for stat in updated + created])
+
 @api_view(['PATCH'])
 @permission_classes([IsAuthenticated])
 @authentication_classes([TokenAuthentication]) 
@@ -189,6 +241,175 @@ def verify_player_stats(request, stat_id):
         return Response({"error": "Player stats not found."}, status=404)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def stats_rollup(request):
+    """
+    Stat totals and rates for a slice of the StatRollup table, e.g.
+    ?division=2&start=2025-05&end=2025-05 or ?team=3&opponent=5&group_by=player.
+    Filters: player, team, opponent, division, league (ids), start/end (YYYY-MM, inclusive).
+    group_by: comma-separated dimensions from player, team, opponent, division, month.
+    """
+    filters = {}
+    try:
+        for name in ('player', 'team', 'opponent', 'division', 'league'):
+            if request.query_params.get(name):
+                filters[name] = int(request.query_params[name])
+        for name in ('start', 'end'):
+            if request.query_params.get(name):
+                filters[name] = datetime.strptime(request.query_params[name], "%Y-%m").date()
+    except ValueError:
+        return Response({"error": "Ids must be integers and months YYYY-MM."}, status=400)
+
+    group_by = [dimension for dimension in request.query_params.get('group_by', '').split(',') if dimension]
+    unknown = set(group_by) - set(ROLLUP_DIMENSIONS)
+    if unknown:
+        return Response({"error": f"Unknown group_by: {', '.join(sorted(unknown))}."}, status=400)
+
+    return Response({"rows": rollup_totals(group_by, **filters)})
+
+
+EXPORT_CHUNK_SIZE = 2000
+# (column, lookup) pairs of the export, in order
+EXPORT_COLUMNS = (
+    ('stat_id', 'id'), ('game_id', 'game__game_id'), ('date', 'game__date'), ('team_id', 'stat_team_id'),
+    ('home_team_id', 'game__team_home_id'), ('away_team_id', 'game__team_away_id'), ('player_id', 'player_id'),
+    ('first_name', 'player__first_name'), ('last_name', 'player__last_name'),
+    *((field, field) for field in STAT_FIELDS), ('is_verified', 'is_verified'),
+)
+EXPORT_HEADER = [column for column, _ in EXPORT_COLUMNS]
+
+
+async def export_rows(team_ids):
+    """The teams' stat rows as value tuples in EXPORT_COLUMNS order, read from the database in chunks.
+
+    Each chunk is fetched with sync_to_async, so under ASGI the export streams without
+    holding a thread while the client reads, and without collecting the rows first.
+    """
+    rows = (
+        PlayerGameStat.objects.filter(Q(game__team_home_id__in=team_ids) | Q(game__team_away_id__in=team_ids))
+        .annotate(stat_team_id=stat_team_expression())
+        .filter(stat_team_id__in=team_ids)
+        .order_by('game__date', 'game_id', 'id')
+        .values_list(*(lookup for _, lookup in EXPORT_COLUMNS))
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    next_chunk = sync_to_async(lambda: list(islice(rows, EXPORT_CHUNK_SIZE)))
+    while chunk := await next_chunk():
+        for row in chunk:
+            yield row
+
+
+async def export_csv(rows):
+    # One write per chunk of rows, so the response is neither one huge string nor a write per row
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_HEADER)
+    count = 0
+    async for row in rows:
+        writer.writerow(row)
+        count += 1
+        if count % EXPORT_CHUNK_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+async def export_ndjson(rows):
+    lines = []
+    async for row in rows:
+        lines.append(json.dumps(dict(zip(EXPORT_HEADER, row)), cls=DjangoJSONEncoder))
+        if len(lines) == EXPORT_CHUNK_SIZE:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_stats(request):
+    """
+    Streams every PlayerGameStat of a division (?division=<id>) or team (?team=<id>) as
+    CSV (default) or NDJSON (?output=ndjson), oldest game first. Rows count for the team
+    the player played for in that game, as on the box scores and stat lines.
+    """
+    output = request.query_params.get('output', 'csv')
+    if output not in ('csv', 'ndjson'):
+        return Response({"error": "output must be csv or ndjson."}, status=400)
+    try:
+        if request.query_params.get('team'):
+            team = Team.objects.get(id=int(request.query_params['team']))
+            team_ids = [team.id]
+            name = f"team-{team.id}"
+        elif request.query_params.get('division'):
+            division = Division.objects.get(id=int(request.query_params['division']))
+            team_ids = list(division.teams.values_list('id', flat=True))
+            name = f"division-{division.id}"
+        else:
+            return Response({"error": "Pass a division or team id."}, status=400)
+    except (ValueError, Team.DoesNotExist, Division.DoesNotExist):
+        return Response({"error": "Division or team not found."}, status=404)
+
+    rows = export_rows(team_ids)
+    if output == 'csv':
+        response = StreamingHttpResponse(streaming_content(request, export_csv(rows)), content_type='text/csv')
+    else:
+        response = StreamingHttpResponse(streaming_content(request, export_ndjson(rows)), content_type='application/x-ndjson')
+    response['Content-Disposition'] = f'attachment; filename="stats-{name}.{output}"'
+    return response
+
+
+def splits_payload(splits):
+    return {
+        'home': splits['home'],
+        'away': splits['away'],
+        'opponents': [
+            {'team_id': split['team'].id if split['team'] else None, 'team_name': split['team'].name if split['team'] else None,
+             **{key: value for key, value in split.items() if key != 'team'}}
+            for split in splits['opponents']
+        ],
+        'months': [{**split, 'month': split['month'].strftime("%Y-%m")} for split in splits['months']],
+    }
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def player_splits(request, player_id):
+    """
+    Home/away, by-opponent and by-month splits of one player (?team=<id> for one team's games).
+    """
+    player = Player.objects.filter(id=player_id).first()
+    if player is None:
+        return Response({"error": "Player not found."}, status=404)
+    team_ids = None
+    if request.query_params.get('team'):
+        try:
+            team_ids = [int(request.query_params['team'])]
+        except ValueError:
+            return Response({"error": "team must be an id."}, status=400)
+    return Response({"player_id": player.id, **splits_payload(league_splits.player_splits(player, team_ids))})
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def team_splits(request, team_id):
+    """
+    Splits of every player on a team's roster, over their games for that team.
+    """
+    team = Team.objects.filter(id=team_id).first()
+    if team is None:
+        return Response({"error": "Team not found."}, status=404)
+    return Response({
+        "team_id": team.id,
+        "players": [
+            {"player_id": player_id, **splits_payload(splits)}
+            for player_id, splits in league_splits.team_splits(team).items()
+        ],
+    })
+
+
 # Create your views here.
 class PlayerViewSet(viewsets.ModelViewSet):
     queryset = Player.objects.all()
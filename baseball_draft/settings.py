@@ -81,10 +81,48 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Take the write lock when a transaction starts rather than on its first write,
+            # so concurrent draft picks queue up instead of failing with "database is locked"
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+    }
+}
+
+
+# Cache
+# Shared by every worker on the host, so per-division draft versions agree across processes.
+# Swap for Redis/Memcached if the app is ever spread over several machines.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
     }
 }
 
 
+# Draft pick clock
+# Tick the clock in a thread of each app process. Set to False and run
+# `manage.py run_draft_clock` as a separate worker instead if preferred.
+DRAFT_CLOCK_IN_PROCESS = True
+
+# Draft room WebSockets (league/consumers.py), served by asgi.py under daphne/uvicorn.
+# HTTP works under either entry point; streaming views use league.streaming for both.
+# The in-memory layer only reaches sockets in the same process: fine for one node and
+# for tests. Point it at channels_redis to run several app processes.
+CHANNEL_LAYERS = {
+    'default': {
+        'BACKEND': 'channels.layers.InMemoryChannelLayer',
+    },
+}
+
+# Draft and stats events (SSE board, draft room). LocalEventBus keeps them in this process,
+# which is enough for one worker (and for tests). With several gunicorn/uvicorn workers, set
+# 'league.event_bus.DatabaseEventBus' to share them through the BusEvent table, no broker needed.
+DRAFT_EVENT_BUS = 'league.event_bus.LocalEventBus'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
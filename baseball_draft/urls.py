@@ -34,10 +34,15 @@ urlpatterns = [
     path('comment/<int:player_id>/<int:division_id>/', views.coach_comment, name='coach_comment'),
     path('draft/', views.public_draft, name='public_draft'),
     path('draft/<int:division_id>/', views.public_draft, name='public_draft_with_division'),
+    path('draft/<int:division_id>/stream/', views.public_draft_stream, name='public_draft_stream'),
     path('toggle-draft/<int:division_id>/', views.toggle_draft_status, name='toggle_draft_status'),
+    path('rollback-picks/<int:division_id>/', views.rollback_draft_picks, name='rollback_draft_picks'),
     path('trade/<int:division_id>/', views.trade_players, name='trade_players'),
+    path('leaderboards/<int:division_id>/', views.leaderboards, name='leaderboards'),
+    path('standings/<int:division_id>/', views.standings, name='standings'),
     path('player/<int:player_id>/', views.player_detail, name='player_detail'),
     path('import-players/', views.import_players, name='import_players'),  # New route
+    path('import-draft-board/<int:division_id>/', views.import_draft_board, name='import_draft_board'),
     path('boxscore/<str:game_id>/', views.box_score_view, name='box_score'),
 
     # REST API
@@ -47,6 +52,10 @@ urlpatterns = [
     # API Endpoints for Box Score Uploads
     path('upload-boxscore/', api_views.upload_box_score, name='upload_box_score'),
     path('verify-stats/<int:stat_id>/', api_views.verify_player_stats, name='verify_player_stats'),
+    path('stats-rollup/', api_views.stats_rollup, name='stats_rollup'),
+    path('export-stats/', api_views.export_stats, name='export_stats'),
+    path('player-splits/<int:player_id>/', api_views.player_splits, name='player_splits'),
+    path('team-splits/<int:team_id>/', api_views.team_splits, name='team_splits'),
 ]
 
 urlpatterns += [
@@ -64,6 +73,7 @@ urlpatterns += [
     path("player/logs/", views.player_logs_view, name="player_logs"),
     path('players/<int:player_id>/evaluations/', views.player_evaluations, name='player_evaluations'),
     path('players/<int:player_id>/evaluations/<int:evaluation_id>/', views.get_evaluation_detail, name='evaluation_detail'),
+    path('players/<int:player_id>/progress/', views.player_progress_view, name='player_progress'),
     path("player/teams/", views.player_teams_view, name="player_teams"),
     path('join-team/', request_join_team, name='request_join_team'),
     path('coach/join-requests/', review_join_requests, name='review_join_requests'),
@@ -1,6 +1,6 @@
 # league/admin.py
 from django.contrib import admin
-from .models import League, Division, Team, Player, DraftPick, SignInLog
+from .models import League, Division, Team, Player, DraftPick, DraftSlot, DraftRanking, SignInLog
 
 
 admin.site.site_title = "Baseball League Admin"
@@ -13,13 +13,13 @@ class LeagueAdmin(admin.ModelAdmin):
 
 @admin.register(Division)
 class DivisionAdmin(admin.ModelAdmin):
-    list_display = ('name', 'league', 'is_open')
+    list_display = ('name', 'league', 'is_open', 'draft_order', 'pick_time_limit')
     list_filter = ('league', 'is_open')
     filter_horizontal = ('coordinators',)
 
 @admin.register(Team)
 class TeamAdmin(admin.ModelAdmin):
-    list_display = ('name', 'division')
+    list_display = ('name', 'division', 'draft_position', 'roster_size', 'max_players')
     filter_horizontal = ('coaches',)
     list_filter = ('division',)
 
@@ -41,6 +41,18 @@ class DraftPickAdmin(admin.ModelAdmin):
     list_display = ('division', 'team', 'player', 'pick_number', 'round_number')
     list_filter = ('division',)
 
+@admin.register(DraftSlot)
+class DraftSlotAdmin(admin.ModelAdmin):
+    list_display = ('division', 'slot_number', 'round_number', 'original_team', 'team', 'pick')
+    list_editable = ('team',)  # Trade a future slot by changing its team
+    list_filter = ('division',)
+
+@admin.register(DraftRanking)
+class DraftRankingAdmin(admin.ModelAdmin):
+    list_display = ('team', 'rank', 'player')
+    list_editable = ('rank',)
+    list_filter = ('team',)
+
 @admin.register(SignInLog)
 class SigninLogAdmin(admin.ModelAdmin):
     list_display = ('user', 'timestamp')
@@ -0,0 +1,73 @@
+# league/box_scores.py
+import uuid
+
+from django.core.cache import cache
+from django.template.loader import render_to_string
+
+from .models import PlayerGameStat
+from .stats import stat_team_expression
+
+# Rendered box score tables. A finalized game's tables are stored in the shared cache
+# under the game's version token, so after the first view they cost no query at all.
+# Stat and game changes bump the token after commit (corrections to finalized games
+# still show up); renames of players or teams age out with BOX_SCORE_TIMEOUT.
+
+BOX_SCORE_TIMEOUT = 60 * 60 * 24
+
+
+def _version_key(game_id):
+    return f"box-score-version:{game_id}"
+
+
+def box_score_version(game_id):
+    token = cache.get(_version_key(game_id))
+    if token is None:
+        cache.add(_version_key(game_id), uuid.uuid4().hex, None)
+        token = cache.get(_version_key(game_id))
+    return token
+
+
+def bump_box_scores(game_ids):
+    cache.set_many({_version_key(game_id): uuid.uuid4().hex for game_id in game_ids}, None)
+
+
+def box_score_sides(game):
+    """Home and away (team, label, hitters, pitchers), from one query over the game's stats.
+
+    A stat row goes to the side of the player's team in the game, the home side if the
+    player is on both, like the stat lines (see league.stats.stat_team_id).
+    """
+    stats = (
+        PlayerGameStat.objects.filter(game=game)
+        .annotate(stat_team_id=stat_team_expression())
+        .select_related('player')
+        .order_by('id')
+    )
+    by_team = {game.team_home_id: [], game.team_away_id: []}
+    for stat in stats:
+        if stat.stat_team_id is not None and stat.stat_team_id in by_team:
+            by_team[stat.stat_team_id].append(stat)
+
+    sides = []
+    for team, label, css in ((game.team_home, 'Home', 'text-primary'), (game.team_away, 'Away', 'text-danger')):
+        hitters = by_team[team.id] if team else []
+        if hitters:
+            pitchers = [stat for stat in hitters if stat.innings_pitched > 0]
+            sides.append({'team': team, 'label': label, 'css': css, 'hitters': hitters, 'pitchers': pitchers})
+    return sides
+
+
+def render_box_score(game):
+    return render_to_string('league/box_score_tables.html', {'sides': box_score_sides(game)})
+
+
+def box_score_html(game):
+    """The game's rendered tables, from the cache once the game is finalized."""
+    if not game.finalized:
+        return render_box_score(game)
+    key = f"box-score:{game.id}:{box_score_version(game.id)}"
+    html = cache.get(key)
+    if html is None:
+        html = render_box_score(game)
+        cache.set(key, html, BOX_SCORE_TIMEOUT)
+    return html
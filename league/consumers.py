@@ -0,0 +1,133 @@
+# league/consumers.py
+import json
+
+from asgiref.sync import async_to_sync
+from channels.generic.websocket import JsonWebsocketConsumer
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Division, Player, Team
+from .draft import DraftPickError, coach_pick_team, make_draft_pick
+from .draft_clock import division_deadline
+from .draft_events import draft_room_group, pick_payload
+from .draft_state import get_draft_state
+from .event_bus import get_event_bus
+
+
+class DraftRoomConsumer(JsonWebsocketConsumer):
+    """The draft room over one WebSocket: coaches send picks, and every change to the
+    board is pushed back as a "board" message.
+
+    Each connection remembers the draft version and the rosters it last sent, so an
+    update only carries the new picks and the rosters that changed. Messages from the
+    client:
+
+        {"action": "pick", "player_id": 12}                  # coaches
+        {"action": "pick", "player_id": 12, "team_id": 3}    # coordinators
+    """
+
+    def connect(self):
+        self.division_id = self.scope['url_route']['kwargs']['division_id']
+        self.group_name = draft_room_group(self.division_id)
+        user = self.scope['user']
+        division = Division.objects.filter(id=self.division_id).first()
+        if not user.is_authenticated or division is None:
+            self.close()
+            return
+
+        # Same access as the dashboard: the division's coordinators and coaches
+        self.is_coordinator = division.coordinators.filter(id=user.id).exists()
+        self.is_coach = Team.objects.filter(coaches=user, division=division).exists()
+        if not (self.is_coordinator or self.is_coach):
+            self.close()
+            return
+
+        self.token = None
+        self.last_pick_number = 0
+        self.rosters = {}
+        async_to_sync(self.channel_layer.group_add)(self.group_name, self.channel_name)
+        get_event_bus().start()  # Picks made on other workers reach this one through the bus
+        self.accept()
+        self.send_board()
+
+    def disconnect(self, code):
+        if hasattr(self, 'token'):
+            async_to_sync(self.channel_layer.group_discard)(self.group_name, self.channel_name)
+
+    def receive_json(self, content):
+        if content.get('action') != 'pick':
+            self.send_json({'type': 'error', 'message': "Unknown action."})
+            return
+        try:
+            self.make_pick(content)
+        except DraftPickError as e:
+            self.send_json({'type': 'error', 'message': str(e)})
+
+    def draft_changed(self, event):
+        # A commit bumps the version several times; the first message sends it all
+        if event['token'] != self.token:
+            self.send_board()
+
+    @classmethod
+    def encode_json(cls, content):
+        return json.dumps(content, cls=DjangoJSONEncoder)
+
+    # === Picks ===
+
+    def make_pick(self, content):
+        division = Division.objects.filter(id=self.division_id, is_open=True).first()
+        if division is None:
+            raise DraftPickError("The draft is closed.")
+        player = Player.objects.filter(id=content.get('player_id'), division=division).first()
+        if player is None:
+            raise DraftPickError("That player is not in this division.")
+
+        state = get_draft_state(division.id)
+        if self.is_coordinator:
+            team = next((team for team in state.teams if str(team.id) == str(content.get('team_id'))), None)
+            if team is None:
+                raise DraftPickError("Choose the team this pick is for.")
+        else:
+            team = coach_pick_team(state, self.scope['user'])
+            if team is None:
+                raise DraftPickError("You don't coach a team in this division.")
+
+        pick = make_draft_pick(division, team, player, state.team_count)
+        self.send_json({'type': 'picked', 'pick': pick_payload(pick)})
+
+    # === Board ===
+
+    def send_board(self):
+        state = get_draft_state(self.division_id)
+        token = state.token
+        if token == self.token:
+            return
+
+        picks = state.draft_picks(self.last_pick_number)
+        slot = state.on_the_clock()
+        rosters = {}
+        for team in state.teams:
+            roster = [{'id': player.id, 'name': f"{player.first_name} {player.last_name}"} for player in state.roster(team.id)]
+            if self.rosters.get(team.id) != roster:
+                rosters[team.id] = roster
+
+        self.send_json({
+            'type': 'board',
+            'picks': [pick_payload(pick) for pick in picks],
+            'pick_numbers': state.pick_numbers(),  # Rows not listed here were rolled back or undrafted
+            'last_pick_number': state.last_pick_number,
+            'available_count': len(state.available),
+            'on_the_clock': {
+                'team_id': slot.team_id,
+                'team_name': slot.team.name,
+                'round_number': slot.round_number,
+                'slot_number': slot.slot_number,
+                'deadline': division_deadline(self.division_id),
+            } if slot else None,
+            'rosters': [
+                {'team_id': team.id, 'max_players': team.max_players, 'players': rosters[team.id]}
+                for team in state.teams if team.id in rosters
+            ],
+        })
+        self.token = token
+        self.last_pick_number = state.last_pick_number
+        self.rosters.update(rosters)
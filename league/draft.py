@@ -0,0 +1,182 @@
+# league/draft.py
+from collections import Counter, defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Max, Q
+from django.utils import timezone
+
+from .models import DraftPick, DraftSequence, DraftSlot, Player, Team
+from .draft_state import draft_changed
+from .rosters import adjust_roster_sizes, membership_changes, refresh_drafted
+from .stats import rebuild_stat_lines
+
+TRADE_ROUND = 999  # DraftPick.round_number used for trades
+
+
+class DraftPickError(Exception):
+    """A pick that can't be recorded. The message is safe to show to coaches."""
+
+
+def allocate_pick_numbers(division_id, count=1):
+    """Reserve the next `count` pick numbers for a division and return them as a range.
+
+    Must run inside transaction.atomic(). The counter is bumped with a single UPDATE,
+    which takes the write lock up front, so concurrent pickers queue on the database
+    instead of reading the same "last pick" and colliding.
+    """
+    updated = DraftSequence.objects.filter(division_id=division_id).update(
+        last_pick_number=F('last_pick_number') + count
+    )
+    if not updated:
+        # First pick in a division created after the sequence migration
+        last = DraftPick.objects.filter(division_id=division_id).aggregate(last=Max('pick_number'))['last'] or 0
+        DraftSequence.objects.get_or_create(division_id=division_id, defaults={'last_pick_number': last})
+        DraftSequence.objects.filter(division_id=division_id).update(last_pick_number=F('last_pick_number') + count)
+
+    last_pick_number = DraftSequence.objects.values_list('last_pick_number', flat=True).get(division_id=division_id)
+    return range(last_pick_number - count + 1, last_pick_number + 1)
+
+
+def on_the_clock_slot(division_id):
+    """Read the slot on the clock from the database. Use inside the pick's transaction."""
+    next_slot = DraftSequence.objects.filter(division_id=division_id).values_list('next_slot', flat=True).first()
+    if next_slot is None:
+        return None
+    return DraftSlot.objects.filter(division_id=division_id, slot_number=next_slot).select_related('team').first()
+
+
+def coach_pick_team(state, user):
+    """The team a coach's pick goes to: theirs if it's on the clock, else the first team they coach."""
+    slot = state.on_the_clock()
+    coached_teams = [team for team in state.teams if user in team.coaches.all()]
+    if slot and slot.team in coached_teams:
+        return slot.team
+    return coached_teams[0] if coached_teams else None
+
+
+def make_draft_pick(division, team, player, team_count, slot_number=None):
+    """Draft player to team in one short write transaction and return the DraftPick.
+
+    Availability and the roster limit (Team.roster_size) are re-checked under the write lock. A race that
+    still slips through hits the (division, pick_number) constraint and is reported as
+    a DraftPickError instead of leaving two picks on one number.
+
+    Pass slot_number to make the pick only if that slot is still on the clock (auto-draft).
+    """
+    try:
+        with transaction.atomic():
+            taken = Player.objects.filter(id=player.id).filter(
+                Q(team__isnull=False) | Q(teams__isnull=False)
+            ).exists()
+            if taken:
+                raise DraftPickError(f"{player.first_name} {player.last_name} has already been drafted.")
+            roster_size, max_players = Team.objects.values_list('roster_size', 'max_players').get(id=team.id)
+            if roster_size >= max_players:
+                raise DraftPickError(f"{team.name} is already at max roster size.")
+
+            (pick_number,) = allocate_pick_numbers(division.id)
+
+            # With a draft order, the pick fills the slot on the clock and must be that team's
+            slot = on_the_clock_slot(division.id)
+            if slot and slot.team_id != team.id:
+                raise DraftPickError(f"It's not {team.name}'s turn. {slot.team.name} is on the clock.")
+            if slot_number is not None and (slot is None or slot.slot_number != slot_number):
+                raise DraftPickError("That pick has already been made.")
+            round_number = slot.round_number if slot else (pick_number - 1) // team_count + 1
+
+            pick = DraftPick.objects.create(
+                division=division,
+                team=team,
+                player=player,
+                pick_number=pick_number,
+                round_number=round_number
+            )
+            if slot:
+                slot.pick = pick
+                slot.save(update_fields=['pick'])
+                DraftSequence.objects.filter(division_id=division.id).update(
+                    next_slot=F('next_slot') + 1, clock_started_at=timezone.now()
+                )
+            player.team = team
+            player.draft_round = round_number
+            player.save()
+            player.teams.add(team)  # Add to ManyToManyField
+    except IntegrityError:
+        raise DraftPickError("Another pick was made at the same moment. Please refresh the board and try again.")
+    return pick
+
+
+def rollback_picks(division, count):
+    """Undo the division's last `count` picks and trades in one transaction and return them.
+
+    Drafted players go back to the pool and traded players back to the team they came
+    from, newest first, so a player drafted and then traded ends up undrafted. Rosters
+    are rewritten in bulk; the picks themselves are deleted in one query, and their
+    post_delete signals push an undraft event per pick to board watchers. Pick numbers
+    are not handed out again.
+    """
+    with transaction.atomic():
+        picks = list(
+            DraftPick.objects.filter(division=division).select_related('player').order_by('-pick_number')[:count]
+        )
+        if not picks:
+            raise DraftPickError("There are no picks to roll back.")
+
+        player_ids = {pick.player_id for pick in picks}
+        team_ids = set(Team.objects.filter(division=division).values_list('id', flat=True))
+        rows = list(
+            Player.teams.through.objects.filter(player_id__in=player_ids, team_id__in=team_ids)
+            .values_list('id', 'player_id', 'team_id')
+        )
+        memberships = defaultdict(set)
+        for _, player_id, team_id in rows:
+            memberships[player_id].add(team_id)
+        before = {player_id: set(team_ids) for player_id, team_ids in memberships.items()}
+        players = {pick.player_id: pick.player for pick in picks}
+        fk_teams = {player_id: player.team_id for player_id, player in players.items()}
+        draft_rounds = {player_id: player.draft_round for player_id, player in players.items()}
+
+        for pick in picks:
+            memberships[pick.player_id].discard(pick.team_id)
+            if pick.round_number == TRADE_ROUND:
+                if pick.traded_from_id is None:
+                    raise DraftPickError(f"Pick {pick.pick_number} is a trade from before trades recorded the old team, so it can't be rolled back.")
+                memberships[pick.player_id].add(pick.traded_from_id)
+                fk_teams[pick.player_id] = pick.traded_from_id
+            else:
+                if fk_teams[pick.player_id] == pick.team_id:
+                    fk_teams[pick.player_id] = None
+                draft_rounds[pick.player_id] = None
+
+        removed = [(row_id, player_id, team_id) for row_id, player_id, team_id in rows if team_id not in memberships[player_id]]
+        added = [
+            (player_id, team_id)
+            for player_id, team_ids in memberships.items()
+            for team_id in team_ids - before.get(player_id, set())
+        ]
+        Player.teams.through.objects.filter(id__in=[row_id for row_id, _, _ in removed]).delete()
+        Player.teams.through.objects.bulk_create(
+            [Player.teams.through(player_id=player_id, team_id=team_id) for player_id, team_id in added]
+        )
+        roster_changes = Counter(membership_changes([(player_id, team_id) for _, player_id, team_id in removed], sign=-1))
+        roster_changes.update(membership_changes(added))
+        adjust_roster_sizes(roster_changes)
+
+        Player.objects.bulk_update(
+            [Player(id=player_id, team_id=fk_teams[player_id], draft_round=draft_rounds[player_id]) for player_id in players],
+            ['team', 'draft_round'],
+        )
+        refresh_drafted(player_ids)
+        # Stat rows follow Player.teams, and the bulk writes skip the m2m signals
+        rebuild_stat_lines(player_ids)
+
+        # Put the draft order back on the earliest slot that is open again
+        reopened = DraftSlot.objects.filter(pick__in=picks).values_list('slot_number', flat=True)
+        first_reopened = min(reopened, default=None)
+        DraftPick.objects.filter(id__in=[pick.id for pick in picks]).delete()
+        if first_reopened is not None:
+            DraftSequence.objects.filter(division=division).update(next_slot=first_reopened, clock_started_at=timezone.now())
+
+    # Rosters and slots were written in bulk, so rebuild the draft state
+    transaction.on_commit(lambda: draft_changed(division.id))
+    return picks
@@ -0,0 +1,98 @@
+# league/draft_clock.py
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .models import DraftSequence
+from .draft import DraftPickError, make_draft_pick
+from .draft_state import get_draft_state
+
+logger = logging.getLogger(__name__)
+
+CLOCK_INTERVAL_SECONDS = 1
+
+
+def pick_deadline(sequence):
+    """When the slot on the clock runs out, or None if the division has no pick clock."""
+    if not sequence.clock_started_at or not sequence.division.pick_time_limit:
+        return None
+    return sequence.clock_started_at + timedelta(seconds=sequence.division.pick_time_limit)
+
+
+def division_deadline(division_id):
+    sequence = DraftSequence.objects.filter(division_id=division_id).select_related('division').first()
+    return pick_deadline(sequence) if sequence else None
+
+
+def expired_clocks(now=None):
+    """DraftSequences of open divisions whose team on the clock has run out of time."""
+    now = now or timezone.now()
+    sequences = DraftSequence.objects.filter(
+        division__is_open=True,
+        division__pick_time_limit__isnull=False,
+        clock_started_at__isnull=False,
+    ).select_related('division')
+    return [sequence for sequence in sequences if pick_deadline(sequence) <= now]
+
+
+def auto_draft(division, slot_number):
+    """Draft the best available player for the team holding slot_number, if it is still on the clock."""
+    state = get_draft_state(division.id)
+    slot = state.on_the_clock()
+    if slot is None or slot.slot_number != slot_number:
+        return None
+    player = state.best_available(slot.team_id)
+    if player is None:
+        return None
+    try:
+        pick = make_draft_pick(division, slot.team, player, state.team_count, slot_number=slot_number)
+    except DraftPickError as e:
+        # Someone picked first, or the state was a step behind; the next tick tries again
+        logger.info("Auto-draft skipped for %s slot %s: %s", division, slot_number, e)
+        return None
+    logger.info("Auto-drafted %s to %s (%s, slot %s)", player, slot.team, division, slot_number)
+    return pick
+
+
+def run_expired_clocks():
+    """Auto-draft every division whose pick clock has run out. Returns the picks made."""
+    picks = []
+    for sequence in expired_clocks():
+        pick = auto_draft(sequence.division, sequence.next_slot)
+        if pick:
+            picks.append(pick)
+    return picks
+
+
+def run_clock(interval=CLOCK_INTERVAL_SECONDS, once=False):
+    """Tick the pick clock every `interval` seconds. Several processes may tick at once:
+    make_draft_pick only takes a slot that is still on the clock, so a slot is filled once."""
+    while True:
+        close_old_connections()
+        try:
+            run_expired_clocks()
+        except Exception:
+            logger.exception("Draft clock tick failed")
+        if once:
+            return
+        time.sleep(interval)
+
+
+_clock_thread = None
+_clock_thread_lock = threading.Lock()
+
+
+def start_clock_thread():
+    """Run the pick clock in a daemon thread of this process, once, if DRAFT_CLOCK_IN_PROCESS is set."""
+    global _clock_thread
+    if not getattr(settings, 'DRAFT_CLOCK_IN_PROCESS', False):
+        return
+    with _clock_thread_lock:
+        if _clock_thread is None or not _clock_thread.is_alive():
+            _clock_thread = threading.Thread(target=run_clock, name='draft-clock', daemon=True)
+            _clock_thread.start()
@@ -0,0 +1,242 @@
+# league/draft_events.py
+import asyncio
+import itertools
+import json
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.layers import get_channel_layer
+from django.core.cache import cache
+
+from .event_bus import get_event_bus, subscribe
+from .versions import bump_version, read_version
+
+
+class DraftEvent:
+    def __init__(self, seq, kind, data):
+        self.seq = seq
+        self.kind = kind
+        self.data = data
+
+
+class DraftEventBroker:
+    """In-process fan-out of draft board events, keyed by topic (e.g. "draft:3").
+
+    Every event gets a process-wide sequence number. A bounded history is kept per
+    topic so reconnecting clients can replay what they missed. Publishers may be on any
+    thread; async watchers are woken on their own event loop.
+    """
+
+    def __init__(self, history=500):
+        self.epoch = uuid.uuid4().hex[:8]  # Changes on restart, so stale event ids are detected
+        self._history_size = history
+        self._lock = threading.Lock()
+        self._counter = itertools.count(1)
+        self._history = defaultdict(lambda: deque(maxlen=self._history_size))
+        self._evicted_upto = defaultdict(int)  # Highest seq that fell out of each topic's history
+        self._last_seq = 0
+        self._waiters = defaultdict(set)  # topic: {(event loop, asyncio.Event)}
+
+    def publish(self, topic, kind, data):
+        with self._lock:
+            event = DraftEvent(next(self._counter), kind, data)
+            history = self._history[topic]
+            if len(history) == history.maxlen:
+                self._evicted_upto[topic] = history[0].seq
+            history.append(event)
+            self._last_seq = event.seq
+            waiters = self._waiters.pop(topic, ())
+        for loop, woken in waiters:
+            loop.call_soon_threadsafe(woken.set)
+        return event
+
+    @property
+    def last_seq(self):
+        return self._last_seq
+
+    def events_after(self, topic, seq):
+        """Events on topic newer than seq, or None if the history no longer reaches back that far."""
+        with self._lock:
+            if seq < self._evicted_upto[topic]:
+                return None
+            return [event for event in self._history[topic] if event.seq > seq]
+
+    async def wait(self, topic, seq, timeout):
+        """Wait until topic has events newer than seq (or timeout) and return them.
+
+        Waits on the caller's event loop, so no thread is held while nothing happens.
+        """
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            pending = not (self._history[topic] and self._history[topic][-1].seq > seq)
+            if pending:
+                self._waiters[topic].add(waiter)
+        if pending:
+            try:
+                await asyncio.wait_for(waiter[1].wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                with self._lock:
+                    self._waiters[topic].discard(waiter)
+        return self.events_after(topic, seq)
+
+
+broker = DraftEventBroker()
+
+
+def draft_topic(division_id):
+    return f"draft:{division_id}"
+
+
+def pick_payload(pick):
+    return {
+        'pick_number': pick.pick_number,
+        'round_number': pick.round_number if pick.round_number != 999 else 'Trade',
+        'team_id': pick.team_id,
+        'team_name': pick.team.name,
+        'player_id': pick.player_id,
+        'player_name': f"{pick.player.first_name} {pick.player.last_name}",
+    }
+
+
+def publish_draft_event(division_id, kind, data):
+    # Through the event bus, so watchers on every worker see it
+    get_event_bus().publish(draft_topic(division_id), kind, data)
+
+
+def _to_broker(topic, kind, data):
+    broker.publish(topic, kind, data)
+
+
+subscribe('draft:', _to_broker)
+
+
+# === Per-division board version ===
+# A league.versions counter: bumped in the database, so concurrent bumps never collapse
+# into the same version, and read from its mirror in the shared cache, so a conditional
+# GET can be answered without touching the database.
+
+def _version_key(division_id):
+    return f"draft-version-number:{division_id}"
+
+
+def _modified_key(division_id):
+    return f"draft-version-modified:{division_id}"
+
+
+def draft_version(division_id):
+    """Return {'number', 'token', 'modified'} for the division's draft board."""
+    keys = (_version_key(division_id), _modified_key(division_id))
+    values = cache.get_many(keys)
+    number = values.get(keys[0])
+    if number is None:
+        number = read_version(keys[0])
+    modified = values.get(keys[1])
+    if modified is None:
+        cache.add(keys[1], time.time(), None)
+        modified = cache.get(keys[1])
+    return {'number': number, 'token': str(number), 'modified': modified}
+
+
+def bump_draft_version(division_id):
+    number = bump_version(_version_key(division_id))
+    modified = time.time()
+    cache.set(_modified_key(division_id), modified, None)
+    return {'number': number, 'token': str(number), 'modified': modified}
+
+
+# === WebSocket draft room ===
+# Consumers in league/consumers.py join one channel layer group per division. Every
+# draft version bump is announced to the group, on every worker via the event bus;
+# each consumer then sends its client whatever changed since the version it last sent.
+
+def draft_room_group(division_id):
+    return f"draft_room_{division_id}"
+
+
+def notify_draft_room(division_id, token):
+    get_event_bus().publish(draft_room_group(division_id), 'changed', {'token': token}, latest_only=True)
+
+
+def _to_draft_room(topic, kind, data):
+    channel_layer = get_channel_layer()
+    if channel_layer is not None:
+        async_to_sync(channel_layer.group_send)(topic, {'type': 'draft.changed', 'token': data['token']})
+
+
+subscribe('draft_room_', _to_draft_room)
+
+
+# === Server-sent events ===
+
+KEEPALIVE_SECONDS = 15
+STREAM_LIFETIME_SECONDS = 300  # Clients reconnect with Last-Event-ID, so no connection is held forever
+
+
+def _sse(event_id, kind, data):
+    return f"id: {event_id}\nevent: {kind}\ndata: {json.dumps(data)}\n\n"
+
+
+def _parse_event_id(last_event_id):
+    # Event ids look like "<epoch>:<seq>:<last pick number>"
+    try:
+        epoch, seq, pick_number = last_event_id.split(':')
+        return epoch, int(seq), int(pick_number)
+    except (AttributeError, ValueError):
+        return None, 0, None
+
+
+def _board_picks(division_id):
+    from .models import DraftPick
+
+    return list(DraftPick.objects.filter(division_id=division_id).select_related('team', 'player'))
+
+
+async def draft_event_stream(division_id, last_event_id=None, since=0):
+    """Yield the SSE stream for a division's draft board.
+
+    A client that sends a Last-Event-ID from this process gets the missed events
+    replayed from memory. Anyone else resumes from their last seen pick number: picks
+    after it are replayed from the database, followed by a "sync" event listing every
+    pick number still on the board so removed rows can be dropped.
+
+    An async generator: between events it waits on the event loop, so under ASGI an
+    open stream holds no worker thread.
+    """
+    get_event_bus().start()  # Relay other workers' events into this process's broker
+    topic = draft_topic(division_id)
+    epoch, seq, last_pick = _parse_event_id(last_event_id)
+    if last_pick is not None:
+        since = last_pick
+
+    backlog = broker.events_after(topic, seq) if epoch == broker.epoch else None
+    if backlog is None:
+        seq = broker.last_seq
+        pick_numbers = []
+        for pick in await sync_to_async(_board_picks)(division_id):
+            pick_numbers.append(pick.pick_number)
+            if pick.pick_number > since:
+                since = pick.pick_number
+                kind = 'trade' if pick.round_number == 999 else 'pick'
+                yield _sse(f"{broker.epoch}:{seq}:{since}", kind, pick_payload(pick))
+        yield _sse(f"{broker.epoch}:{seq}:{since}", 'sync', {'pick_numbers': pick_numbers})
+        backlog = broker.events_after(topic, seq) or []
+
+    deadline = time.monotonic() + STREAM_LIFETIME_SECONDS
+    while True:
+        for event in backlog:
+            seq = event.seq
+            if event.kind in ('pick', 'trade'):
+                since = max(since, event.data['pick_number'])
+            yield _sse(f"{broker.epoch}:{seq}:{since}", event.kind, event.data)
+        if time.monotonic() >= deadline:
+            return
+        backlog = await broker.wait(topic, seq, timeout=KEEPALIVE_SECONDS)
+        if backlog is None:
+            return  # Fell behind the history; the client reconnects and resyncs from the database
+        if not backlog:
+            yield ": keepalive\n\n"
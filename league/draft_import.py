@@ -0,0 +1,179 @@
+# league/draft_import.py
+import csv
+import io
+import json
+from collections import Counter, defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Max, Q
+
+from .models import DraftPick, DraftSequence, Player, Team
+from .draft_events import publish_draft_event, pick_payload
+from .draft_state import draft_changed, get_draft_state
+from .rosters import adjust_roster_sizes, membership_changes
+from .stats import rebuild_stat_lines
+
+
+class DraftBoardError(Exception):
+    """The uploaded board can't be read at all (as opposed to rows that fail validation)."""
+
+
+def parse_draft_board(name, content):
+    """Read a CSV or JSON board into a list of {'pick_number', 'team', 'player'} dicts.
+
+    CSV needs a header row with pick_number, team and player columns. JSON is a list of
+    objects with the same keys. round_number is optional in both.
+    """
+    text = content.decode('utf-8-sig') if isinstance(content, bytes) else content
+    if name.lower().endswith('.json'):
+        try:
+            rows = json.loads(text)
+        except ValueError as e:
+            raise DraftBoardError(f"Invalid JSON: {e}")
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise DraftBoardError("JSON board must be a list of objects.")
+    else:
+        rows = list(csv.DictReader(io.StringIO(text)))
+
+    missing = {'pick_number', 'team', 'player'} - set(rows[0]) if rows else set()
+    if missing:
+        raise DraftBoardError(f"Missing column(s): {', '.join(sorted(missing))}")
+    return rows
+
+
+def validate_draft_board(division, rows):
+    """Check the whole board in memory against the division's draft state.
+
+    Returns (picks, errors): unsaved DraftPicks in board order, and a list of messages.
+    Nothing should be written unless errors is empty.
+    """
+    state = get_draft_state(division.id)
+    teams_by_key = {}
+    for team in state.teams:
+        teams_by_key[str(team.id)] = team
+        teams_by_key[team.name.strip().lower()] = team
+    players_by_name = defaultdict(list)
+    for player in state.players.values():
+        if player.division_id == division.id:
+            players_by_name[f"{player.first_name} {player.last_name}".strip().lower()].append(player)
+
+    # Pick numbers are never reused (the public board's delta feed relies on it), so the
+    # board has to come after every number already handed out
+    last_pick_number = max(
+        DraftSequence.objects.filter(division=division).values_list('last_pick_number', flat=True).first() or 0,
+        state.last_pick_number,
+    )
+    seen_numbers = set()
+    seen_players = set()
+    added = Counter()
+    picks = []
+    errors = []
+
+    for line, row in enumerate(rows, start=1):
+        try:
+            pick_number = int(str(row.get('pick_number', '')).strip())
+            if pick_number < 1:
+                raise ValueError
+        except ValueError:
+            errors.append(f"Row {line}: pick_number must be a positive whole number.")
+            continue
+        if pick_number <= last_pick_number:
+            errors.append(f"Row {line}: pick {pick_number} has already been used; this board must start after pick {last_pick_number}.")
+            continue
+        if pick_number in seen_numbers:
+            errors.append(f"Row {line}: pick {pick_number} appears more than once.")
+            continue
+        seen_numbers.add(pick_number)
+
+        team = teams_by_key.get(str(row.get('team', '')).strip().lower())
+        if team is None:
+            errors.append(f"Row {line}: no team '{row.get('team')}' in {division}.")
+            continue
+
+        player_key = str(row.get('player', '')).strip()
+        player = state.players.get(int(player_key)) if player_key.isdigit() else None
+        if player is None or player.division_id != division.id:
+            matches = players_by_name.get(player_key.lower(), [])
+            if len(matches) > 1:
+                errors.append(f"Row {line}: more than one player named '{player_key}'; use the player id.")
+                continue
+            player = matches[0] if matches else None
+        if player is None:
+            errors.append(f"Row {line}: no player '{player_key}' in {division}.")
+            continue
+        if player.id not in state.available or player.id in seen_players:
+            errors.append(f"Row {line}: {player.first_name} {player.last_name} has already been drafted.")
+            continue
+        seen_players.add(player.id)
+
+        added[team.id] += 1
+        if state.roster_size(team.id) + added[team.id] > team.max_players:
+            errors.append(f"Row {line}: {team.name} would go over its max roster size of {team.max_players}.")
+            continue
+
+        round_number = str(row.get('round_number') or '').strip()
+        picks.append(DraftPick(
+            division=division,
+            team=team,
+            player=player,
+            pick_number=pick_number,
+            round_number=int(round_number) if round_number.isdigit() else (pick_number - 1) // max(state.team_count, 1) + 1,
+        ))
+
+    return picks, errors
+
+
+def save_draft_board(division, picks):
+    """Write a validated board: DraftPicks, Player.team/draft_round and Player.teams, in bulk and in one transaction."""
+    try:
+        with transaction.atomic():
+            _write_draft_board(division, picks)
+    except IntegrityError:
+        raise DraftBoardError(RACE_MESSAGE)
+
+    # Bulk writes skip the model signals, so announce the picks and drop the cached state here
+    def announce():
+        for pick in sorted(picks, key=lambda pick: pick.pick_number):
+            publish_draft_event(division.id, 'pick', pick_payload(pick))
+        draft_changed(division.id)
+
+    transaction.on_commit(announce)
+    return picks
+
+
+RACE_MESSAGE = "Picks were made while the board was uploading. Please check the board and try again."
+
+
+def _write_draft_board(division, picks):
+    player_ids = [pick.player.id for pick in picks]
+    first_pick_number = min(pick.pick_number for pick in picks)
+    last_pick_number = max(pick.pick_number for pick in picks)
+
+    # Re-check what validation read outside the transaction, now that we hold the write lock
+    sequence, _ = DraftSequence.objects.get_or_create(
+        division=division,
+        defaults={'last_pick_number': DraftPick.objects.filter(division=division).aggregate(last=Max('pick_number'))['last'] or 0},
+    )
+    taken = Player.objects.filter(id__in=player_ids).filter(Q(team__isnull=False) | Q(teams__isnull=False)).exists()
+    if taken or sequence.last_pick_number >= first_pick_number:
+        raise DraftBoardError(RACE_MESSAGE)
+    added = Counter(pick.team.id for pick in picks)
+    for team_id, roster_size, max_players in Team.objects.filter(id__in=added).values_list('id', 'roster_size', 'max_players'):
+        if roster_size + added[team_id] > max_players:
+            raise DraftBoardError(RACE_MESSAGE)
+
+    DraftPick.objects.bulk_create(picks)
+    # Fresh instances: the board's players are shared with the cached draft state
+    Player.objects.bulk_update(
+        [Player(id=pick.player.id, team=pick.team, draft_round=pick.round_number, drafted=True) for pick in picks],
+        ['team', 'draft_round', 'drafted'],
+    )
+    memberships = [(pick.player.id, pick.team.id) for pick in picks]
+    Player.teams.through.objects.bulk_create(
+        [Player.teams.through(player_id=player_id, team_id=team_id) for player_id, team_id in memberships]
+    )
+    adjust_roster_sizes(membership_changes(memberships))
+    # Stat rows follow Player.teams, and the bulk writes skip the m2m signals
+    rebuild_stat_lines(player_ids)
+    # Keep live picks numbered after the imported board
+    DraftSequence.objects.filter(id=sequence.id).update(last_pick_number=last_pick_number)
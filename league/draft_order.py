@@ -0,0 +1,85 @@
+# league/draft_order.py
+from collections import Counter
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import DraftSequence, DraftSlot
+from .draft_state import draft_changed, get_draft_state
+
+
+def team_order(teams):
+    """Round-one order: by draft_position, then teams without one in the order they were created."""
+    return sorted(teams, key=lambda team: (team.draft_position is None, team.draft_position or 0, team.id))
+
+
+def compute_slots(teams, draft_order, capacity):
+    """Return [(round_number, team)] for the whole draft.
+
+    capacity maps team id -> open roster spots. A team drops out of the order once
+    its spots are used up, and the other teams keep their relative order.
+    """
+    order = team_order(teams)
+    remaining = dict(capacity)
+    slots = []
+    round_number = 1
+    while any(remaining[team.id] > 0 for team in order):
+        round_teams = order if draft_order == 'linear' or round_number % 2 == 1 else list(reversed(order))
+        for team in round_teams:
+            if remaining[team.id] > 0:
+                slots.append((round_number, team))
+                remaining[team.id] -= 1
+        round_number += 1
+    return slots
+
+
+def build_draft_slots(division):
+    """Precompute the division's slot table, keeping filled slots and traded ownership.
+
+    Run when the draft opens. Slots that already hold a pick stay as they are; the
+    rest are regenerated from the current order and roster sizes, and any slot that
+    had been traded away (team != original_team) keeps its new owner.
+    """
+    state = get_draft_state(division.id)
+    teams = state.teams
+    if not teams:
+        return []
+
+    with transaction.atomic():
+        existing = list(DraftSlot.objects.filter(division=division))
+        filled = [slot for slot in existing if slot.pick_id]
+        traded = {
+            (slot.round_number, slot.original_team_id): slot.team_id
+            for slot in existing if not slot.pick_id and slot.team_id != slot.original_team_id
+        }
+        DraftSlot.objects.filter(division=division, pick__isnull=True).delete()
+
+        # Open roster spots as of the start of the draft: players drafted through a slot don't count
+        drafted = Counter(slot.team_id for slot in filled)
+        capacity = {
+            team.id: max(team.max_players - state.roster_size(team.id) + drafted[team.id], 0)
+            for team in teams
+        }
+        filled_turns = {(slot.round_number, slot.original_team_id) for slot in filled}
+        slot_number = max((slot.slot_number for slot in filled), default=0)
+        next_slot = slot_number + 1
+
+        new_slots = []
+        for round_number, team in compute_slots(teams, division.draft_order, capacity):
+            if (round_number, team.id) in filled_turns:
+                continue
+            slot_number += 1
+            new_slots.append(DraftSlot(
+                division=division,
+                slot_number=slot_number,
+                round_number=round_number,
+                original_team=team,
+                team_id=traded.get((round_number, team.id), team.id),
+            ))
+        DraftSlot.objects.bulk_create(new_slots)
+
+        DraftSequence.objects.get_or_create(division=division, defaults={'last_pick_number': state.last_pick_number})
+        DraftSequence.objects.filter(division=division).update(next_slot=next_slot, clock_started_at=timezone.now())
+
+    transaction.on_commit(lambda: draft_changed(division.id))
+    return new_slots
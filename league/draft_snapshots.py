@@ -0,0 +1,117 @@
+# league/draft_snapshots.py
+import json
+import threading
+import uuid
+from datetime import datetime, timezone as dt_timezone
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.template.loader import render_to_string
+
+from .models import Division
+from .draft_events import draft_version
+from .draft_state import get_draft_state
+
+# Pre-rendered public board, as bytes in the shared cache. Keys carry the division's draft
+# version and the division list version, so a change simply moves readers to a new key and
+# the old snapshot ages out. Only the first reader after a change renders; everyone else,
+# however many, is served the stored bytes without a database query.
+
+SNAPSHOT_TIMEOUT = 60 * 60
+
+_render_locks = {}
+_render_locks_lock = threading.Lock()
+
+
+def divisions_version():
+    """Token for the division list shown in the board's selector (names, leagues, open/closed)."""
+    token = cache.get('draft-divisions-version')
+    if token is None:
+        cache.add('draft-divisions-version', uuid.uuid4().hex, None)
+        token = cache.get('draft-divisions-version')
+    return token
+
+
+def bump_divisions_version():
+    cache.set('draft-divisions-version', uuid.uuid4().hex, None)
+
+
+def default_division_id():
+    """Id of the division /draft/ shows, cached alongside the division list."""
+    key = f"draft-default-division:{divisions_version()}"
+    division_id = cache.get(key)
+    if division_id is None:
+        division_id = Division.objects.values_list('id', flat=True).order_by('id').first() or 0
+        cache.set(key, division_id, SNAPSHOT_TIMEOUT)
+    return division_id or None
+
+
+def get_snapshot(division_id, variant, render):
+    """Return the cached bytes for this board variant, calling render() to build them on a miss."""
+    key = f"draft-snapshot:{division_id}:{draft_version(division_id)['token']}:{divisions_version()}:{variant}"
+    body = cache.get(key)
+    if body is not None:
+        return body
+
+    # One render per process per version; other readers wait for it instead of piling on
+    with _render_locks_lock:
+        lock = _render_locks.setdefault(key, threading.Lock())
+    with lock:
+        body = cache.get(key)
+        if body is None:
+            body = render()
+            cache.set(key, body, SNAPSHOT_TIMEOUT)
+    with _render_locks_lock:
+        _render_locks.pop(key, None)
+    return body
+
+
+def render_board_html(division):
+    state = get_draft_state(division.id)
+    return render_to_string('league/public_draft.html', {
+        'division': division,
+        'draft_picks': state.draft_picks(),
+        'divisions': Division.objects.select_related('league'),
+        'teams': state.teams,
+        'team_rosters': state.team_rosters(),
+    }).encode()
+
+
+def render_board_json(division, since=None):
+    """The board feed: every pick, or with since, only the picks after it plus the numbers removed up to it.
+
+    Rosters are always sent in full; they are small and the page redraws them on every change.
+    """
+    state = get_draft_state(division.id)
+    version = draft_version(division.id)
+
+    removed = []
+    last_pick_number = state.last_pick_number
+    if since is not None:
+        on_board = set(state.pick_numbers())
+        removed = [n for n in range(1, min(since, last_pick_number) + 1) if n not in on_board]
+
+    draft_picks_data = [
+        {
+            'id': pick.id,  # Added for potential future use
+            'round_number': pick.round_number if pick.round_number != 999 else 'Trade',
+            'pick_number': pick.pick_number,
+            'team_name': pick.team.name,
+            'player_name': f"{pick.player.first_name} {pick.player.last_name}"
+        }
+        for pick in state.draft_picks(since)
+    ]
+    return json.dumps({
+        'draft_picks': draft_picks_data,
+        'removed': removed,
+        'last_pick_number': last_pick_number,  # Rows above this are gone too
+        'rosters': [
+            {
+                'team_id': team.id,
+                'max_players': team.max_players,
+                'players': [f"{player.first_name} {player.last_name}" for player in state.roster(team.id)],
+            }
+            for team in state.teams
+        ],
+        'last_updated': datetime.fromtimestamp(version['modified'], tz=dt_timezone.utc).isoformat()
+    }, cls=DjangoJSONEncoder).encode()
@@ -0,0 +1,265 @@
+# league/draft_state.py
+import bisect
+import heapq
+import threading
+from collections import defaultdict
+
+from django.db.models import Q
+
+from .draft_events import draft_version, bump_draft_version, notify_draft_room
+
+
+class DraftState:
+    """A division's draft board held in memory: teams, rosters, the available pool and the pick counter.
+
+    Built with a fixed number of queries and then kept current in place by the draft
+    signals, so the draft views never rebuild rosters team by team.
+    """
+
+    def __init__(self, division_id):
+        self.division_id = division_id
+        self.lock = threading.RLock()
+        self.token = None
+        self.teams = []
+        self.players = {}                      # player_id -> Player
+        self.memberships = defaultdict(set)    # player_id -> team ids (Player.teams)
+        self.m2m_rosters = defaultdict(dict)   # team_id -> {player_id: Player}, in join order
+        self.fk_rosters = defaultdict(dict)    # team_id -> {player_id: Player} via Player.team
+        self.available = {}                    # player_id -> Player with no team at all
+        self.picks = []                        # DraftPicks ordered by pick_number
+        self.slots = {}                        # DraftSlots by slot_number
+        self.next_slot = 1                     # Slot on the clock
+        self.rankings = defaultdict(dict)      # team_id -> {player_id: rank} (DraftRanking)
+        # Best-available heaps for auto-draft. Taken players are not removed from the
+        # heaps; their entries go stale and are skipped when they reach the top.
+        self.rating_heap = []                  # (-rating, player_id)
+        self.ranking_heaps = defaultdict(list) # team_id -> [(rank, player_id)]
+
+    @classmethod
+    def build(cls, division_id, token):
+        from .models import Team, Player, DraftPick, DraftSlot, DraftSequence, DraftRanking
+
+        state = cls(division_id)
+        state.token = token
+        state.teams = list(Team.objects.filter(division_id=division_id).prefetch_related('coaches'))
+        team_ids = [team.id for team in state.teams]
+
+        memberships = list(
+            Player.teams.through.objects.filter(team_id__in=team_ids).values_list('player_id', 'team_id')
+        )
+        member_ids = {player_id for player_id, _ in memberships}
+        players = Player.objects.filter(
+            Q(division_id=division_id) | Q(id__in=member_ids) | Q(team_id__in=team_ids)
+        )
+        for player in players:
+            state.players[player.id] = player
+        for player_id, team_id in memberships:
+            state.memberships[player_id].add(team_id)
+            state.m2m_rosters[team_id][player_id] = state.players[player_id]
+        for player in state.players.values():
+            state._index(player)
+
+        # Rebuild the heaps in one heapify each rather than the pushes _index made above
+        for team_id, player_id, rank in DraftRanking.objects.filter(team_id__in=team_ids).values_list('team_id', 'player_id', 'rank'):
+            state.rankings[team_id][player_id] = rank
+        state.rating_heap = [(-(player.rating or 0), player.id) for player in state.available.values()]
+        heapq.heapify(state.rating_heap)
+        for team_id, ranks in state.rankings.items():
+            state.ranking_heaps[team_id] = [(rank, player_id) for player_id, rank in ranks.items() if player_id in state.available]
+            heapq.heapify(state.ranking_heaps[team_id])
+
+        state.picks = list(DraftPick.objects.filter(division_id=division_id).select_related('team', 'player'))
+        state.slots = {slot.slot_number: slot for slot in DraftSlot.objects.filter(division_id=division_id).select_related('team')}
+        state.next_slot = DraftSequence.objects.filter(division_id=division_id).values_list('next_slot', flat=True).first() or 1
+        return state
+
+    # === Reads ===
+
+    @property
+    def team_count(self):
+        return len(self.teams)
+
+    @property
+    def last_pick_number(self):
+        with self.lock:
+            return self.picks[-1].pick_number if self.picks else 0
+
+    def roster(self, team_id):
+        # Teams.players is primary; fall back to Player.team while data is migrated
+        with self.lock:
+            roster = self.m2m_rosters.get(team_id) or self.fk_rosters.get(team_id) or {}
+            return list(roster.values())
+
+    def roster_size(self, team_id):
+        with self.lock:
+            return len(self.m2m_rosters.get(team_id) or self.fk_rosters.get(team_id) or {})
+
+    def team_rosters(self):
+        return {team.id: self.roster(team.id) for team in self.teams}
+
+    def available_players(self, sort_by='last_name', descending=False):
+        with self.lock:
+            players = list(self.available.values())
+        return sorted(players, key=lambda player: (getattr(player, sort_by), player.id), reverse=descending)
+
+    def draft_picks(self, since=None):
+        with self.lock:
+            if since is None:
+                return list(self.picks)
+            return [pick for pick in self.picks if pick.pick_number > since]
+
+    def on_the_clock(self):
+        """The DraftSlot whose team picks next, or None when there is no draft order (or it's used up)."""
+        with self.lock:
+            return self.slots.get(self.next_slot)
+
+    def pick_numbers(self):
+        with self.lock:
+            return [pick.pick_number for pick in self.picks]
+
+    def best_available(self, team_id=None):
+        """The player auto-draft would take for team_id: the team's best-ranked available
+        player, else the highest-rated one. Stale heap entries are popped on the way, so
+        each taken player costs one O(log n) pop instead of a re-sort of the pool."""
+        with self.lock:
+            heap = self.ranking_heaps.get(team_id)
+            if heap:
+                ranks = self.rankings[team_id]
+                while heap and not (heap[0][1] in self.available and ranks.get(heap[0][1]) == heap[0][0]):
+                    heapq.heappop(heap)
+                if heap:
+                    return self.available[heap[0][1]]
+            heap = self.rating_heap
+            while heap and not (heap[0][1] in self.available and -(self.available[heap[0][1]].rating or 0) == heap[0][0]):
+                heapq.heappop(heap)
+            return self.available[heap[0][1]] if heap else None
+
+    # === In-place updates (called after commit) ===
+    # Each returns False when the change can't be applied, and the state is rebuilt instead.
+
+    def _index(self, player):
+        for roster in self.fk_rosters.values():
+            roster.pop(player.id, None)
+        if player.team_id:
+            self.fk_rosters[player.team_id][player.id] = player
+        if player.division_id == self.division_id and not player.team_id and not self.memberships[player.id]:
+            previous = self.available.get(player.id)
+            self.available[player.id] = player
+            if previous is None or previous.rating != player.rating:
+                self._push_available(player)
+        else:
+            self.available.pop(player.id, None)
+
+    def _push_available(self, player):
+        heapq.heappush(self.rating_heap, (-(player.rating or 0), player.id))
+        for team_id, ranks in self.rankings.items():
+            if player.id in ranks:
+                heapq.heappush(self.ranking_heaps[team_id], (ranks[player.id], player.id))
+
+    def save_player(self, player):
+        self.players[player.id] = player
+        for team_id in self.memberships[player.id]:
+            self.m2m_rosters[team_id][player.id] = player
+        self._index(player)
+        return True
+
+    def delete_player(self, player_id):
+        player = self.players.pop(player_id, None)
+        for team_id in self.memberships.pop(player_id, set()):
+            self.m2m_rosters[team_id].pop(player_id, None)
+        for roster in self.fk_rosters.values():
+            roster.pop(player_id, None)
+        self.available.pop(player_id, None)
+        return True
+
+    def add_memberships(self, player_id, team_ids):
+        player = self.players.get(player_id)
+        if player is None:
+            return False
+        team_ids = {team_id for team_id in team_ids if team_id in {team.id for team in self.teams}}
+        for team_id in team_ids:
+            self.memberships[player_id].add(team_id)
+            self.m2m_rosters[team_id][player_id] = player
+        self._index(player)
+        return True
+
+    def remove_memberships(self, player_id, team_ids=None):
+        player = self.players.get(player_id)
+        if player is None:
+            return True
+        if team_ids is None:
+            team_ids = set(self.memberships[player_id])
+        for team_id in team_ids:
+            self.memberships[player_id].discard(team_id)
+            self.m2m_rosters[team_id].pop(player_id, None)
+        self._index(player)
+        return True
+
+    def add_pick(self, pick):
+        numbers = [existing.pick_number for existing in self.picks]
+        self.picks.insert(bisect.bisect_right(numbers, pick.pick_number), pick)
+        return True
+
+    def delete_pick(self, pick_id):
+        self.picks = [pick for pick in self.picks if pick.id != pick_id]
+        for slot in self.slots.values():
+            if slot.pick_id == pick_id:
+                slot.pick_id = None  # on_delete=SET_NULL runs as a bulk update, without signals
+        return True
+
+    def save_slot(self, slot):
+        if slot.slot_number not in self.slots:
+            return False
+        self.slots[slot.slot_number] = slot
+        if slot.pick_id:
+            self.next_slot = max(self.next_slot, slot.slot_number + 1)
+        return True
+
+
+_states = {}
+_states_lock = threading.Lock()
+
+
+def get_draft_state(division_id):
+    """Return the division's DraftState, rebuilding it if another process changed the draft."""
+    token = draft_version(division_id)['token']
+    state = _states.get(division_id)
+    if state is not None and state.token == token:
+        return state
+
+    state = DraftState.build(division_id, token)
+    with _states_lock:
+        _states[division_id] = state
+    return state
+
+
+def draft_changed(division_id, update=None):
+    """Bump the division's draft version and apply update(state) to the cached state.
+
+    Call after commit. If the cached state had already fallen behind (another bump came
+    in since the version it is at), or the update can't be applied in place, the state is dropped and rebuilt on the next read.
+    Connected draft rooms are told about the new version either way.
+    """
+    version = bump_draft_version(division_id)
+
+    state = _states.get(division_id)
+    if state is not None:
+        with state.lock:
+            # In place only if this bump came straight after the version the state is at
+            current = state.token == str(version['number'] - 1)
+            applied = current and update is not None and update(state) is not False
+            if applied:
+                state.token = version['token']
+        if not applied:
+            with _states_lock:
+                _states.pop(division_id, None)
+    notify_draft_room(division_id, version['token'])
+
+
+def divisions_for_player(player):
+    """Divisions whose draft state a change to this player touches."""
+    division_ids = {player.division_id} if player.division_id else set()
+    for division_id, state in list(_states.items()):
+        if player.id in state.players or any(team.id == player.team_id for team in state.teams):
+            division_ids.add(division_id)
+    return division_ids
@@ -0,0 +1,168 @@
+# league/event_bus.py
+import logging
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import close_old_connections
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class LocalEventBus:
+    """Pub/sub for draft and stats events within this process.
+
+    Handlers subscribe to a topic prefix ("draft:", "draft_room_") and are called with
+    (topic, kind, data). Enough for a single worker; see DatabaseEventBus for several.
+    """
+
+    def __init__(self):
+        self._subscribers = []
+
+    def subscribe(self, prefix, handler):
+        self._subscribers.append((prefix, handler))
+
+    def publish(self, topic, kind, data, latest_only=False):
+        self.deliver(topic, kind, data)
+
+    def deliver(self, topic, kind, data):
+        for prefix, handler in self._subscribers:
+            if topic.startswith(prefix):
+                try:
+                    handler(topic, kind, data)
+                except Exception:
+                    logger.exception("Event handler for %s failed", topic)
+
+    def start(self):
+        pass
+
+
+class DatabaseEventBus(LocalEventBus):
+    """Fans events out to every worker process through the BusEvent table, no broker needed.
+
+    An event is delivered to this process's subscribers at once and queued in an outbox.
+    A relay thread writes the outbox in one bulk INSERT per tick (so each event is stored
+    once, however many workers there are) and delivers the rows other processes wrote
+    since its last read. With latest_only, a queued event replaces an unsent one of the
+    same topic and kind, which keeps "something changed" notices to one row per tick.
+    Rows older than RETENTION are pruned as the relay goes.
+    """
+
+    POLL_INTERVAL = 0.2
+    MAX_BACKOFF = 5  # Seconds between tries while the relay keeps failing (e.g. table locked)
+    RETENTION = timedelta(minutes=10)
+    PRUNE_EVERY = 300  # Ticks
+
+    def __init__(self):
+        super().__init__()
+        self.origin = uuid.uuid4().hex
+        self._outbox = {}
+        self._outbox_lock = threading.Lock()
+        self._sequence = 0
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    def publish(self, topic, kind, data, latest_only=False):
+        self.deliver(topic, kind, data)
+        with self._outbox_lock:
+            self._sequence += 1
+            key = (topic, kind) if latest_only else self._sequence
+            self._outbox.pop(key, None)  # Re-queue at the end so order is kept
+            self._outbox[key] = (topic, kind, data)
+        self.start()
+
+    def start(self):
+        """Start the relay thread of this process, once. Called by publishers and watchers."""
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self.run, name='draft-event-bus', daemon=True)
+                self._thread.start()
+
+    def run(self):
+        from .models import BusEvent
+
+        close_old_connections()
+        last_id = BusEvent.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        ticks = 0
+        delay = self.POLL_INTERVAL
+        while True:
+            try:
+                self.flush()
+                last_id = self.poll(last_id)
+                ticks += 1
+                if ticks % self.PRUNE_EVERY == 0:
+                    BusEvent.objects.filter(created__lt=timezone.now() - self.RETENTION).delete()
+            except Exception:
+                # Log the first failure of a run of them, then back off quietly until one succeeds
+                if delay == self.POLL_INTERVAL:
+                    logger.exception("Event bus relay failed; retrying with backoff")
+                delay = min(delay * 2, self.MAX_BACKOFF)
+            else:
+                if delay != self.POLL_INTERVAL:
+                    logger.info("Event bus relay recovered")
+                delay = self.POLL_INTERVAL
+            close_old_connections()
+            time.sleep(delay)
+
+    def flush(self):
+        from .models import BusEvent
+
+        with self._outbox_lock:
+            events = list(self._outbox.values())
+            self._outbox.clear()
+        if events:
+            BusEvent.objects.bulk_create([
+                BusEvent(topic=topic, kind=kind, data=data, origin=self.origin) for topic, kind, data in events
+            ])
+
+    def poll(self, last_id):
+        from .models import BusEvent
+
+        for event_id, topic, kind, data, origin in (
+            BusEvent.objects.filter(id__gt=last_id).values_list('id', 'topic', 'kind', 'data', 'origin')
+        ):
+            last_id = event_id
+            if origin != self.origin:
+                self.deliver(topic, kind, data)
+        return last_id
+
+
+_bus = None
+_bus_lock = threading.Lock()
+_subscriptions = []
+
+
+def get_event_bus():
+    """The process's event bus, of the class named by settings.DRAFT_EVENT_BUS."""
+    global _bus
+    if _bus is None:
+        with _bus_lock:
+            if _bus is None:
+                bus = import_string(getattr(settings, 'DRAFT_EVENT_BUS', 'league.event_bus.LocalEventBus'))()
+                for prefix, handler in _subscriptions:
+                    bus.subscribe(prefix, handler)
+                _bus = bus
+    return _bus
+
+
+def subscribe(prefix, handler):
+    """Subscribe handler on this process's bus, and on any bus that replaces it."""
+    with _bus_lock:
+        _subscriptions.append((prefix, handler))
+        if _bus is not None:
+            _bus.subscribe(prefix, handler)
+
+
+@receiver(setting_changed)
+def reset_event_bus(setting, **kwargs):
+    # Tests switch buses with override_settings(DRAFT_EVENT_BUS=...)
+    global _bus
+    if setting == 'DRAFT_EVENT_BUS':
+        with _bus_lock:
+            _bus = None
@@ -83,6 +83,9 @@ class PlayerCSVUploadForm(forms.Form):
         empty_label="-- Select a Division --"
     )
 
+class DraftBoardUploadForm(forms.Form):
+    board_file = forms.FileField(label="Upload CSV or JSON File", widget=forms.FileInput(attrs={'class': 'form-control', 'accept': '.csv,.json'}))
+
 class JoinTeamRequestForm(forms.ModelForm):
     class Meta:
         model = JoinTeamRequest
@@ -0,0 +1,206 @@
+# league/leaderboards.py
+import bisect
+import threading
+
+from django.conf import settings
+from django.db.models import F, Sum
+
+from .models import PlayerStatLine, Team
+from .stats import STAT_FIELDS, rate_stats
+from .versions import bump_version, read_version
+
+# Division and league leaderboards, built from the PlayerStatLine totals with one grouped
+# query per scope and then held in memory as sorted top lists, one per category. Like the
+# draft state, each process keeps its own copy checked against a version counter
+# (league.versions, bumped atomically in the database and mirrored in the shared cache):
+# stat changes bump the counter and patch this process's lists in place (one small query
+# for the changed players) if nobody bumped it in between; other processes rebuild on
+# their next read.
+#
+# Each list keeps LEADERBOARD_DEPTH entries but shows LEADERBOARD_SIZE, so a leader whose
+# numbers drop can fall out without a rebuild. Only when a list would run short of
+# LEADERBOARD_SIZE with more qualified players left unseen is the board rebuilt.
+
+LEADERBOARD_SIZE = 10
+LEADERBOARD_DEPTH = 30
+
+
+def min_plate_appearances():
+    return getattr(settings, 'LEADERBOARD_MIN_PLATE_APPEARANCES', 10)
+
+
+def min_innings_pitched():
+    return getattr(settings, 'LEADERBOARD_MIN_INNINGS_PITCHED', 5)
+
+
+def plate_appearances(totals):
+    return totals['at_bats'] + totals['base_on_balls'] + totals['hit_by_pitch'] + totals['sacrifice_flies']
+
+
+def _qualified_batter(totals):
+    return plate_appearances(totals) >= min_plate_appearances()
+
+
+def _qualified_pitcher(totals):
+    return totals['innings_pitched'] >= min_innings_pitched()
+
+
+def _has(field):
+    return lambda totals: totals[field] > 0
+
+
+# key: (label, group, value(totals, rates), lowest first, qualifies(totals), format)
+CATEGORIES = {
+    'avg': ('AVG', 'batting', lambda t, r: r['avg'], False, _qualified_batter, '{:.3f}'),
+    'obp': ('OBP', 'batting', lambda t, r: r['obp'], False, _qualified_batter, '{:.3f}'),
+    'slg': ('SLG', 'batting', lambda t, r: r['slg'], False, _qualified_batter, '{:.3f}'),
+    'ops': ('OPS', 'batting', lambda t, r: r['ops'], False, _qualified_batter, '{:.3f}'),
+    'home_runs': ('HR', 'batting', lambda t, r: t['home_runs'], False, _has('home_runs'), '{}'),
+    'rbis': ('RBI', 'batting', lambda t, r: t['rbis'], False, _has('rbis'), '{}'),
+    'era': ('ERA', 'pitching', lambda t, r: r['era'], True, _qualified_pitcher, '{:.2f}'),
+    'strikeouts_pitching': ('K', 'pitching', lambda t, r: t['strikeouts_pitching'], False, _has('strikeouts_pitching'), '{}'),
+    'kbb': ('K/BB', 'pitching', lambda t, r: r['kbb'], False, _qualified_pitcher, '{:.2f}'),
+}
+
+
+def scope_filter(scope):
+    kind, scope_id = scope
+    if kind == 'division':
+        return {'team__division_id': scope_id}
+    return {'team__division__league_id': scope_id}
+
+
+def scope_totals(scope, player_ids=None):
+    """{player_id: (name, totals)} summed over the player's stat lines for teams in scope, in one grouped query."""
+    lines = PlayerStatLine.objects.filter(**scope_filter(scope))
+    if player_ids is not None:
+        lines = lines.filter(player_id__in=player_ids)
+    rows = (
+        lines.order_by()
+        .values('player_id')
+        .annotate(first_name=F('player__first_name'), last_name=F('player__last_name'), **{field: Sum(field) for field in STAT_FIELDS})
+    )
+    return {
+        row['player_id']: (f"{row['first_name']} {row['last_name']}", {field: row[field] or 0 for field in STAT_FIELDS})
+        for row in rows
+    }
+
+
+class Leaderboard:
+    """Top lists for one scope, ('division', id) or ('league', id)."""
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.lock = threading.RLock()
+        self.token = None
+        self.entries = {category: [] for category in CATEGORIES}   # Sorted (sort key, player_id, name, value)
+        self.complete = {category: True for category in CATEGORIES}  # Every qualified player is in the list
+
+    @classmethod
+    def build(cls, scope, token):
+        board = cls(scope)
+        board.token = token
+        players = scope_totals(scope)
+        for category in CATEGORIES:
+            entries = sorted(
+                entry for player_id, (name, totals) in players.items()
+                if (entry := board._entry(category, player_id, name, totals))
+            )
+            board.entries[category] = entries[:LEADERBOARD_DEPTH]
+            board.complete[category] = len(entries) <= LEADERBOARD_DEPTH
+        return board
+
+    @staticmethod
+    def _entry(category, player_id, name, totals):
+        _, _, value, lowest_first, qualifies, _ = CATEGORIES[category]
+        if not qualifies(totals):
+            return None
+        value = value(totals, rate_stats(totals))
+        return (value if lowest_first else -value, player_id, name, value)
+
+    def top(self, category, size=LEADERBOARD_SIZE):
+        display = CATEGORIES[category][5]
+        with self.lock:
+            entries = self.entries[category][:size]
+        return [
+            {'rank': rank, 'player_id': player_id, 'name': name, 'value': value, 'display': display.format(value)}
+            for rank, (_, player_id, name, value) in enumerate(entries, start=1)
+        ]
+
+    def update_players(self, player_ids):
+        """Re-rank these players from fresh totals. Returns False when the board has to be rebuilt."""
+        players = scope_totals(self.scope, player_ids)
+        with self.lock:
+            for category, entries in self.entries.items():
+                kept = [entry for entry in entries if entry[1] not in player_ids]
+                boundary = entries[-1] if entries else None
+                for player_id in player_ids:
+                    name, totals = players.get(player_id, (None, None))
+                    entry = self._entry(category, player_id, name, totals) if totals else None
+                    if entry is None:
+                        continue
+                    # Players we don't hold all rank below the list's last entry, so anyone
+                    # landing past it can't be placed among them
+                    if self.complete[category] or (boundary is not None and entry < boundary):
+                        bisect.insort(kept, entry)
+                    else:
+                        self.complete[category] = False
+                if len(kept) > LEADERBOARD_DEPTH:
+                    del kept[LEADERBOARD_DEPTH:]
+                    self.complete[category] = False
+                if len(kept) < LEADERBOARD_SIZE and not self.complete[category]:
+                    return False
+                self.entries[category] = kept
+        return True
+
+
+# === Versions and the per-process cache ===
+
+_boards = {}
+_boards_lock = threading.Lock()
+
+
+def _version_key(scope):
+    return f"leaderboard-version-number:{scope[0]}:{scope[1]}"
+
+
+def leaderboard_version(scope):
+    return read_version(_version_key(scope))
+
+
+def get_leaderboard(scope):
+    """Return the scope's Leaderboard, rebuilding it if another process changed the stats."""
+    token = leaderboard_version(scope)
+    board = _boards.get(scope)
+    if board is not None and board.token == token:
+        return board
+    board = Leaderboard.build(scope, token)
+    with _boards_lock:
+        _boards[scope] = board
+    return board
+
+
+def leaderboards_changed(team_ids, player_ids=None):
+    """Call after commit when stat lines of these teams changed.
+
+    With player_ids, this process's boards are patched for just those players; without,
+    or if a patch can't be applied, they are dropped and rebuilt on the next read.
+    """
+    scopes = set()
+    for division_id, league_id in Team.objects.filter(id__in=team_ids).values_list('division_id', 'division__league_id'):
+        scopes.add(('division', division_id))
+        scopes.add(('league', league_id))
+
+    for scope in scopes:
+        token = bump_version(_version_key(scope))
+        board = _boards.get(scope)
+        if board is None:
+            continue
+        with board.lock:
+            # In place only if this bump came straight after the version the board is at
+            current = board.token == token - 1
+            if current and player_ids is not None and board.update_players(set(player_ids)):
+                board.token = token
+                continue
+        with _boards_lock:
+            _boards.pop(scope, None)
@@ -0,0 +1,258 @@
+# league/management/commands/benchmark_draft.py
+import json
+import logging
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, close_old_connections, connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from league.draft_order import build_draft_slots
+from league.draft_state import get_draft_state
+from league.models import Division, League, Player, Team
+
+
+def percentile(values, pct):
+    # Nearest-rank percentile of an already sorted list
+    if not values:
+        return 0.0
+    index = max(0, min(len(values) - 1, int(round(pct / 100 * len(values) + 0.5)) - 1))
+    return values[index]
+
+
+class Recorder:
+    """Latency, query count and outcome of every request, grouped by endpoint. Shared by all threads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timings = defaultdict(list)
+        self.queries = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.lock_errors = Counter()
+        self.errors = Counter()
+
+    def request(self, endpoint, send):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            try:
+                response = send()
+                status = response.status_code
+            except OperationalError as e:
+                status = 'locked' if 'locked' in str(e) else 'error'
+                response = None
+            except Exception:
+                status = 'error'
+                response = None
+            elapsed = (time.perf_counter() - started) * 1000
+        with self.lock:
+            self.timings[endpoint].append(elapsed)
+            self.queries[endpoint].append(len(captured.captured_queries))
+            self.statuses[endpoint][status] += 1
+            if status == 'locked':
+                self.lock_errors[endpoint] += 1
+            elif status == 'error':
+                self.errors[endpoint] += 1
+        return response
+
+    def summary(self):
+        results = {}
+        for endpoint, timings in sorted(self.timings.items()):
+            timings = sorted(timings)
+            queries = self.queries[endpoint]
+            results[endpoint] = {
+                'requests': len(timings),
+                'p50_ms': round(percentile(timings, 50), 2),
+                'p95_ms': round(percentile(timings, 95), 2),
+                'p99_ms': round(percentile(timings, 99), 2),
+                'queries_per_request': round(sum(queries) / len(queries), 2),
+                'max_queries': max(queries),
+                'lock_errors': self.lock_errors[endpoint],
+                'errors': self.errors[endpoint],
+                'statuses': {str(status): count for status, count in self.statuses[endpoint].items()},
+            }
+        return results
+
+
+class Command(BaseCommand):
+    help = ('Benchmark the draft room: seed a division on top of seed_test_data, then run simulated '
+            'coaches making picks while spectators poll the public draft board')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--teams', type=int, default=8, help='Teams (and coaches) in the benchmark division')
+        parser.add_argument('--rounds', type=int, default=12, help='Roster size each team drafts up to')
+        parser.add_argument('--extra-players', type=int, default=20, help='Undrafted players left in the pool at the end')
+        parser.add_argument('--spectators', type=int, default=10, help='Simulated public_draft viewers')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds between spectator polls')
+        parser.add_argument('--think-time', type=float, default=0.05, help='Seconds a coach waits between dashboard refreshes')
+        parser.add_argument('--free-for-all', action='store_true', help='No draft order: every coach picks as fast as it can')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed for player ratings and free-for-all choices')
+        parser.add_argument('--keep', action='store_true', help='Keep the benchmark division instead of deleting it')
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+        parser.add_argument('--baseline', help='Compare against results written earlier with --output')
+
+    def handle(self, *args, **options):
+        if not User.objects.filter(username='coach1').exists():
+            self.stdout.write("Seeding base data with seed_test_data...")
+            call_command('seed_test_data')
+
+        rng = random.Random(options['seed'])
+        division, coaches = self.seed_division(options, rng)
+        self.stdout.write(
+            f"Benchmark division {division.id}: {options['teams']} teams x {options['rounds']} rounds, "
+            f"{options['spectators']} spectators"
+        )
+
+        # 409s from lost pick races are expected here; don't log each one
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+        # Requests must carry a host the site accepts
+        host = next((h.lstrip('.') for h in settings.ALLOWED_HOSTS if h != '*'), 'localhost')
+        recorder = Recorder()
+        done = threading.Event()
+        threads = [
+            threading.Thread(target=self.coach, args=(recorder, division, user, team, host, options, random.Random(rng.random())))
+            for team, user in coaches
+        ] + [
+            threading.Thread(target=self.spectator, args=(recorder, done, division, host, options))
+            for _ in range(options['spectators'])
+        ]
+
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads[:len(coaches)]:
+            thread.join()
+        done.set()
+        for thread in threads[len(coaches):]:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        picks = division.draft_picks.count()
+        results = {
+            'teams': options['teams'],
+            'rounds': options['rounds'],
+            'spectators': options['spectators'],
+            'free_for_all': options['free_for_all'],
+            'seconds': round(elapsed, 2),
+            'picks': picks,
+            'endpoints': recorder.summary(),
+        }
+        self.report(results, options.get('baseline'))
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+        if not options['keep']:
+            User.objects.filter(id__in=[user.id for _, user in coaches]).delete()
+            division.delete()
+
+    def seed_division(self, options, rng):
+        league, _ = League.objects.get_or_create(name='Benchmark League')
+        division = Division.objects.create(name=f"Benchmark {int(time.time())}", league=league)
+        teams = Team.objects.bulk_create([
+            Team(name=f"{division.name} Team {t}", division=division, max_players=options['rounds'], draft_position=t)
+            for t in range(1, options['teams'] + 1)
+        ])
+        coaches = []
+        for team in teams:
+            user = User.objects.create_user(username=f"bench{division.id}_coach{team.draft_position}")  # force_login, no password needed
+            team.coaches.add(user)
+            coaches.append((team, user))
+        Player.objects.bulk_create([
+            Player(first_name=f"Player{i}", last_name=f"Bench{i:04d}", division=division, rating=rng.randint(0, 100))
+            for i in range(options['teams'] * options['rounds'] + options['extra_players'])
+        ])
+
+        if options['free_for_all']:
+            division.is_open = True
+            division.save()
+        else:
+            division.is_open = True
+            division.draft_order = 'snake'
+            division.save()
+            build_draft_slots(division)
+        return division, coaches
+
+    def coach(self, recorder, division, user, team, host, options, rng):
+        client = Client(HTTP_HOST=host)
+        client.force_login(user)
+        dashboard_url = reverse('dashboard_with_division', args=[division.id])
+        try:
+            while True:
+                state = get_draft_state(division.id)
+                if state.roster_size(team.id) >= team.max_players:
+                    return
+                if options['free_for_all']:
+                    available = state.available_players()
+                    if not available:
+                        return
+                    player = rng.choice(available)
+                else:
+                    slot = state.on_the_clock()
+                    if slot is None:
+                        return
+                    if slot.team_id != team.id:
+                        recorder.request('dashboard', lambda: client.get(dashboard_url))
+                        time.sleep(options['think_time'])
+                        continue
+                    player = state.best_available(team.id)
+                    if player is None:
+                        return
+                pick_url = reverse('make_pick', args=[player.id, division.id])
+                recorder.request('make_pick', lambda: client.post(pick_url))
+        finally:
+            close_old_connections()
+            connection.close()
+
+    def spectator(self, recorder, done, division, host, options):
+        # Load the board once, then poll it the way public_draft.html does: deltas with If-None-Match
+        client = Client(HTTP_HOST=host)
+        url = reverse('public_draft_with_division', args=[division.id])
+        etag = None
+        since = 0
+        try:
+            recorder.request('public_draft', lambda: client.get(url))
+            while not done.is_set():
+                headers = {'X-Requested-With': 'XMLHttpRequest'}
+                if etag:
+                    headers['If-None-Match'] = etag
+                response = recorder.request('public_draft_poll', lambda: client.get(url, {'since': since}, headers=headers))
+                if response is not None and response.status_code == 200:
+                    etag = response.get('ETag')
+                    since = response.json().get('last_pick_number', since)
+                done.wait(options['poll_interval'])
+        finally:
+            close_old_connections()
+            connection.close()
+
+    def report(self, results, baseline_path=None):
+        baseline = {}
+        if baseline_path:
+            with open(baseline_path) as f:
+                baseline = json.load(f).get('endpoints', {})
+
+        self.stdout.write(f"\n{results['picks']} picks in {results['seconds']}s\n")
+        self.stdout.write(f"{'endpoint':<20}{'requests':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>9}{'locked':>8}{'errors':>8}")
+        for endpoint, row in results['endpoints'].items():
+            self.stdout.write(
+                f"{endpoint:<20}{row['requests']:>9}{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}"
+                f"{row['queries_per_request']:>9}{row['lock_errors']:>8}{row['errors']:>8}"
+            )
+            if endpoint in baseline:
+                before = baseline[endpoint]
+                self.stdout.write(
+                    f"{'  vs baseline':<20}{'':>9}{row['p50_ms'] - before['p50_ms']:>+10.2f}{row['p95_ms'] - before['p95_ms']:>+10.2f}"
+                    f"{row['p99_ms'] - before['p99_ms']:>+10.2f}{row['queries_per_request'] - before['queries_per_request']:>+9.2f}"
+                )
+
+        lock_errors = sum(row['lock_errors'] for row in results['endpoints'].values())
+        style = self.style.SUCCESS if not lock_errors else self.style.ERROR
+        self.stdout.write(style(f"\nSQLite lock errors: {lock_errors}"))
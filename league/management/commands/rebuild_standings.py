@@ -0,0 +1,21 @@
+# league/management/commands/rebuild_standings.py
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from league.models import Game
+from league.stats import rebuild_game_scores
+from league.standings import rebuild_standings
+
+class Command(BaseCommand):
+    help = 'Recompute game scores from PlayerGameStat and the TeamStanding rows from them (after raw SQL edits or a restore)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--division', type=int, help='Only rebuild games and standings of this division id')
+
+    def handle(self, *args, **options):
+        game_ids = None
+        if options['division']:
+            game_ids = Game.objects.filter(Q(team_home__division_id=options['division']) | Q(team_away__division_id=options['division'])).values_list('id', flat=True)
+
+        games = rebuild_game_scores(game_ids)
+        teams = rebuild_standings(options['division'])
+        self.stdout.write(self.style.SUCCESS(f"Rescored {games} games and rebuilt standings for {teams} teams"))
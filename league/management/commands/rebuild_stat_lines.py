@@ -0,0 +1,18 @@
+# league/management/commands/rebuild_stat_lines.py
+from django.core.management.base import BaseCommand
+from league.models import Player
+from league.stats import rebuild_stat_lines
+
+class Command(BaseCommand):
+    help = 'Recompute the PlayerStatLine totals and StatRollup rows from PlayerGameStat (after raw SQL edits or a restore)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--division', type=int, help='Only rebuild players in this division id')
+
+    def handle(self, *args, **options):
+        player_ids = None
+        if options['division']:
+            player_ids = Player.objects.filter(division_id=options['division']).values_list('id', flat=True)
+
+        lines = rebuild_stat_lines(player_ids)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {lines} stat lines"))
@@ -0,0 +1,25 @@
+# league/management/commands/reconcile_roster_sizes.py
+from django.core.management.base import BaseCommand
+from league.models import Player, Team
+from league.rosters import reconcile_drafted, reconcile_roster_sizes
+
+class Command(BaseCommand):
+    help = 'Recount Team.roster_size and Player.drafted from Player.teams and repair any drift (run migrate_team_to_teams first for old Player.team data)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--division', type=int, help='Only reconcile teams in this division id')
+
+    def handle(self, *args, **options):
+        teams = Team.objects.all()
+        players = Player.objects.all()
+        if options['division']:
+            teams = teams.filter(division_id=options['division'])
+            players = players.filter(division_id=options['division'])
+
+        drifted = reconcile_roster_sizes(teams)
+        for team in drifted:
+            self.stdout.write(self.style.WARNING(f"Fixed {team}: roster size is {team.roster_size}"))
+        self.stdout.write(self.style.SUCCESS(f"Completed reconciliation: {len(drifted)} teams corrected"))
+
+        drifted_players = reconcile_drafted(players)
+        self.stdout.write(self.style.SUCCESS(f"Fixed the drafted flag of {len(drifted_players)} players"))
@@ -0,0 +1,21 @@
+# league/management/commands/run_draft_clock.py
+from django.core.management.base import BaseCommand
+from league.draft_clock import CLOCK_INTERVAL_SECONDS, run_clock, run_expired_clocks
+
+
+class Command(BaseCommand):
+    help = 'Run the draft pick clock: auto-draft for teams whose time to pick has run out'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=CLOCK_INTERVAL_SECONDS, help='Seconds between clock ticks')
+        parser.add_argument('--once', action='store_true', help='Check every clock once and exit')
+
+    def handle(self, *args, **options):
+        if options['once']:
+            picks = run_expired_clocks()
+            for pick in picks:
+                self.stdout.write(self.style.SUCCESS(f"Auto-drafted {pick.player} to {pick.team} (pick {pick.pick_number})"))
+            self.stdout.write(self.style.SUCCESS(f"Completed: {len(picks)} auto-picks"))
+            return
+        self.stdout.write(self.style.SUCCESS(f"Draft clock running every {options['interval']}s"))
+        run_clock(interval=options['interval'])
@@ -0,0 +1,48 @@
+# Generated by Django 5.1.3 on 2026-10-18 11:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def renumber_duplicate_picks(apps, schema_editor):
+    # Concurrent make_pick calls could hand out the same pick number twice.
+    # Keep the earliest pick on each number and move the others to the end of the board.
+    DraftPick = apps.get_model('league', 'DraftPick')
+    DraftSequence = apps.get_model('league', 'DraftSequence')
+    Division = apps.get_model('league', 'Division')
+
+    for division in Division.objects.all():
+        picks = DraftPick.objects.filter(division=division).order_by('pick_number', 'id')
+        last_pick_number = picks.aggregate(last=Max('pick_number'))['last'] or 0
+        seen = set()
+        for pick in picks:
+            if pick.pick_number in seen:
+                last_pick_number += 1
+                pick.pick_number = last_pick_number
+                pick.save(update_fields=['pick_number'])
+            seen.add(pick.pick_number)
+        DraftSequence.objects.create(division=division, last_pick_number=last_pick_number)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('league', '0032_auto_20250403_1926'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DraftSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_pick_number', models.IntegerField(default=0)),
+                ('division', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='draft_sequence', to='league.division')),
+            ],
+        ),
+        migrations.RunPython(renumber_duplicate_picks, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='draftpick',
+            constraint=models.UniqueConstraint(fields=('division', 'pick_number'), name='unique_pick_number_per_division'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.1.3 on 2026-10-18 11:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('league', '0033_draftsequence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='division',
+            name='draft_order',
+            field=models.CharField(choices=[('linear', 'Linear'), ('snake', 'Snake')], default='snake', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='draftsequence',
+            name='next_slot',
+            field=models.IntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='team',
+            name='draft_position',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='DraftSlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slot_number', models.IntegerField()),
+                ('round_number', models.IntegerField()),
+                ('division', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='draft_slots', to='league.division')),
+                ('original_team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='original_draft_slots', to='league.team')),
+                ('pick', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='slot', to='league.draftpick')),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='draft_slots', to='league.team')),
+            ],
+            options={
+                'ordering': ['slot_number'],
+                'constraints': [models.UniqueConstraint(fields=('division', 'slot_number'), name='unique_slot_number_per_division')],
+            },
+        ),
+    ]
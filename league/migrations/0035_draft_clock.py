@@ -0,0 +1,37 @@
+# Generated by Django 5.1.3 on 2026-10-18 11:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('league', '0034_draft_order'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='division',
+            name='pick_time_limit',
+            field=models.PositiveIntegerField(blank=True, help_text='Seconds per pick before the team is auto-drafted. Leave empty for no clock.', null=True),
+        ),
+        migrations.AddField(
+            model_name='draftsequence',
+            name='clock_started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='DraftRanking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveIntegerField()),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='draft_rankings', to='league.player')),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='draft_rankings', to='league.team')),
+            ],
+            options={
+                'ordering': ['team', 'rank'],
+                'constraints': [models.UniqueConstraint(fields=('team', 'player'), name='unique_ranking_per_team_player')],
+            },
+        ),
+    ]
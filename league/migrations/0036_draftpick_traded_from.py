@@ -0,0 +1,19 @@
+# Generated by Django 5.1.3 on 2026-10-18 11:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('league', '0035_draft_clock'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='draftpick',
+            name='traded_from',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='traded_away_picks', to='league.team'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.3 on 2026-10-18 11:44
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_rosters(apps, schema_editor):
+    Team = apps.get_model('league', 'Team')
+    teams = list(Team.objects.annotate(actual=Count('players')))
+    for team in teams:
+        team.roster_size = team.actual
+    Team.objects.bulk_update(teams, ['roster_size'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('league', '0036_draftpick_traded_from'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='team',
+            name='roster_size',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_rosters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.3 on 2026-10-18 11:42
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Q
+
+
+def mark_drafted(apps, schema_editor):
+    Player = apps.get_model('league', 'Player')
+    Player.objects.filter(Q(team__isnull=False) | Q(teams__isnull=False)).update(drafted=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('league', '0037_team_roster_size'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='player',
+            name='drafted',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(mark_drafted, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(fields=['division', 'drafted', 'first_name', 'id'], name='player_pool_first_name'),
+        ),
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(fields=['division', 'drafted', 'last_name', 'id'], name='player_pool_last_name'),
+        ),
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(fields=['division', 'drafted', 'rating', 'id'], name='player_pool_rating'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.3 on 2026-10-18 11:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('league', '0038_player_drafted'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BusEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('topic', models.CharField(max_length=100)),
+                ('kind', models.CharField(max_length=30)),
+                ('data', models.JSONField(default=dict)),
+                ('origin', models.CharField(max_length=32)),
+                ('created', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 5.1.3 on 2026-10-18 11:51
+
+import django.db.models.deletion
+from collections import defaultdict
+
+from django.db import migrations, models
+
+STAT_FIELDS = (
+    'at_bats', 'runs', 'hits', 'rbis', 'singles', 'doubles', 'triples', 'home_runs',
+    'strikeouts', 'base_on_balls', 'hit_by_pitch', 'sacrifice_flies',
+    'innings_pitched', 'hits_allowed', 'runs_allowed', 'earned_runs', 'walks_allowed',
+    'strikeouts_pitching', 'home_runs_allowed',
+)
+
+
+def build_stat_lines(apps, schema_editor):
+    # Same attribution as league.stats: the player's home team, else away team, else none
+    Player = apps.get_model('league', 'Player')
+    PlayerGameStat = apps.get_model('league', 'PlayerGameStat')
+    PlayerStatLine = apps.get_model('league', 'PlayerStatLine')
+    teams = defaultdict(set)
+    for player_id, team_id in Player.teams.through.objects.values_list('player_id', 'team_id'):
+        teams[player_id].add(team_id)
+    totals = defaultdict(lambda: dict.fromkeys(('games_played',) + STAT_FIELDS, 0))
+    for row in PlayerGameStat.objects.values('player_id', 'game__team_home_id', 'game__team_away_id', *STAT_FIELDS):
+        player_teams = teams[row['player_id']]
+        if row['game__team_home_id'] in player_teams:
+            team_id = row['game__team_home_id']
+        elif row['game__team_away_id'] in player_teams:
+            team_id = row['game__team_away_id']
+        else:
+            team_id = None
+        line = totals[(row['player_id'], team_id)]
+        line['games_played'] += 1
+        for field in STAT_FIELDS:
+            line[field] += row[field] or 0
+    PlayerStatLine.objects.bulk_create([
+        PlayerStatLine(player_id=player_id, team_id=team_id, **values) for (player_id, team_id), values in totals.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('league', '0039_busevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlayerStatLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('games_played', models.IntegerField(default=0)),
+                ('at_bats', models.IntegerField(default=0)),
+                ('runs', models.IntegerField(default=0)),
+                ('hits', models.IntegerField(default=0)),
+                ('rbis', models.IntegerField(default=0)),
+                ('singles', models.IntegerField(default=0)),
+                ('doubles', models.IntegerField(default=0)),
+                ('triples', models.IntegerField(default=0)),
+                ('home_runs', models.IntegerField(default=0)),
+                ('strikeouts', models.IntegerField(default=0)),
+                ('base_on_balls', models.IntegerField(default=0)),
+                ('hit_by_pitch', models.IntegerField(default=0)),
+                ('sacrifice_flies', models.IntegerField(default=0)),
+                ('innings_pitched', models.FloatField(default=0)),
+                ('hits_allowed', models.IntegerField(default=0)),
+                ('runs_allowed', models.IntegerField(default=0)),
+                ('earned_runs', models.IntegerField(default=0)),
+                ('walks_allowed', models.IntegerField(default=0)),
+                ('strikeouts_pitching', models.IntegerField(default=0)),
+                ('home_runs_allowed', models.IntegerField(default=0)),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stat_lines', to='league.player')),
+                ('team', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stat_lines', to='league.team')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('player', 'team'), name='unique_stat_line_per_player_team')],
+            },
+        ),
+        migrations.RunPython(build_stat_lines, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.1.3 on 2026-10-18 12:00
+
+import django.db.models.deletion
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+def build_scores_and_standings(apps, schema_editor):
+    # Same attribution as league.stats: a player's runs count for their team in the game
+    Player = apps.get_model('league', 'Player')
+    Game = apps.get_model('league', 'Game')
+    PlayerGameStat = apps.get_model('league', 'PlayerGameStat')
+    Team = apps.get_model('league', 'Team')
+    TeamStanding = apps.get_model('league', 'TeamStanding')
+    teams = defaultdict(set)
+    for player_id, team_id in Player.teams.through.objects.values_list('player_id', 'team_id'):
+        teams[player_id].add(team_id)
+    runs = defaultdict(lambda: [0, 0])
+    for player_id, game_id, home_id, away_id, player_runs in PlayerGameStat.objects.values_list(
+        'player_id', 'game_id', 'game__team_home_id', 'game__team_away_id', 'runs'
+    ):
+        if home_id in teams[player_id]:
+            runs[game_id][0] += player_runs or 0
+        elif away_id in teams[player_id]:
+            runs[game_id][1] += player_runs or 0
+    for game_id, (home_score, away_score) in runs.items():
+        Game.objects.filter(id=game_id).update(home_score=home_score, away_score=away_score)
+
+    records = {team_id: dict.fromkeys(('wins', 'losses', 'ties', 'runs_scored', 'runs_allowed'), 0) for team_id in Team.objects.values_list('id', flat=True)}
+    for game_id, home_id, away_id in Game.objects.filter(finalized=True).values_list('id', 'team_home_id', 'team_away_id'):
+        home_score, away_score = runs[game_id]
+        for team_id, scored, allowed in ((home_id, home_score, away_score), (away_id, away_score, home_score)):
+            if team_id in records:
+                record = records[team_id]
+                record['runs_scored'] += scored
+                record['runs_allowed'] += allowed
+                record['wins' if scored > allowed else 'losses' if scored < allowed else 'ties'] += 1
+    TeamStanding.objects.bulk_create([TeamStanding(team_id=team_id, **record) for team_id, record in records.items()])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('league', '0040_playerstatline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='away_score',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='home_score',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='TeamStanding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('wins', models.IntegerField(default=0)),
+                ('losses', models.IntegerField(default=0)),
+                ('ties', models.IntegerField(default=0)),
+                ('runs_scored', models.IntegerField(default=0)),
+                ('runs_allowed', models.IntegerField(default=0)),
+                ('team', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='standing', to='league.team')),
+            ],
+        ),
+        migrations.RunPython(build_scores_and_standings, migrations.RunPython.noop),
+    ]
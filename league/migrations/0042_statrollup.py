@@ -0,0 +1,93 @@
+# Generated by Django 5.1.3 on 2026-10-18 12:03
+
+import django.db.models.deletion
+from collections import defaultdict
+
+from django.db import migrations, models
+from django.utils import timezone
+
+STAT_FIELDS = (
+    'at_bats', 'runs', 'hits', 'rbis', 'singles', 'doubles', 'triples', 'home_runs',
+    'strikeouts', 'base_on_balls', 'hit_by_pitch', 'sacrifice_flies',
+    'innings_pitched', 'hits_allowed', 'runs_allowed', 'earned_runs', 'walks_allowed',
+    'strikeouts_pitching', 'home_runs_allowed',
+)
+
+
+def build_rollups(apps, schema_editor):
+    # Same attribution as league.rollups: the player's side in the game, the other side as
+    # opponent, that team's division and the game's month
+    Player = apps.get_model('league', 'Player')
+    PlayerGameStat = apps.get_model('league', 'PlayerGameStat')
+    StatRollup = apps.get_model('league', 'StatRollup')
+    Team = apps.get_model('league', 'Team')
+    teams = defaultdict(set)
+    for player_id, team_id in Player.teams.through.objects.values_list('player_id', 'team_id'):
+        teams[player_id].add(team_id)
+    divisions = dict(Team.objects.values_list('id', 'division_id'))
+    totals = defaultdict(lambda: dict.fromkeys(('games_played',) + STAT_FIELDS, 0))
+    for row in PlayerGameStat.objects.values('player_id', 'game__team_home_id', 'game__team_away_id', 'game__date', *STAT_FIELDS):
+        home_id, away_id = row['game__team_home_id'], row['game__team_away_id']
+        if home_id in teams[row['player_id']]:
+            team_id, opponent_id = home_id, away_id
+        elif away_id in teams[row['player_id']]:
+            team_id, opponent_id = away_id, home_id
+        else:
+            team_id = opponent_id = None
+        date = row['game__date']
+        if timezone.is_aware(date):
+            date = timezone.localtime(date)
+        rollup = totals[(row['player_id'], team_id, opponent_id, divisions.get(team_id), date.date().replace(day=1))]
+        rollup['games_played'] += 1
+        for field in STAT_FIELDS:
+            rollup[field] += row[field] or 0
+    StatRollup.objects.bulk_create([
+        StatRollup(player_id=player_id, team_id=team_id, opponent_id=opponent_id, division_id=division_id, month=month, **values)
+        for (player_id, team_id, opponent_id, division_id, month), values in totals.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('league', '0041_game_scores_teamstanding'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('games_played', models.IntegerField(default=0)),
+                ('at_bats', models.IntegerField(default=0)),
+                ('runs', models.IntegerField(default=0)),
+                ('hits', models.IntegerField(default=0)),
+                ('rbis', models.IntegerField(default=0)),
+                ('singles', models.IntegerField(default=0)),
+                ('doubles', models.IntegerField(default=0)),
+                ('triples', models.IntegerField(default=0)),
+                ('home_runs', models.IntegerField(default=0)),
+                ('strikeouts', models.IntegerField(default=0)),
+                ('base_on_balls', models.IntegerField(default=0)),
+                ('hit_by_pitch', models.IntegerField(default=0)),
+                ('sacrifice_flies', models.IntegerField(default=0)),
+                ('innings_pitched', models.FloatField(default=0)),
+                ('hits_allowed', models.IntegerField(default=0)),
+                ('runs_allowed', models.IntegerField(default=0)),
+                ('earned_runs', models.IntegerField(default=0)),
+                ('walks_allowed', models.IntegerField(default=0)),
+                ('strikeouts_pitching', models.IntegerField(default=0)),
+                ('home_runs_allowed', models.IntegerField(default=0)),
+                ('division', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stat_rollups', to='league.division')),
+                ('opponent', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='opponent_stat_rollups', to='league.team')),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stat_rollups', to='league.player')),
+                ('team', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stat_rollups', to='league.team')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['division', 'month'], name='league_stat_divisio_50ff91_idx'), models.Index(fields=['team', 'month'], name='league_stat_team_id_907341_idx')],
+                'constraints': [models.UniqueConstraint(fields=('player', 'team', 'opponent', 'division', 'month'), name='unique_stat_rollup')],
+            },
+        ),
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
@@ -14,6 +14,8 @@ class Division(models.Model):
     league = models.ForeignKey(League, on_delete=models.CASCADE, related_name='divisions')
     is_open = models.BooleanField(default=False)
     coordinators = models.ManyToManyField(User, related_name='coordinated_divisions', blank=True)
+    draft_order = models.CharField(max_length=10, choices=[('linear', 'Linear'), ('snake', 'Snake')], default='snake')
+    pick_time_limit = models.PositiveIntegerField(null=True, blank=True, help_text="Seconds per pick before the team is auto-drafted. Leave empty for no clock.")
 
     def __str__(self):
         return f"{self.league.name} - {self.name}"
@@ -27,6 +29,8 @@ class Team(models.Model):
     division = models.ForeignKey(Division, on_delete=models.CASCADE, related_name='teams')
     coaches = models.ManyToManyField(User, related_name='teams')
     max_players = models.IntegerField(default=12)
+    draft_position = models.IntegerField(null=True, blank=True)  # Order in round 1; unset teams go last
+    roster_size = models.PositiveIntegerField(default=0, editable=False)  # Player.teams members; kept by league.rosters
 
     def __str__(self):
         return f"{self.name}"
@@ -43,6 +47,7 @@ class Player(models.Model):
     team = models.ForeignKey(Team, null=True, blank=True, on_delete=models.SET_NULL)
     teams = models.ManyToManyField(Team, blank=True, related_name='players')  # will eventually replace team. For now for an easier migration to many-to-many.
     draft_round = models.IntegerField(null=True, blank=True)
+    drafted = models.BooleanField(default=False, editable=False)  # On any team (team or teams); kept by league.rosters
     description = models.TextField(blank=True)
     coach_comments = models.TextField(blank=True)
     division = models.ForeignKey(Division, on_delete=models.CASCADE, null=True, blank=True, related_name='players')
@@ -86,6 +91,14 @@ class Player(models.Model):
     conflict_description = models.TextField(blank=True)
     last_team_coach = models.CharField(max_length=100, blank=True)
 
+    class Meta:
+        # The dashboard's available-player list: one index per sort key, id as the tiebreak
+        indexes = [
+            models.Index(fields=['division', 'drafted', 'first_name', 'id'], name='player_pool_first_name'),
+            models.Index(fields=['division', 'drafted', 'last_name', 'id'], name='player_pool_last_name'),
+            models.Index(fields=['division', 'drafted', 'rating', 'id'], name='player_pool_rating'),
+        ]
+
     def __str__(self):
         return f"{self.first_name} {self.last_name} ({self.division})"
     
@@ -118,6 +131,9 @@ class Game(models.Model):
     location = models.CharField(max_length=100)
     finalized = models.BooleanField(default=False)
     is_verified = models.BooleanField(default=False)
+    # Sums of each side's PlayerGameStat.runs, kept up to date by league.stats
+    home_score = models.IntegerField(default=0, editable=False)
+    away_score = models.IntegerField(default=0, editable=False)
     
     def __str__(self):
         date_str = self.date.strftime("%Y-%m-%d") if self.date else "Unknown Date" 
@@ -152,20 +168,202 @@ class PlayerGameStat(models.Model):
     home_runs_allowed = models.IntegerField(default=0)
     is_verified = models.BooleanField(default=False)
 
+
+class PlayerStatLine(models.Model):
+    # A player's PlayerGameStat totals for one team (team is null for games on none of the
+    # player's teams). Kept up to date by deltas in league.stats; never edit by hand.
+    player = models.ForeignKey(Player, on_delete=models.CASCADE, related_name='stat_lines')
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, null=True, blank=True, related_name='stat_lines')
+    games_played = models.IntegerField(default=0)
+
+    at_bats = models.IntegerField(default=0)
+    runs = models.IntegerField(default=0)
+    hits = models.IntegerField(default=0)
+    rbis = models.IntegerField(default=0)
+    singles = models.IntegerField(default=0)
+    doubles = models.IntegerField(default=0)
+    triples = models.IntegerField(default=0)
+    home_runs = models.IntegerField(default=0)
+    strikeouts = models.IntegerField(default=0)
+    base_on_balls = models.IntegerField(default=0)
+    hit_by_pitch = models.IntegerField(default=0)
+    sacrifice_flies = models.IntegerField(default=0)
+    innings_pitched = models.FloatField(default=0)
+    hits_allowed = models.IntegerField(default=0)
+    runs_allowed = models.IntegerField(default=0)
+    earned_runs = models.IntegerField(default=0)
+    walks_allowed = models.IntegerField(default=0)
+    strikeouts_pitching = models.IntegerField(default=0)
+    home_runs_allowed = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['player', 'team'], name='unique_stat_line_per_player_team'),
+        ]
+
+    def __str__(self):
+        return f"{self.player} - {self.team or 'No team'}"
+
+class StatRollup(models.Model):
+    # PlayerGameStat totals by (player, team, opponent, division, month), for slicing stats
+    # without scanning the stat rows. team, opponent and division follow the stat lines'
+    # attribution and are null for games on none of the player's teams. Kept up to date by
+    # deltas in league.rollups; never edit by hand.
+    player = models.ForeignKey(Player, on_delete=models.CASCADE, related_name='stat_rollups')
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, null=True, blank=True, related_name='stat_rollups')
+    opponent = models.ForeignKey(Team, on_delete=models.CASCADE, null=True, blank=True, related_name='opponent_stat_rollups')
+    division = models.ForeignKey(Division, on_delete=models.CASCADE, null=True, blank=True, related_name='stat_rollups')
+    month = models.DateField()  # First day of the game's month
+    games_played = models.IntegerField(default=0)
+
+    at_bats = models.IntegerField(default=0)
+    runs = models.IntegerField(default=0)
+    hits = models.IntegerField(default=0)
+    rbis = models.IntegerField(default=0)
+    singles = models.IntegerField(default=0)
+    doubles = models.IntegerField(default=0)
+    triples = models.IntegerField(default=0)
+    home_runs = models.IntegerField(default=0)
+    strikeouts = models.IntegerField(default=0)
+    base_on_balls = models.IntegerField(default=0)
+    hit_by_pitch = models.IntegerField(default=0)
+    sacrifice_flies = models.IntegerField(default=0)
+    innings_pitched = models.FloatField(default=0)
+    hits_allowed = models.IntegerField(default=0)
+    runs_allowed = models.IntegerField(default=0)
+    earned_runs = models.IntegerField(default=0)
+    walks_allowed = models.IntegerField(default=0)
+    strikeouts_pitching = models.IntegerField(default=0)
+    home_runs_allowed = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['player', 'team', 'opponent', 'division', 'month'], name='unique_stat_rollup'),
+        ]
+        indexes = [
+            models.Index(fields=['division', 'month']),
+            models.Index(fields=['team', 'month']),
+        ]
+
+    def __str__(self):
+        return f"{self.player} - {self.team or 'No team'} vs {self.opponent or '-'} {self.month:%Y-%m}"
+
+class TeamStanding(models.Model):
+    """A team's record over its finalized games, refreshed by league.standings."""
+    team = models.OneToOneField(Team, on_delete=models.CASCADE, related_name='standing')
+    wins = models.IntegerField(default=0)
+    losses = models.IntegerField(default=0)
+    ties = models.IntegerField(default=0)
+    runs_scored = models.IntegerField(default=0)
+    runs_allowed = models.IntegerField(default=0)
+
+    @property
+    def games_played(self):
+        return self.wins + self.losses + self.ties
+
+    @property
+    def run_differential(self):
+        return self.runs_scored - self.runs_allowed
+
+    @property
+    def win_percentage(self):
+        # Ties count as half a win
+        return (self.wins + self.ties / 2) / self.games_played if self.games_played else 0
+
+    def __str__(self):
+        return f"{self.team} {self.wins}-{self.losses}-{self.ties}"
+
 class DraftPick(models.Model):
     division = models.ForeignKey(Division, on_delete=models.CASCADE, related_name='draft_picks')
     team = models.ForeignKey(Team, on_delete=models.CASCADE)
     player = models.ForeignKey(Player, on_delete=models.CASCADE)
     pick_number = models.IntegerField()
     round_number = models.IntegerField()
+    traded_from = models.ForeignKey(Team, on_delete=models.SET_NULL, null=True, blank=True, related_name='traded_away_picks')  # Trades (round 999) only
 
     class Meta:
         ordering = ['pick_number']
+        constraints = [
+            models.UniqueConstraint(fields=['division', 'pick_number'], name='unique_pick_number_per_division'),
+        ]
 
     def __str__(self):
         return f"Pick {self.pick_number}: {self.player} to {self.team} ({self.division})"
+
+
+class DraftSequence(models.Model):
+    # Per-division pick counter. Numbers are handed out with a single UPDATE, never reused.
+    division = models.OneToOneField(Division, on_delete=models.CASCADE, related_name='draft_sequence')
+    last_pick_number = models.IntegerField(default=0)
+    next_slot = models.IntegerField(default=1)  # DraftSlot that is on the clock
+    clock_started_at = models.DateTimeField(null=True, blank=True)  # When next_slot went on the clock
+
+    def __str__(self):
+        return f"{self.division}: last pick {self.last_pick_number}"
+    
+
+class DraftSlot(models.Model):
+    # One row per pick in the draft order, precomputed when the draft opens.
+    # team differs from original_team when the slot has been traded.
+    division = models.ForeignKey(Division, on_delete=models.CASCADE, related_name='draft_slots')
+    slot_number = models.IntegerField()
+    round_number = models.IntegerField()
+    original_team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='original_draft_slots')
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='draft_slots')
+    pick = models.OneToOneField(DraftPick, on_delete=models.SET_NULL, null=True, blank=True, related_name='slot')
+
+    class Meta:
+        ordering = ['slot_number']
+        constraints = [
+            models.UniqueConstraint(fields=['division', 'slot_number'], name='unique_slot_number_per_division'),
+        ]
+
+    def __str__(self):
+        return f"Slot {self.slot_number} (Round {self.round_number}): {self.team}"
     
 
+class DraftRanking(models.Model):
+    # A coach's own big board. Auto-draft takes the team's best-ranked available player first.
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='draft_rankings')
+    player = models.ForeignKey(Player, on_delete=models.CASCADE, related_name='draft_rankings')
+    rank = models.PositiveIntegerField()
+
+    class Meta:
+        ordering = ['team', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['team', 'player'], name='unique_ranking_per_team_player'),
+        ]
+
+    def __str__(self):
+        return f"{self.team}: #{self.rank} {self.player}"
+
+
+class BusEvent(models.Model):
+    # Outbox of the database event bus (league/event_bus.py). Every worker process reads
+    # the rows other processes wrote and fans them out to its own watchers.
+    topic = models.CharField(max_length=100)
+    kind = models.CharField(max_length=30)
+    data = models.JSONField(default=dict)
+    origin = models.CharField(max_length=32)  # Process that published it; it delivered locally already
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return f"{self.topic} {self.kind} #{self.id}"
+
+
+class VersionCounter(models.Model):
+    # Version numbers for per-process copies (league/versions.py). Bumped with a single
+    # UPDATE, so two bumps never hand out the same number.
+    key = models.CharField(max_length=100, unique=True)
+    number = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.key}: {self.number}"
+
+
 class TeamLog(models.Model):
     team = models.ForeignKey("Team", on_delete=models.CASCADE)
     coach = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -0,0 +1,132 @@
+# league/progress.py
+import uuid
+
+from django.core.cache import cache
+from django.db.models import Q
+
+from .models import Game, PerformanceEvaluation, PlayerGameStat
+
+# Progress-over-time series for the player dashboard graphs (docs/player_dashboard_spec.md).
+# Each player's games are kept in the shared cache as running totals in game order
+# (Game.date, then stat id), so any per-game, rolling or cumulative value is a difference
+# of two entries. Reads only fetch stats past the last cached one and append them; edits,
+# deletes and back-dated games bump the player's version token, which makes the next read
+# start over.
+
+PROGRESS_WINDOWS = (5, 10)
+PROGRESS_FIELDS = ('at_bats', 'hits', 'strikeouts', 'base_on_balls', 'hit_by_pitch', 'sacrifice_flies')
+COMBINE_FIELDS = (
+    'exit_velo', 'bat_speed', 'grip_strength', 'catcher_pop', 'ten_yards',
+    'five_ten_five_yards', 'lateral_jump', 'shot_put',
+)
+
+
+def _entry_key(player_id):
+    return f"player-progress:{player_id}"
+
+
+def _version_key(player_id):
+    return f"player-progress-version:{player_id}"
+
+
+def progress_version(player_id):
+    token = cache.get(_version_key(player_id))
+    if token is None:
+        cache.add(_version_key(player_id), uuid.uuid4().hex, None)
+        token = cache.get(_version_key(player_id))
+    return token
+
+
+def _append_games(entry, stats):
+    running = entry['running'][-1] if entry['running'] else (0,) * len(PROGRESS_FIELDS)
+    for stat_id, game_id, date, *values in stats.values_list('id', 'game_id', 'game__date', *PROGRESS_FIELDS):
+        running = tuple(total + (value or 0) for total, value in zip(running, values))
+        entry['games'].append((game_id, date))
+        entry['running'].append(running)
+        entry['last'] = (date, stat_id)
+
+
+def player_progress_totals(player_id):
+    """The player's cached running totals, brought up to date with any newer games."""
+    token = progress_version(player_id)
+    entry = cache.get(_entry_key(player_id))
+    stats = PlayerGameStat.objects.filter(player_id=player_id).order_by('game__date', 'id')
+    if entry is None or entry['token'] != token:
+        entry = {'token': token, 'last': None, 'games': [], 'running': []}
+    elif entry['last'] is not None:
+        last_date, last_id = entry['last']
+        stats = stats.filter(Q(game__date__gt=last_date) | Q(game__date=last_date, id__gt=last_id))
+
+    count = len(entry['games'])
+    _append_games(entry, stats)
+    if len(entry['games']) != count or entry['last'] is None:
+        cache.set(_entry_key(player_id), entry, None)
+    return entry
+
+
+def progress_changed(before=(), after=()):
+    """Call after commit with the stat_row() dicts of changed PlayerGameStats.
+
+    New stats that land after a player's cached games are picked up by the next read;
+    anything else (edits, deletes, stats for earlier games) resets the player's series.
+    """
+    reset = {row['player_id'] for row in before}
+    pending = [row for row in after if row['player_id'] not in reset]
+    if pending:
+        entries = cache.get_many([_entry_key(row['player_id']) for row in pending])
+        dates = dict(Game.objects.filter(id__in={row['game_id'] for row in pending}).values_list('id', 'date'))
+        for row in pending:
+            entry = entries.get(_entry_key(row['player_id']))
+            if entry and entry['last'] and dates.get(row['game_id']) and dates[row['game_id']] < entry['last'][0]:
+                reset.add(row['player_id'])
+    reset_progress(reset)
+
+
+def reset_progress(player_ids):
+    for player_id in player_ids:
+        cache.set(_version_key(player_id), uuid.uuid4().hex, None)
+
+
+def _rates(totals):
+    at_bats, hits, strikeouts, walks, hit_by_pitch, sacrifice_flies = totals
+    plate_appearances = at_bats + walks + hit_by_pitch + sacrifice_flies
+    return (
+        round(hits / at_bats, 3) if at_bats else None,
+        round(strikeouts / plate_appearances, 3) if plate_appearances else None,
+    )
+
+
+def _difference(running, end, start):
+    if start < 0:
+        return running[end]
+    return tuple(a - b for a, b in zip(running[end], running[start]))
+
+
+def player_progress(player):
+    """Batting average and strikeout rate per game, over the last 5 and 10 games and for
+    the career so far, plus the player's combine results, shaped for charting.
+
+    Rates are None where there is nothing to divide by (no at-bats or plate appearances).
+    """
+    entry = player_progress_totals(player.id)
+    running = entry['running']
+    series = {'avg': {}, 'k_rate': {}}
+    windows = [('game', 1)] + [(f'last_{size}', size) for size in PROGRESS_WINDOWS]
+    for name, size in windows + [('cumulative', None)]:
+        rates = [
+            _rates(_difference(running, i, -1 if size is None else i - size))
+            for i in range(len(running))
+        ]
+        series['avg'][name] = [avg for avg, _ in rates]
+        series['k_rate'][name] = [k_rate for _, k_rate in rates]
+
+    evaluations = list(PerformanceEvaluation.objects.filter(player=player).order_by('date', 'id').values('date', *COMBINE_FIELDS))
+    return {
+        'player_id': player.id,
+        'games': [{'game_id': game_id, 'date': date} for game_id, date in entry['games']],
+        'series': series,
+        'combine': {
+            'dates': [evaluation['date'] for evaluation in evaluations],
+            **{field: [evaluation[field] for evaluation in evaluations] for field in COMBINE_FIELDS},
+        },
+    }
@@ -0,0 +1,144 @@
+# league/rollups.py
+from collections import defaultdict
+
+from django.db.models import Count, DateField, F, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import Game, PlayerGameStat, StatRollup, Team
+from .stats import LINE_FIELDS, STAT_FIELDS, rate_stats, stat_opponent_expression, stat_team_expression, stat_team_id
+
+# StatRollup: PlayerGameStat totals by (player, team, opponent, division, month), so a slice
+# like "division 2 in May" or "team 3 against team 5" sums a few pre-aggregated rows
+# instead of every stat row. Rows follow the stat lines' attribution: team is the player's
+# side in the game, opponent the other side, division the team's division, month the first
+# day of the game's month (local time). record_stat_changes applies every stat change here
+# as a delta; whatever rebuilds a player's stat lines rebuilds their rollups too.
+
+ROLLUP_DIMENSIONS = ('player', 'team', 'opponent', 'division', 'month')
+_KEY_FIELDS = ('player_id', 'team_id', 'opponent_id', 'division_id', 'month')  # The deltas' keys
+
+
+def month_of(value):
+    if timezone.is_aware(value):
+        value = timezone.localtime(value)
+    return value.date().replace(day=1)
+
+
+def record_rollup_changes(before, after, teams):
+    """Apply stat_row() changes to the rollups (see league.stats.record_stat_changes).
+
+    teams is {player_id: set of Player.teams ids} for every player in the batch.
+    """
+    rows = before + after
+    games = {
+        game_id: (home_id, away_id, month_of(date), {home_id: home_division_id, away_id: away_division_id})
+        for game_id, home_id, away_id, date, home_division_id, away_division_id in Game.objects.filter(
+            id__in={row['game_id'] for row in rows}
+        ).values_list('id', 'team_home_id', 'team_away_id', 'date', 'team_home__division_id', 'team_away__division_id')
+    }
+
+    deltas = defaultdict(lambda: dict.fromkeys(LINE_FIELDS, 0))
+    for sign, batch in ((-1, before), (1, after)):
+        for row in batch:
+            if row['game_id'] not in games:
+                continue  # Game deleted; nothing to attribute to
+            home_id, away_id, month, divisions = games[row['game_id']]
+            team_id = stat_team_id(teams[row['player_id']], home_id, away_id)
+            opponent_id = (away_id if team_id == home_id else home_id) if team_id is not None else None
+            delta = deltas[(row['player_id'], team_id, opponent_id, divisions.get(team_id), month)]
+            delta['games_played'] += sign
+            for field in STAT_FIELDS:
+                delta[field] += sign * (row[field] or 0)
+
+    changes = {key: delta for key, delta in deltas.items() if any(delta.values())}
+    if not changes:
+        return
+    # The existing rows in one query; the changes then go out as one bulk_update (as F()
+    # increments, so concurrent changes add up) and one bulk_create for the new keys
+    existing = {
+        tuple(key): rollup_id
+        for rollup_id, *key in StatRollup.objects.filter(
+            player_id__in={key[0] for key in changes}, month__in={key[4] for key in changes}
+        ).values_list('id', *_KEY_FIELDS)
+    }
+    fields = [field for field in LINE_FIELDS if any(delta[field] for delta in changes.values())]
+    updates, creates = [], []
+    for key, delta in changes.items():
+        if key in existing:
+            updates.append(StatRollup(id=existing[key], **{field: F(field) + delta[field] for field in fields}))
+        elif delta['games_played'] > 0:
+            # As with the stat lines, removals from a missing row come from cascading deletes
+            creates.append(StatRollup(
+                **dict(zip(_KEY_FIELDS, key)),
+                **{field: value for field, value in delta.items() if value},
+            ))
+    StatRollup.objects.bulk_update(updates, fields)
+    StatRollup.objects.bulk_create(creates)
+
+
+def rebuild_rollups(player_ids=None):
+    """Recompute the rollups of these players (or everyone) from PlayerGameStat, in one grouped query."""
+    stats = PlayerGameStat.objects.all()
+    rollups = StatRollup.objects.all()
+    if player_ids is not None:
+        player_ids = list(player_ids)
+        stats = stats.filter(player_id__in=player_ids)
+        rollups = rollups.filter(player_id__in=player_ids)
+
+    totals = list(
+        stats.annotate(stat_team_id=stat_team_expression(), month=TruncMonth('game__date', output_field=DateField()))
+        .annotate(stat_opponent_id=stat_opponent_expression())
+        .order_by()
+        .values('player_id', 'stat_team_id', 'stat_opponent_id', 'month')
+        .annotate(games_played=Count('id'), **{field: Sum(field) for field in STAT_FIELDS})
+    )
+    divisions = dict(Team.objects.filter(id__in={row['stat_team_id'] for row in totals}).values_list('id', 'division_id'))
+    rollups.delete()
+    StatRollup.objects.bulk_create([
+        StatRollup(
+            player_id=row['player_id'],
+            team_id=row['stat_team_id'],
+            opponent_id=row['stat_opponent_id'],
+            division_id=divisions.get(row['stat_team_id']),
+            month=row['month'],
+            **{field: row[field] or 0 for field in LINE_FIELDS},
+        )
+        for row in totals
+    ])
+    return len(totals)
+
+
+def team_division_changed(team):
+    StatRollup.objects.filter(team=team).update(division=team.division_id)
+
+
+def rollup_totals(group_by=(), player=None, team=None, opponent=None, division=None, league=None, start=None, end=None):
+    """Sum the rollups matching the filters, one row per combination of group_by dimensions.
+
+    Filters take ids; start and end are months (dates, any day of the month), inclusive.
+    Rows hold the group_by values (as <dimension>_id, or month), LINE_FIELDS and the
+    rate_stats() rates. Without group_by there is a single row for the whole slice.
+    """
+    rollups = StatRollup.objects.all()
+    for dimension, value in (('player', player), ('team', team), ('opponent', opponent), ('division', division)):
+        if value is not None:
+            rollups = rollups.filter(**{f'{dimension}_id': value})
+    if league is not None:
+        rollups = rollups.filter(division__league_id=league)
+    if start is not None:
+        rollups = rollups.filter(month__gte=start.replace(day=1))
+    if end is not None:
+        rollups = rollups.filter(month__lte=end.replace(day=1))
+
+    columns = [dimension if dimension == 'month' else f'{dimension}_id' for dimension in group_by]
+    sums = {field: Sum(field) for field in LINE_FIELDS}
+    if columns:
+        rows = list(rollups.order_by(*columns).values(*columns).annotate(**sums))
+    else:
+        rows = [rollups.aggregate(**sums)]
+    for row in rows:
+        for field in LINE_FIELDS:
+            row[field] = row[field] or 0
+        row.update(rate_stats(row))
+    return rows
@@ -0,0 +1,97 @@
+# league/rosters.py
+from collections import Counter, defaultdict
+
+from django.db.models import BooleanField, Count, Exists, ExpressionWrapper, F, OuterRef, Q
+
+from .models import Player, Team
+
+# Team.roster_size counts a team's Player.teams memberships, and Player.drafted says whether
+# a player is on any team at all. The model signals keep both in step; code that writes
+# Player.team or the through table in bulk calls adjust_roster_sizes / refresh_drafted
+# itself. reconcile_roster_sizes and reconcile_drafted repair any drift.
+
+
+def adjust_roster_sizes(changes):
+    """Apply {team_id: delta} to Team.roster_size, one UPDATE per distinct delta."""
+    teams_by_delta = defaultdict(list)
+    for team_id, delta in changes.items():
+        if delta:
+            teams_by_delta[delta].append(team_id)
+    for delta, team_ids in teams_by_delta.items():
+        Team.objects.filter(id__in=team_ids).update(roster_size=F('roster_size') + delta)
+
+
+def membership_changes(pairs, sign=1):
+    """{team_id: sign * number of pairs} for (player_id, team_id) through rows."""
+    counts = Counter(team_id for _, team_id in pairs)
+    return {team_id: sign * count for team_id, count in counts.items()}
+
+
+def reconcile_roster_sizes(teams=None):
+    """Recount Team.roster_size from Player.teams in one grouped query and fix drifted teams.
+
+    Returns the teams that were corrected, with their new roster_size.
+    """
+    teams = (teams if teams is not None else Team.objects.all()).annotate(actual=Count('players'))
+    drifted = [team for team in teams if team.roster_size != team.actual]
+    for team in drifted:
+        team.roster_size = team.actual
+    Team.objects.bulk_update(drifted, ['roster_size'])
+    return drifted
+
+
+def reconcile_drafted(players=None):
+    """Recompute Player.drafted for players whose flag has drifted; returns their ids."""
+    players = players if players is not None else Player.objects.all()
+    drifted = list(players.annotate(actual=drafted_expression()).exclude(drafted=F('actual')).values_list('id', flat=True))
+    refresh_drafted(drifted)
+    return drifted
+
+
+def drafted_expression():
+    return ExpressionWrapper(
+        Q(team__isnull=False) | Exists(Player.teams.through.objects.filter(player_id=OuterRef('pk'))),
+        output_field=BooleanField(),
+    )
+
+
+def refresh_drafted(player_ids):
+    """Recompute Player.drafted for these players in one UPDATE."""
+    if player_ids:
+        Player.objects.filter(id__in=player_ids).update(drafted=drafted_expression())
+
+
+AVAILABLE_PAGE_SIZE = 50
+
+
+def available_players_page(division, sort_by='last_name', descending=False, after=None, page_size=AVAILABLE_PAGE_SIZE):
+    """One page of a division's undrafted players, sorted by sort_by then id.
+
+    Walks the (division, drafted, sort key, id) index with a keyset cursor, so every page
+    costs the same however deep it is. after is the cursor of the previous page's last
+    row; returns (players, cursor of this page's last row or None on the last page).
+    """
+    players = Player.objects.filter(division=division, drafted=False)
+    if after:
+        value, player_id = after
+        if descending:
+            players = players.filter(**{f'{sort_by}__lte': value}).exclude(**{sort_by: value, 'id__gte': player_id})
+        else:
+            players = players.filter(**{f'{sort_by}__gte': value}).exclude(**{sort_by: value, 'id__lte': player_id})
+    order = [f'-{sort_by}', '-id'] if descending else [sort_by, 'id']
+    page = list(players.order_by(*order)[:page_size + 1])
+
+    if len(page) <= page_size:
+        return page, None
+    page = page[:page_size]
+    last = page[-1]
+    return page, f"{getattr(last, sort_by)}:{last.id}"
+
+
+def parse_cursor(cursor, sort_by):
+    """Turn a "<value>:<id>" cursor back into (value, id), or None if it is malformed."""
+    try:
+        value, player_id = cursor.rsplit(':', 1)
+        return (int(value) if sort_by == 'rating' else value), int(player_id)
+    except (AttributeError, ValueError):
+        return None
@@ -0,0 +1,8 @@
+# league/routing.py
+from django.urls import path
+
+from . import consumers
+
+websocket_urlpatterns = [
+    path('ws/draft/<int:division_id>/', consumers.DraftRoomConsumer.as_asgi()),
+]
@@ -1,8 +1,277 @@
 from django.contrib.auth.signals import user_logged_in
 from django.dispatch import receiver
 from django.utils.timezone import now
-from .models import SignInLog
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import pre_save, post_save, post_delete, pre_delete, m2m_changed
+from collections import defaultdict
+from .models import SignInLog, DraftPick, DraftSlot, DraftRanking, Player, Team, Division, League, Game, PlayerGameStat
+from .draft_events import publish_draft_event, pick_payload
+from .draft_state import draft_changed, divisions_for_player
+from .draft_snapshots import bump_divisions_version
+from .rosters import adjust_roster_sizes, membership_changes, refresh_drafted
+from .box_scores import bump_box_scores
+from .progress import reset_progress
+from .rollups import rebuild_rollups, team_division_changed
+from .standings import refresh_standings
+from .stats import rebuild_stat_lines, record_stat_changes, stat_row, STAT_FIELDS
 
 @receiver(user_logged_in)
 def log_user_login(sender, request, user, **kwargs):
     SignInLog.objects.create(user=user)
+
+
+# Push draft board changes to anyone watching the public draft stream,
+# and keep the in-memory draft state in step
+@receiver(post_save, sender=DraftPick)
+def announce_draft_pick(sender, instance, created, **kwargs):
+    if not created:
+        transaction.on_commit(lambda: draft_changed(instance.division_id))
+        return
+    kind = 'trade' if instance.round_number == 999 else 'pick'
+    data = pick_payload(instance)
+    transaction.on_commit(lambda: publish_draft_event(instance.division_id, kind, data))
+    transaction.on_commit(lambda: draft_changed(instance.division_id, lambda state: state.add_pick(instance)))
+
+@receiver(post_delete, sender=DraftPick)
+def announce_undraft(sender, instance, **kwargs):
+    pick_id = instance.id
+    data = {'pick_number': instance.pick_number, 'player_id': instance.player_id}
+    transaction.on_commit(lambda: publish_draft_event(instance.division_id, 'undraft', data))
+    transaction.on_commit(lambda: draft_changed(instance.division_id, lambda state: state.delete_pick(pick_id)))
+
+
+@receiver(post_save, sender=DraftSlot)
+def track_slot_save(sender, instance, **kwargs):
+    transaction.on_commit(lambda: draft_changed(instance.division_id, lambda state: state.save_slot(instance)))
+
+@receiver(post_delete, sender=DraftSlot)
+def track_slot_delete(sender, instance, **kwargs):
+    transaction.on_commit(lambda: draft_changed(instance.division_id))
+
+
+@receiver(post_save, sender=Player)
+def track_player_save(sender, instance, **kwargs):
+    for division_id in divisions_for_player(instance):
+        transaction.on_commit(lambda division_id=division_id: draft_changed(division_id, lambda state: state.save_player(instance)))
+
+@receiver(post_delete, sender=Player)
+def track_player_delete(sender, instance, **kwargs):
+    player_id = instance.id
+    for division_id in divisions_for_player(instance):
+        transaction.on_commit(lambda division_id=division_id: draft_changed(division_id, lambda state: state.delete_player(player_id)))
+
+
+@receiver(m2m_changed, sender=Player.teams.through)
+def track_roster_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+
+    if reverse:
+        # team.players.add(...) and friends: instance is the Team, pk_set holds player ids
+        team = instance
+        if action == 'pre_clear':
+            pk_set = set(team.players.values_list('id', flat=True))
+        player_ids = set(pk_set)
+        if action == 'post_add':
+            update = lambda state: all(state.add_memberships(player_id, {team.id}) for player_id in player_ids)
+        else:
+            update = lambda state: all(state.remove_memberships(player_id, {team.id}) for player_id in player_ids)
+        transaction.on_commit(lambda: draft_changed(team.division_id, update))
+        return
+
+    player = instance
+    if action == 'pre_clear':
+        teams = player.teams.values_list('id', 'division_id')
+    else:
+        teams = Team.objects.filter(id__in=pk_set).values_list('id', 'division_id')
+    teams_by_division = defaultdict(set)
+    for team_id, division_id in teams:
+        teams_by_division[division_id].add(team_id)
+
+    for division_id, team_ids in teams_by_division.items():
+        if action == 'post_add':
+            update = lambda state, team_ids=team_ids: state.add_memberships(player.id, team_ids)
+        else:
+            update = lambda state, team_ids=team_ids: state.remove_memberships(player.id, team_ids)
+        transaction.on_commit(lambda division_id=division_id, update=update: draft_changed(division_id, update))
+
+
+# Team names and coaches are rarely edited; just rebuild the state
+@receiver(post_save, sender=Team)
+@receiver(post_delete, sender=Team)
+def track_team_change(sender, instance, **kwargs):
+    transaction.on_commit(lambda: draft_changed(instance.division_id))
+
+@receiver(m2m_changed, sender=Team.coaches.through)
+def track_coach_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post'):
+        return
+    if not reverse:
+        division_ids = {instance.division_id}
+    elif pk_set:
+        division_ids = set(Team.objects.filter(id__in=pk_set).values_list('division_id', flat=True))
+    else:
+        division_ids = set(instance.teams.values_list('division_id', flat=True))
+    for division_id in division_ids:
+        transaction.on_commit(lambda division_id=division_id: draft_changed(division_id))
+
+@receiver(post_save, sender=DraftRanking)
+@receiver(post_delete, sender=DraftRanking)
+def track_ranking_change(sender, instance, **kwargs):
+    division_id = Team.objects.filter(id=instance.team_id).values_list('division_id', flat=True).first()
+    if division_id:
+        transaction.on_commit(lambda: draft_changed(division_id))
+
+# The public board lists every division, so renaming, opening or closing one moves all snapshots on
+@receiver(post_save, sender=Division)
+@receiver(post_delete, sender=Division)
+@receiver(post_save, sender=League)
+@receiver(post_delete, sender=League)
+def track_division_change(sender, instance, **kwargs):
+    transaction.on_commit(bump_divisions_version)
+
+# Keep Team.roster_size in step with Player.teams. Removals are counted before they
+# happen, since pk_set for a remove also holds ids that were never members.
+@receiver(m2m_changed, sender=Player.teams.through)
+def track_roster_size(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'post_add':
+        pairs = [(player_id, instance.id) for player_id in pk_set] if reverse else [(instance.id, team_id) for team_id in pk_set]
+        adjust_roster_sizes(membership_changes(pairs))
+    elif action in ('pre_remove', 'pre_clear'):
+        rows = sender.objects.filter(team_id=instance.id) if reverse else sender.objects.filter(player_id=instance.id)
+        if action == 'pre_remove':
+            rows = rows.filter(player_id__in=pk_set) if reverse else rows.filter(team_id__in=pk_set)
+        adjust_roster_sizes(membership_changes(rows.values_list('player_id', 'team_id'), sign=-1))
+
+@receiver(pre_delete, sender=Player)
+def release_roster_spots(sender, instance, **kwargs):
+    # Deleting a player drops its through rows without any m2m signal
+    pairs = Player.teams.through.objects.filter(player_id=instance.id).values_list('player_id', 'team_id')
+    adjust_roster_sizes(membership_changes(pairs, sign=-1))
+
+# Keep Player.drafted (the dashboard's indexed "available" flag) in step with team and teams
+@receiver(pre_save, sender=Player)
+def set_drafted(sender, instance, **kwargs):
+    instance.drafted = bool(instance.team_id) or bool(
+        instance.pk and Player.teams.through.objects.filter(player_id=instance.pk).exists()
+    )
+
+@receiver(m2m_changed, sender=Player.teams.through)
+def track_drafted(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            refresh_drafted([instance.id])
+    elif action == 'pre_clear':
+        instance._cleared_player_ids = list(instance.players.values_list('id', flat=True))
+    elif action == 'post_clear':
+        refresh_drafted(getattr(instance, '_cleared_player_ids', []))
+    elif action in ('post_add', 'post_remove'):
+        refresh_drafted(pk_set)
+
+@receiver(pre_delete, sender=Team)
+def remember_team_players(sender, instance, **kwargs):
+    # The cascade drops the team's through rows and nulls Player.team without any signal
+    instance._drafted_player_ids = list(
+        Player.objects.filter(Q(team=instance) | Q(teams=instance)).values_list('id', flat=True).distinct()
+    )
+
+@receiver(post_delete, sender=Team)
+def release_team_players(sender, instance, **kwargs):
+    player_ids = getattr(instance, '_drafted_player_ids', [])
+    transaction.on_commit(lambda: refresh_drafted(player_ids))
+
+# Keep the PlayerStatLine totals in step with PlayerGameStat
+@receiver(pre_save, sender=PlayerGameStat)
+def remember_stat_row(sender, instance, **kwargs):
+    instance._stat_before = (
+        PlayerGameStat.objects.filter(pk=instance.pk).values('player_id', 'game_id', *STAT_FIELDS).first()
+        if instance.pk else None
+    )
+
+@receiver(post_save, sender=PlayerGameStat)
+def track_stat_save(sender, instance, **kwargs):
+    before = getattr(instance, '_stat_before', None)
+    record_stat_changes(before=[before] if before else [], after=[stat_row(instance)])
+
+@receiver(post_delete, sender=PlayerGameStat)
+def track_stat_delete(sender, instance, **kwargs):
+    record_stat_changes(before=[stat_row(instance)])
+
+@receiver(pre_save, sender=Game)
+def remember_game_teams(sender, instance, **kwargs):
+    instance._teams_before = (
+        Game.objects.filter(pk=instance.pk).values_list('team_home_id', 'team_away_id', 'date', 'finalized').first()
+        if instance.pk else None
+    )
+
+@receiver(post_save, sender=Game)
+def track_game_teams(sender, instance, created, **kwargs):
+    transaction.on_commit(lambda: bump_box_scores([instance.id]))
+    before = getattr(instance, '_teams_before', None)
+    if instance.finalized or (before and before[3]):
+        # Counted in (or dropped from) the standings of the teams before and after
+        team_ids = {instance.team_home_id, instance.team_away_id} | set(before[:2] if before else ())
+        transaction.on_commit(lambda: refresh_standings(team_ids))
+    if not before:
+        return
+    player_ids = PlayerGameStat.objects.filter(game=instance).values_list('player_id', flat=True).distinct()
+    if before[:2] != (instance.team_home_id, instance.team_away_id):
+        rebuild_stat_lines(player_ids)
+    if before[2] != instance.date:
+        # The game moved in the players' progress series, maybe to another month
+        player_ids = list(player_ids)
+        rebuild_rollups(player_ids)
+        transaction.on_commit(lambda: reset_progress(player_ids))
+
+@receiver(post_delete, sender=Game)
+def track_game_delete(sender, instance, **kwargs):
+    if instance.finalized:
+        team_ids = {instance.team_home_id, instance.team_away_id}
+        transaction.on_commit(lambda: refresh_standings(team_ids))
+
+@receiver(m2m_changed, sender=Player.teams.through)
+def track_stat_line_teams(sender, instance, action, reverse, pk_set, **kwargs):
+    # Which team a stat row counts for depends on Player.teams
+    if action == 'pre_clear' and reverse:
+        instance._stat_player_ids = list(instance.players.values_list('id', flat=True))
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        if not reverse:
+            player_ids = [instance.id]
+        elif action == 'post_clear':
+            player_ids = getattr(instance, '_stat_player_ids', [])
+        else:
+            player_ids = pk_set
+        if PlayerGameStat.objects.filter(player_id__in=player_ids).exists():
+            rebuild_stat_lines(player_ids)
+
+@receiver(pre_delete, sender=Team)
+def remember_team_stat_players(sender, instance, **kwargs):
+    # The team's memberships and games go first in the cascade, so the deltas for the
+    # deleted stats can land on the wrong lines; rebuild everyone involved afterwards
+    instance._stat_player_ids = set(
+        PlayerGameStat.objects.filter(Q(game__team_home=instance) | Q(game__team_away=instance)).values_list('player_id', flat=True)
+    ) | set(PlayerGameStat.objects.filter(player__teams=instance).values_list('player_id', flat=True))
+
+@receiver(pre_save, sender=Team)
+def remember_team_division(sender, instance, **kwargs):
+    instance._division_before = (
+        Team.objects.filter(pk=instance.pk).values_list('division_id', flat=True).first()
+        if instance.pk else None
+    )
+
+@receiver(post_save, sender=Team)
+def track_team_division(sender, instance, created, **kwargs):
+    before = getattr(instance, '_division_before', None)
+    if before is not None and before != instance.division_id:
+        team_division_changed(instance)
+
+@receiver(post_delete, sender=Team)
+def rebuild_team_stat_lines(sender, instance, **kwargs):
+    player_ids = getattr(instance, '_stat_player_ids', None)
+    if player_ids:
+        # After the whole cascade: Django can delete the team before the games that point at it
+        def rebuild():
+            with transaction.atomic():
+                rebuild_stat_lines(Player.objects.filter(id__in=player_ids).values_list('id', flat=True))
+        transaction.on_commit(rebuild)
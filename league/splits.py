@@ -0,0 +1,89 @@
+# league/splits.py
+from collections import defaultdict
+
+from django.db.models import BooleanField, Case, Count, DateField, F, Sum, When
+from django.db.models.functions import TruncMonth
+
+from .models import PlayerGameStat, Team
+from .stats import LINE_FIELDS, STAT_FIELDS, stat_opponent_expression, stat_summary, stat_team_expression
+
+# Home/away, by-opponent and by-month splits. One grouped query returns a row per (player,
+# team, opponent, home or away, month) and a single pass over those rows adds each one into
+# every split it belongs to, so all splits cost the same as one. Rows follow the stat
+# lines' attribution; games on none of the player's teams have no side and are left out.
+
+
+def split_rows(stats):
+    """The grouped rows of a PlayerGameStat queryset (see the module comment)."""
+    return (
+        stats.annotate(stat_team_id=stat_team_expression(), month=TruncMonth('game__date', output_field=DateField()))
+        .annotate(
+            stat_opponent_id=stat_opponent_expression(),
+            is_home=Case(When(stat_team_id=F('game__team_home'), then=True), default=False, output_field=BooleanField()),
+        )
+        .filter(stat_team_id__isnull=False)
+        .order_by()
+        .values('player_id', 'stat_team_id', 'stat_opponent_id', 'is_home', 'month')
+        .annotate(games_played=Count('id'), **{field: Sum(field) for field in STAT_FIELDS})
+    )
+
+
+def _add(totals, row):
+    for field in LINE_FIELDS:
+        totals[field] += row[field] or 0
+
+
+def build_splits(rows):
+    """{player_id: splits} from split_rows(), in one pass.
+
+    Each player's splits are {'home', 'away', 'opponents', 'months'}: stat_summary() dicts,
+    the lists sorted by opponent name and by month, with 'team' and 'month' set.
+    """
+    new_totals = lambda: dict.fromkeys(LINE_FIELDS, 0)
+    sides = defaultdict(lambda: {'home': new_totals(), 'away': new_totals()})
+    opponents = defaultdict(lambda: defaultdict(new_totals))
+    months = defaultdict(lambda: defaultdict(new_totals))
+    for row in rows:
+        player_id = row['player_id']
+        _add(sides[player_id]['home' if row['is_home'] else 'away'], row)
+        if row['stat_opponent_id'] is not None:
+            _add(opponents[player_id][row['stat_opponent_id']], row)
+        _add(months[player_id][row['month']], row)
+
+    teams = Team.objects.in_bulk({team_id for by_team in opponents.values() for team_id in by_team})
+    return {
+        player_id: {
+            'home': stat_summary(sides[player_id]['home']),
+            'away': stat_summary(sides[player_id]['away']),
+            'opponents': sorted(
+                ({'team': teams.get(team_id), **stat_summary(totals)} for team_id, totals in opponents[player_id].items()),
+                key=lambda split: split['team'].name if split['team'] else '',
+            ),
+            'months': [{'month': month, **stat_summary(totals)} for month, totals in sorted(months[player_id].items())],
+        }
+        for player_id in sides
+    }
+
+
+def player_splits(player, team_ids=None):
+    """The player's splits, over the games for these teams only if team_ids is given."""
+    stats = PlayerGameStat.objects.filter(player=player)
+    rows = split_rows(stats)
+    if team_ids is not None:
+        rows = rows.filter(stat_team_id__in=list(team_ids))
+    return build_splits(rows).get(player.id) or empty_splits()
+
+
+def empty_splits():
+    return {
+        'home': stat_summary(dict.fromkeys(LINE_FIELDS, 0)),
+        'away': stat_summary(dict.fromkeys(LINE_FIELDS, 0)),
+        'opponents': [],
+        'months': [],
+    }
+
+
+def team_splits(team):
+    """{player_id: splits} for every player's games for this team."""
+    rows = split_rows(PlayerGameStat.objects.filter(player__teams=team)).filter(stat_team_id=team.id)
+    return build_splits(rows)
@@ -0,0 +1,67 @@
+# league/standings.py
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Game, Team, TeamStanding
+
+# Division standings, one TeamStanding row per team. Game.home_score/away_score are kept
+# up to date from the stat rows by league.stats; whenever a finalized game's score, teams
+# or finalized flag change, the two teams' rows are recomputed from their stored game
+# scores (a handful of Game rows, never the stat rows). Call refresh_standings after
+# commit, so a cascade that removes teams and games part-way never sees a half state.
+
+
+STANDING_FIELDS = ('wins', 'losses', 'ties', 'runs_scored', 'runs_allowed')
+
+
+def refresh_standings(team_ids):
+    """Recompute the TeamStanding rows of these teams from their finalized games."""
+    team_ids = [team_id for team_id in team_ids if team_id]
+    with transaction.atomic():
+        team_ids = set(Team.objects.filter(id__in=team_ids).values_list('id', flat=True))
+        if not team_ids:
+            return
+        records = {team_id: dict.fromkeys(STANDING_FIELDS, 0) for team_id in team_ids}
+        games = Game.objects.filter(finalized=True).filter(Q(team_home_id__in=team_ids) | Q(team_away_id__in=team_ids))
+        for home_id, away_id, home_score, away_score in games.values_list('team_home_id', 'team_away_id', 'home_score', 'away_score'):
+            for team_id, scored, allowed in ((home_id, home_score, away_score), (away_id, away_score, home_score)):
+                if team_id not in records:
+                    continue
+                record = records[team_id]
+                record['runs_scored'] += scored
+                record['runs_allowed'] += allowed
+                record['wins' if scored > allowed else 'losses' if scored < allowed else 'ties'] += 1
+
+        # Upsert, so concurrent refreshes of a team can't both insert its row
+        TeamStanding.objects.bulk_create(
+            [TeamStanding(team_id=team_id, **record) for team_id, record in records.items()],
+            update_conflicts=True,
+            unique_fields=['team'],
+            update_fields=STANDING_FIELDS,
+        )
+
+
+def rebuild_standings(division_id=None):
+    teams = Team.objects.all()
+    if division_id is not None:
+        teams = teams.filter(division_id=division_id)
+    team_ids = list(teams.values_list('id', flat=True))
+    refresh_standings(team_ids)
+    return len(team_ids)
+
+
+def division_standings(division):
+    """The division's teams with their standings, best record first, in one query.
+
+    Teams that haven't played a finalized game get an unsaved all-zero TeamStanding.
+    """
+    teams = list(Team.objects.filter(division=division).select_related('standing'))
+    rows = []
+    for team in teams:
+        try:
+            standing = team.standing
+        except TeamStanding.DoesNotExist:
+            standing = TeamStanding(team=team)
+        rows.append(standing)
+    rows.sort(key=lambda row: (-row.win_percentage, -row.wins, -row.run_differential, row.team.name))
+    return rows
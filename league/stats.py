@@ -0,0 +1,304 @@
+# league/stats.py
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Case, Count, Exists, F, OuterRef, Sum, When
+
+from .models import Game, Player, PlayerGameStat, PlayerStatLine
+from .progress import progress_changed
+
+# PlayerStatLine holds each player's PlayerGameStat totals per team, so the player pages
+# read one row per team instead of aggregating every game. A stat row counts for the
+# player's team in that game: the home team if the player is on it, else the away team,
+# else no team. The same attribution gives each game's score (Game.home_score/away_score
+# sum the runs of each side). The PlayerGameStat signals apply each change as a delta;
+# code that writes stats in bulk calls record_stat_changes itself. Changes to Player.teams
+# or to a game's teams move whole rows between lines, so those players are rebuilt (by the
+# m2m signal, or by rebuild_stat_lines in code that writes Player.teams in bulk).
+
+STAT_FIELDS = (
+    'at_bats', 'runs', 'hits', 'rbis', 'singles', 'doubles', 'triples', 'home_runs',
+    'strikeouts', 'base_on_balls', 'hit_by_pitch', 'sacrifice_flies',
+    'innings_pitched', 'hits_allowed', 'runs_allowed', 'earned_runs', 'walks_allowed',
+    'strikeouts_pitching', 'home_runs_allowed',
+)
+LINE_FIELDS = ('games_played',) + STAT_FIELDS
+
+
+def stat_row(stat):
+    """The part of a PlayerGameStat the stat lines care about, as a dict."""
+    row = {field: getattr(stat, field) for field in STAT_FIELDS}
+    row['player_id'] = stat.player_id
+    row['game_id'] = stat.game_id
+    return row
+
+
+def stat_team_id(player_team_ids, home_id, away_id):
+    if home_id in player_team_ids:
+        return home_id
+    if away_id in player_team_ids:
+        return away_id
+    return None
+
+
+def stat_team_expression():
+    """SQL for stat_team_id on a PlayerGameStat queryset, from the player's Player.teams."""
+    member_of = lambda team: Exists(
+        Player.teams.through.objects.filter(player_id=OuterRef('player_id'), team_id=OuterRef(team))
+    )
+    return Case(
+        When(member_of('game__team_home'), then=F('game__team_home')),
+        When(member_of('game__team_away'), then=F('game__team_away')),
+        default=None,
+    )
+
+
+def stat_opponent_expression():
+    """SQL for the other side of the game on a queryset annotated with stat_team_id."""
+    return Case(
+        When(stat_team_id=F('game__team_home'), then=F('game__team_away')),
+        When(stat_team_id=F('game__team_away'), then=F('game__team_home')),
+        default=None,
+    )
+
+
+def team_totals(stats):
+    """Every (player, team) total of a PlayerGameStat queryset in one grouped query.
+
+    Rows are dicts with player_id, stat_team_id (see stat_team_id) and LINE_FIELDS.
+    """
+    return (
+        stats.annotate(stat_team_id=stat_team_expression())
+        .order_by()
+        .values('player_id', 'stat_team_id')
+        .annotate(games_played=Count('id'), **{field: Sum(field) for field in STAT_FIELDS})
+    )
+
+
+def player_team_ids(player_ids):
+    """{player_id: set of Player.teams ids} in one query."""
+    teams = defaultdict(set)
+    for player_id, team_id in Player.teams.through.objects.filter(player_id__in=player_ids).values_list('player_id', 'team_id'):
+        teams[player_id].add(team_id)
+    return teams
+
+
+def record_stat_changes(before=(), after=()):
+    """Apply PlayerGameStat changes to the stat lines as deltas.
+
+    before and after are stat_row() dicts: the rows as they were (updated or deleted
+    stats) and as they are now (created or updated stats). Games and memberships are
+    read once for the whole batch, and each touched line gets a single UPDATE.
+    """
+    from .box_scores import bump_box_scores
+    from .rollups import record_rollup_changes
+
+    before, after = list(before), list(after)
+    rows = before + after
+    if not rows:
+        return
+    games = {
+        game_id: (home_id, away_id, finalized)
+        for game_id, home_id, away_id, finalized in Game.objects.filter(id__in={row['game_id'] for row in rows}).values_list('id', 'team_home_id', 'team_away_id', 'finalized')
+    }
+    teams = player_team_ids({row['player_id'] for row in rows})
+
+    deltas = defaultdict(lambda: dict.fromkeys(LINE_FIELDS, 0))
+    scores = defaultdict(lambda: [0, 0])  # game_id: [home runs, away runs]
+    for sign, batch in ((-1, before), (1, after)):
+        for row in batch:
+            home_id, away_id, _ = games.get(row['game_id'], (None, None, False))
+            team_id = stat_team_id(teams[row['player_id']], home_id, away_id)
+            delta = deltas[(row['player_id'], team_id)]
+            delta['games_played'] += sign
+            for field in STAT_FIELDS:
+                delta[field] += sign * (row[field] or 0)
+            if team_id is not None:
+                scores[row['game_id']][0 if team_id == home_id else 1] += sign * (row['runs'] or 0)
+    apply_line_deltas(deltas)
+    record_rollup_changes(before, after, teams)
+    _scores_changed(games, apply_score_deltas(scores))
+    transaction.on_commit(lambda: progress_changed(before, after))
+    transaction.on_commit(lambda: bump_box_scores(games))
+    _stats_changed({team_id for _, team_id in deltas}, {player_id for player_id, _ in deltas})
+
+
+def apply_line_deltas(deltas):
+    """Add {(player_id, team_id): {field: delta}} to PlayerStatLine, creating missing lines.
+
+    The existing lines are read in one query, then updated with one bulk_update of F()
+    increments (so concurrent changes add up) and the missing ones added with one bulk_create.
+    """
+    changes = {key: delta for key, delta in deltas.items() if any(delta.values())}
+    if not changes:
+        return
+    existing = {
+        (player_id, team_id): line_id
+        for line_id, player_id, team_id in PlayerStatLine.objects.filter(
+            player_id__in={player_id for player_id, _ in changes}
+        ).values_list('id', 'player_id', 'team_id')
+    }
+    fields = [field for field in LINE_FIELDS if any(delta[field] for delta in changes.values())]
+    updates, creates = [], []
+    for (player_id, team_id), delta in changes.items():
+        if (player_id, team_id) in existing:
+            updates.append(PlayerStatLine(id=existing[(player_id, team_id)], **{field: F(field) + delta[field] for field in fields}))
+        # A missing line is only created for new games. Removals from a missing line come
+        # from cascading deletes (player or team), which take the line with them anyway.
+        elif delta['games_played'] > 0:
+            creates.append(PlayerStatLine(
+                player_id=player_id, team_id=team_id, **{field: value for field, value in delta.items() if value}
+            ))
+    PlayerStatLine.objects.bulk_update(updates, fields)
+    PlayerStatLine.objects.bulk_create(creates)
+
+
+def rebuild_stat_lines(player_ids=None):
+    """Recompute the stat lines of these players (or everyone) from PlayerGameStat.
+
+    Returns the number of lines written. The players' rollups and their games' scores are
+    rebuilt along with the lines.
+    """
+    from .rollups import rebuild_rollups
+
+    stats = PlayerGameStat.objects.all()
+    lines = PlayerStatLine.objects.all()
+    if player_ids is not None:
+        player_ids = list(player_ids)
+        stats = stats.filter(player_id__in=player_ids)
+        lines = lines.filter(player_id__in=player_ids)
+
+    totals = list(team_totals(stats))
+    team_ids = set(lines.values_list('team_id', flat=True)) | {row['stat_team_id'] for row in totals}
+    lines.delete()
+    PlayerStatLine.objects.bulk_create([
+        PlayerStatLine(
+            player_id=row['player_id'],
+            team_id=row['stat_team_id'],
+            **{field: row[field] or 0 for field in LINE_FIELDS},
+        )
+        for row in totals
+    ])
+    _stats_changed(team_ids)
+    rebuild_rollups(player_ids)
+    if player_ids is None:
+        game_ids = None
+    else:
+        game_ids = set(stats.values_list('game_id', flat=True))
+    rebuild_game_scores(game_ids)
+    return len(totals)
+
+
+def apply_score_deltas(scores):
+    """Add {game_id: [home runs, away runs]} to the games' scores; returns the changed game ids."""
+    changed = set()
+    for game_id, (home, away) in scores.items():
+        if home or away:
+            # A game already gone (cascading delete) just updates nothing
+            Game.objects.filter(id=game_id).update(home_score=F('home_score') + home, away_score=F('away_score') + away)
+            changed.add(game_id)
+    return changed
+
+
+def rebuild_game_scores(game_ids=None):
+    """Recompute Game.home_score/away_score of these games (or all) from the stat rows."""
+    games = Game.objects.all()
+    stats = PlayerGameStat.objects.all()
+    if game_ids is not None:
+        game_ids = list(game_ids)
+        games = games.filter(id__in=game_ids)
+        stats = stats.filter(game_id__in=game_ids)
+    runs = defaultdict(int)
+    for row in (
+        stats.annotate(stat_team_id=stat_team_expression())
+        .order_by()
+        .values('game_id', 'stat_team_id')
+        .annotate(runs=Sum('runs'))
+    ):
+        runs[(row['game_id'], row['stat_team_id'])] = row['runs'] or 0
+
+    teams = {}
+    for game_id, home_id, away_id, finalized, home_score, away_score in games.values_list('id', 'team_home_id', 'team_away_id', 'finalized', 'home_score', 'away_score'):
+        home = runs[(game_id, home_id)] if home_id else 0
+        away = runs[(game_id, away_id)] if away_id else 0
+        if (home, away) != (home_score, away_score):
+            Game.objects.filter(id=game_id).update(home_score=home, away_score=away)
+            teams[game_id] = (home_id, away_id, finalized)
+    _scores_changed(teams, teams)
+    return len(teams)
+
+
+def _scores_changed(games, game_ids):
+    # Standings only count finalized games
+    from .standings import refresh_standings
+
+    team_ids = set()
+    for game_id in game_ids:
+        home_id, away_id, finalized = games.get(game_id, (None, None, False))
+        if finalized:
+            team_ids.update((home_id, away_id))
+    team_ids.discard(None)
+    if team_ids:
+        transaction.on_commit(lambda: refresh_standings(team_ids))
+
+
+def _stats_changed(team_ids, player_ids=None):
+    # Everything built on the stat lines catches up once the change is committed
+    from .leaderboards import leaderboards_changed
+
+    team_ids = {team_id for team_id in team_ids if team_id is not None}
+    if team_ids:
+        transaction.on_commit(lambda: leaderboards_changed(team_ids, player_ids))
+
+
+def player_stat_lines(player):
+    """{team_id: PlayerStatLine} for the player, None keying games on none of their teams."""
+    return {line.team_id: line for line in PlayerStatLine.objects.filter(player=player)}
+
+
+def line_totals(lines):
+    """Sum stat lines into one dict keyed like LINE_FIELDS (zeros when there are none)."""
+    totals = dict.fromkeys(LINE_FIELDS, 0)
+    for line in lines:
+        for field in LINE_FIELDS:
+            totals[field] += getattr(line, field)
+    return totals
+
+
+def rate_stats(totals):
+    """AVG, OBP, SLG, OPS, ERA and K/BB from counting totals (a dict keyed like STAT_FIELDS).
+
+    Every stats page uses this, so a rate means the same thing everywhere. Rates with
+    nothing to divide by are 0, except K/BB: no walks counts as one, so a walk-free
+    pitcher shows (and ranks by) their strikeouts.
+    """
+    at_bats = totals['at_bats']
+    total_bases = totals['singles'] + 2 * totals['doubles'] + 3 * totals['triples'] + 4 * totals['home_runs']
+    on_base = totals['hits'] + totals['base_on_balls'] + totals['hit_by_pitch']
+    plate_appearances = at_bats + totals['base_on_balls'] + totals['hit_by_pitch'] + totals['sacrifice_flies']
+
+    avg = totals['hits'] / at_bats if at_bats else 0
+    obp = on_base / plate_appearances if plate_appearances else 0
+    slg = total_bases / at_bats if at_bats else 0
+    return {
+        'avg': avg,
+        'obp': obp,
+        'slg': slg,
+        'ops': obp + slg,
+        'era': totals['earned_runs'] * 9 / totals['innings_pitched'] if totals['innings_pitched'] else 0,
+        'kbb': totals['strikeouts_pitching'] / max(totals['walks_allowed'], 1),
+    }
+
+
+def stat_summary(totals):
+    """Counting totals plus their rates formatted for display (.3f, ERA .2f)."""
+    rates = rate_stats(totals)
+    return {
+        **totals,
+        'avg': f"{rates['avg']:.3f}",
+        'obp': f"{rates['obp']:.3f}",
+        'slg': f"{rates['slg']:.3f}",
+        'ops': f"{rates['ops']:.3f}",
+        'era': f"{rates['era']:.2f}",
+        'kbb': f"{rates['kbb']:.2f}",
+    }
@@ -0,0 +1,65 @@
+# league/streaming.py
+import queue
+import threading
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connections
+
+# Long-lived responses (the SSE draft board, stat exports) are written as async
+# generators, so under ASGI (asgi.py) they hold no worker thread while they wait on
+# events or the database. Django's WSGI handler would collect an async iterator in full
+# before sending a byte, so under WSGI (runserver, gunicorn) the generator runs on an
+# event loop in a thread of its own and hands its chunks to the request's thread one at
+# a time.
+
+
+def streaming_content(request, chunks):
+    """chunks (an async generator) as StreamingHttpResponse content for this request."""
+    if isinstance(getattr(request, '_request', request), ASGIRequest):  # DRF wraps the request
+        return chunks
+    return _iterate_sync(chunks)
+
+
+_DONE = object()
+
+
+def _hand_over(handoff, item, closed):
+    # Wait for the reader to take the previous chunk, unless it has gone away
+    while not closed.is_set():
+        try:
+            handoff.put(item, timeout=1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def _iterate_sync(chunks):
+    handoff = queue.Queue(maxsize=1)
+    closed = threading.Event()
+
+    async def pump():
+        result = _DONE
+        try:
+            async for chunk in chunks:
+                if not _hand_over(handoff, chunk, closed):
+                    break
+        except Exception as e:
+            result = e
+        finally:
+            await chunks.aclose()
+            await sync_to_async(connections.close_all)()
+            _hand_over(handoff, result, closed)
+
+    threading.Thread(target=async_to_sync(pump), name='stream', daemon=True).start()
+    try:
+        while True:
+            item = handoff.get()
+            if item is _DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        closed.set()
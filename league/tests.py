@@ -1,3 +1,320 @@
-from django.test import TestCase
+import json
+from datetime import time
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from baseball_draft.asgi import application
+from . import draft_state
+from .draft import DraftPickError, make_draft_pick, rollback_picks
+from .draft_import import save_draft_board, validate_draft_board
+from .draft_order import build_draft_slots
+from .models import Division, DraftPick, DraftSequence, DraftSlot, Game, League, Player, PlayerGameStat, PlayerStatLine, StatRollup, Team, TeamStanding
+from .stats import LINE_FIELDS, rebuild_stat_lines
+from .trades import execute_trade
+
+
+TEST_SETTINGS = {
+    'CACHES': {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    'DRAFT_EVENT_BUS': 'league.event_bus.LocalEventBus',
+}
+
+
+class DraftSetupMixin:
+    """A fresh cache and draft state, and helpers to open a draft."""
+
+    def setUp(self):
+        cache.clear()
+        draft_state._states.clear()  # Versions restart with the database, so old states could look current
+
+    def open_draft(self, team_count=3, player_count=12, draft_order='snake'):
+        league = League.objects.create(name="League")
+        self.division = Division.objects.create(name="Division", league=league, is_open=True, draft_order=draft_order)
+        self.teams = [
+            Team.objects.create(name=f"Team {i}", division=self.division, max_players=5, draft_position=i)
+            for i in range(1, team_count + 1)
+        ]
+        self.coaches = {}
+        for team in self.teams:
+            self.coaches[team.id] = User.objects.create_user(f"coach{team.id}")
+            team.coaches.add(self.coaches[team.id])
+        self.players = [
+            Player.objects.create(first_name=f"Player{i}", last_name="Prospect", division=self.division)
+            for i in range(player_count)
+        ]
+        build_draft_slots(self.division)
+
+    def slot_teams(self):
+        return list(DraftSlot.objects.filter(division=self.division).order_by('slot_number').values_list('team_id', flat=True))
+
+    def team(self, team_id):
+        return next(team for team in self.teams if team.id == team_id)
+
+    def pick(self, team_id, player):
+        return make_draft_pick(self.division, self.team(team_id), player, len(self.teams))
+
+    def pick_numbers(self):
+        return list(DraftPick.objects.filter(division=self.division).order_by('pick_number').values_list('pick_number', flat=True))
+
+
+@override_settings(**TEST_SETTINGS)
+class StatLineRebuildTests(TestCase):
+    """The incrementally kept stat lines, rollups, scores and standings match a full rebuild."""
+
+    def setUp(self):
+        cache.clear()
+        league = League.objects.create(name="League")
+        self.division = Division.objects.create(name="Division", league=league)
+        self.home = Team.objects.create(name="Home", division=self.division)
+        self.away = Team.objects.create(name="Away", division=self.division)
+        self.player = Player.objects.create(first_name="Pat", last_name="Hitter", division=self.division)
+        self.game = Game.objects.create(
+            game_id="g1", team_home=self.home, team_away=self.away,
+            date=timezone.now(), time=time(10), location="Field", finalized=True,
+        )
+
+    def snapshot(self):
+        game = Game.objects.get(id=self.game.id)
+        # Deltas leave emptied rows behind at zero; a rebuild drops them
+        lines = PlayerStatLine.objects.exclude(games_played=0)
+        rollups = StatRollup.objects.exclude(games_played=0)
+        return {
+            'lines': sorted(lines.values_list('player_id', 'team_id', *LINE_FIELDS), key=str),
+            'rollups': sorted(rollups.values_list('player_id', 'team_id', 'opponent_id', 'month', *LINE_FIELDS), key=str),
+            'score': (game.home_score, game.away_score),
+            'standings': sorted(TeamStanding.objects.values_list('team_id', 'wins', 'losses', 'runs_scored', 'runs_allowed')),
+        }
+
+    def assertMatchesRebuild(self):
+        kept = self.snapshot()
+        with self.captureOnCommitCallbacks(execute=True):
+            rebuild_stat_lines()
+        self.assertEqual(kept, self.snapshot())
+        return kept
+
+    def add_stats(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            PlayerGameStat.objects.create(player=self.player, game=self.game, at_bats=4, hits=2, runs=3)
+
+    def test_stat_edits(self):
+        self.player.teams.add(self.home)
+        self.add_stats()
+        with self.captureOnCommitCallbacks(execute=True):
+            stat = PlayerGameStat.objects.get(player=self.player, game=self.game)
+            stat.runs = 1
+            stat.strikeouts = 2
+            stat.save()
+        self.assertEqual(self.assertMatchesRebuild()['score'], (1, 0))
+        with self.captureOnCommitCallbacks(execute=True):
+            stat.delete()
+        self.assertEqual(self.assertMatchesRebuild()['score'], (0, 0))
+
+    def test_trade(self):
+        self.player.teams.add(self.home)
+        self.add_stats()
+        with self.captureOnCommitCallbacks(execute=True):
+            execute_trade(self.division, {self.player.id: self.away.id})
+        kept = self.assertMatchesRebuild()
+        self.assertEqual(kept['score'], (0, 3))
+
+    def test_rollback(self):
+        self.add_stats()
+        with self.captureOnCommitCallbacks(execute=True):
+            make_draft_pick(self.division, self.home, self.player, team_count=2)
+        self.assertEqual(self.assertMatchesRebuild()['score'], (3, 0))
+        with self.captureOnCommitCallbacks(execute=True):
+            rollback_picks(self.division, 1)
+        self.assertEqual(self.assertMatchesRebuild()['score'], (0, 0))
+
+    def test_import(self):
+        self.add_stats()
+        picks, errors = validate_draft_board(self.division, [{'pick_number': 1, 'team': "Away", 'player': str(self.player.id)}])
+        self.assertEqual(errors, [])
+        with self.captureOnCommitCallbacks(execute=True):
+            save_draft_board(self.division, picks)
+        self.assertEqual(self.assertMatchesRebuild()['score'], (0, 3))
+
+
+@override_settings(**TEST_SETTINGS)
+class DraftRoomConsumerTests(DraftSetupMixin, TransactionTestCase):
+    """The WebSocket draft room (league.consumers) over the in-memory channel layer."""
+
+    def communicator(self, user):
+        client = Client()
+        client.force_login(user)
+        return WebsocketCommunicator(application, f"/ws/draft/{self.division.id}/", headers=[
+            (b'cookie', f"sessionid={client.cookies['sessionid'].value}".encode()),
+            (b'origin', b'http://testserver'),
+            (b'host', b'testserver'),
+        ])
+
+    def test_rejects_coach_outside_division(self):
+        self.open_draft()
+        other_division = Division.objects.create(name="Other", league=self.division.league)
+        outsider = User.objects.create_user("outsider")
+        Team.objects.create(name="Elsewhere", division=other_division).coaches.add(outsider)
+
+        room = self.communicator(outsider)
+
+        async def connect():
+            connected, _ = await room.connect()
+            return connected
+
+        self.assertFalse(async_to_sync(connect)())
+
+    def test_pick_is_pushed_to_room(self):
+        self.open_draft()
+        on_the_clock, watching = self.slot_teams()[:2]
+        player = self.players[0]
+        picker = self.communicator(self.coaches[on_the_clock])
+        watcher = self.communicator(self.coaches[watching])
+
+        async def run():
+            for room in (picker, watcher):
+                connected, _ = await room.connect()
+                self.assertTrue(connected)
+                board = await room.receive_json_from()
+                self.assertEqual(board['picks'], [])
+            await picker.send_json_to({'action': 'pick', 'player_id': player.id})
+
+            board = await watcher.receive_json_from()
+            self.assertEqual(board['type'], 'board')
+            self.assertEqual([(pick['pick_number'], pick['player_id']) for pick in board['picks']], [(1, player.id)])
+            self.assertEqual(board['last_pick_number'], 1)
+            self.assertEqual(board['on_the_clock']['team_id'], watching)
+            rosters = {roster['team_id']: roster['players'] for roster in board['rosters']}
+            self.assertEqual([entry['id'] for entry in rosters[on_the_clock]], [player.id])
+            for room in (picker, watcher):
+                await room.disconnect()
+
+        async_to_sync(run)()
+
+
+@override_settings(**TEST_SETTINGS)
+class PickSequenceTests(DraftSetupMixin, TransactionTestCase):
+    """Pick numbers come from the per-division DraftSequence (league.draft.allocate_pick_numbers)."""
+
+    def test_collision_is_a_conflict(self):
+        self.open_draft()
+        team_id = self.slot_teams()[0]
+        # A writer that took number 1 without going through the sequence
+        DraftPick.objects.create(division=self.division, team=self.team(team_id), player=self.players[0], pick_number=1, round_number=1)
+
+        with self.assertRaisesMessage(DraftPickError, "Another pick was made at the same moment"):
+            self.pick(team_id, self.players[1])
+
+        client = Client()
+        client.force_login(self.coaches[team_id])
+        response = client.post(reverse('make_pick', args=[self.players[1].id, self.division.id]))
+        self.assertEqual(response.status_code, 409)
+        self.assertIsNone(Player.objects.get(id=self.players[1].id).team_id)
+        self.assertEqual(DraftSequence.objects.get(division=self.division).last_pick_number, 0)
+
+    def test_failed_picks_leave_no_gaps(self):
+        self.open_draft()
+        order = self.slot_teams()
+        self.pick(order[0], self.players[0])
+        with self.assertRaises(DraftPickError):
+            self.pick(order[0], self.players[1])  # Out of turn
+        with self.assertRaises(DraftPickError):
+            self.pick(order[1], self.players[0])  # Already drafted
+        self.pick(order[1], self.players[1])
+        self.pick(order[2], self.players[2])
+        self.assertEqual(self.pick_numbers(), [1, 2, 3])
+        self.assertEqual(DraftSequence.objects.get(division=self.division).last_pick_number, 3)
+
+
+@override_settings(**TEST_SETTINGS)
+class DraftOrderTests(DraftSetupMixin, TransactionTestCase):
+    """The precomputed slot table (league.draft_order) and the turn it enforces."""
+
+    def test_snake_order(self):
+        self.open_draft(draft_order='snake')
+        first, second, third = (team.id for team in self.teams)
+        slots = list(DraftSlot.objects.filter(division=self.division).order_by('slot_number').values_list('round_number', 'team_id'))
+        self.assertEqual(slots[:9], [
+            (1, first), (1, second), (1, third),
+            (2, third), (2, second), (2, first),
+            (3, first), (3, second), (3, third),
+        ])
+        self.assertEqual(len(slots), 15)  # Five open roster spots each
+        self.assertEqual(draft_state.get_draft_state(self.division.id).on_the_clock().team_id, first)
+
+    def test_out_of_turn_pick_is_a_conflict(self):
+        self.open_draft()
+        waiting = self.slot_teams()[1]
+        client = Client()
+        client.force_login(self.coaches[waiting])
+        response = client.post(reverse('make_pick', args=[self.players[0].id, self.division.id]))
+        self.assertEqual(response.status_code, 409)
+        self.assertContains(response, "is on the clock", status_code=409)
+        self.assertEqual(self.pick_numbers(), [])
+
+    def test_undraft_gives_the_turn_back(self):
+        self.open_draft()
+        order = self.slot_teams()
+        self.pick(order[0], self.players[0])
+        self.pick(order[1], self.players[1])
+        self.assertEqual(DraftSequence.objects.get(division=self.division).next_slot, 3)
+
+        coordinator = User.objects.create_user("coordinator")
+        self.division.coordinators.add(coordinator)
+        client = Client()
+        client.force_login(coordinator)
+        client.post(reverse('dashboard_with_division', args=[self.division.id]), {'undraft_player_id': self.players[0].id})
+
+        # The reopened turn is renumbered after the filled slots and goes on the clock
+        next_slot = DraftSequence.objects.get(division=self.division).next_slot
+        slot = draft_state.get_draft_state(self.division.id).on_the_clock()
+        self.assertEqual((slot.slot_number, slot.round_number, slot.team_id), (next_slot, 1, order[0]))
+        self.pick(order[0], self.players[2])
+        self.assertEqual(draft_state.get_draft_state(self.division.id).on_the_clock().team_id, order[2])
+
+
+@override_settings(**TEST_SETTINGS)
+class PublicDraftFeedTests(DraftSetupMixin, TransactionTestCase):
+    """The public_draft JSON feed: conditional GETs and the ?since= delta."""
+
+    def feed(self, since=None, **headers):
+        url = reverse('public_draft_with_division', args=[self.division.id])
+        return Client().get(url, {} if since is None else {'since': since}, HTTP_X_REQUESTED_WITH='XMLHttpRequest', **headers)
+
+    def test_unchanged_board_is_not_modified(self):
+        self.open_draft()
+        self.pick(self.slot_teams()[0], self.players[0])
+        response = self.feed()
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.feed(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.pick(self.slot_teams()[1], self.players[1])
+        response = self.feed(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_since(self):
+        self.open_draft()
+        order = self.slot_teams()
+        for team_id, player in zip(order, self.players[:3]):
+            self.pick(team_id, player)
+
+        data = json.loads(self.feed(since=1).content)
+        self.assertEqual([pick['pick_number'] for pick in data['draft_picks']], [2, 3])
+        self.assertEqual(data['last_pick_number'], 3)
+        self.assertEqual(data['removed'], [])
+        rosters = {roster['team_id']: roster['players'] for roster in data['rosters']}
+        self.assertEqual(rosters[order[0]], ["Player0 Prospect"])
+
+        DraftPick.objects.get(division=self.division, pick_number=2).delete()
+        data = json.loads(self.feed(since=3).content)
+        self.assertEqual(data['draft_picks'], [])
+        self.assertEqual(data['removed'], [2])
+        self.assertEqual(len(json.loads(self.feed().content)['draft_picks']), 2)
@@ -0,0 +1,92 @@
+# league/trades.py
+from collections import Counter
+
+from django.db import transaction
+
+from .models import DraftPick, Player, Team
+from .draft import TRADE_ROUND, allocate_pick_numbers
+from .draft_events import publish_draft_event, pick_payload
+from .draft_state import draft_changed
+from .rosters import adjust_roster_sizes, membership_changes
+from .stats import rebuild_stat_lines
+
+
+class TradeError(Exception):
+    """A trade that can't be made. The message is safe to show to coordinators."""
+
+
+def execute_trade(division, moves):
+    """Move players between teams in one transaction and return the trade DraftPicks.
+
+    moves maps player id -> destination team id, for any number of players and teams in
+    the division. Every roster limit is checked against Team.roster_size under the write
+    lock, then Player.team, Player.teams and the trade DraftPick rows are written in bulk.
+    """
+    if not moves:
+        raise TradeError("Select at least one player to move.")
+
+    with transaction.atomic():
+        # Roster sizes come from the Team.roster_size counters, read under the write lock
+        teams = Team.objects.filter(division=division).in_bulk()
+        players = {player.id: player for player in Player.objects.filter(id__in=moves, division=division)}
+        memberships = list(
+            Player.teams.through.objects.filter(player_id__in=players, team_id__in=teams).values_list('player_id', 'team_id')
+        )
+        current_teams = dict(memberships)
+
+        from_teams = {}
+        for player_id, to_team_id in moves.items():
+            player = players.get(player_id)
+            if player is None:
+                raise TradeError("One of the players is not in this division.")
+            from_team_id = current_teams.get(player_id) or player.team_id
+            if from_team_id not in teams:
+                raise TradeError(f"{player.first_name} {player.last_name} is not on a team in this division.")
+            if to_team_id not in teams:
+                raise TradeError(f"{player.first_name} {player.last_name} can't be traded to a team outside this division.")
+            if to_team_id == from_team_id:
+                raise TradeError(f"{player.first_name} {player.last_name} is already on {teams[to_team_id].name}.")
+            from_teams[player_id] = from_team_id
+
+        incoming = Counter(moves.values())
+        outgoing = Counter(from_teams.values())
+        for team_id, team in teams.items():
+            change = incoming[team_id] - outgoing[team_id]
+            if change > 0 and team.roster_size + change > team.max_players:
+                raise TradeError(f"{team.name} would go over its max roster size of {team.max_players}.")
+
+        Player.objects.bulk_update(
+            [Player(id=player_id, team_id=to_team_id) for player_id, to_team_id in moves.items()],
+            ['team'],
+        )
+        Player.teams.through.objects.filter(player_id__in=moves, team_id__in=teams).delete()
+        Player.teams.through.objects.bulk_create(
+            [Player.teams.through(player_id=player_id, team_id=to_team_id) for player_id, to_team_id in moves.items()]
+        )
+        roster_changes = Counter(membership_changes(memberships, sign=-1))
+        roster_changes.update(membership_changes(moves.items()))
+        adjust_roster_sizes(roster_changes)
+        # Stat rows follow Player.teams, and the bulk writes skip the m2m signals
+        rebuild_stat_lines(moves)
+
+        pick_numbers = allocate_pick_numbers(division.id, count=len(moves))
+        picks = DraftPick.objects.bulk_create([
+            DraftPick(
+                division=division,
+                team=teams[to_team_id],
+                player=players[player_id],
+                pick_number=pick_number,
+                round_number=TRADE_ROUND,
+                traded_from=teams[from_teams[player_id]],
+            )
+            for pick_number, (player_id, to_team_id) in zip(pick_numbers, moves.items())
+        ])
+
+    # Bulk writes skip the model signals, so announce the trade and drop the cached state here
+    def announce():
+        for pick in picks:
+            publish_draft_event(division.id, 'trade', pick_payload(pick))
+        draft_changed(division.id)
+
+    transaction.on_commit(announce)
+    return picks
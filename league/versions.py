@@ -0,0 +1,35 @@
+# league/versions.py
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from .models import VersionCounter
+
+# Version counters for per-process copies (draft state, leaderboards) that patch
+# themselves in place. The counter lives in the database and each bump is one UPDATE,
+# which holds the row lock until its transaction commits: the process that moves a
+# counter from n to n + 1 knows nobody else changed anything in between, and a copy at
+# any other number is stale.
+#
+# Reads come from a mirror in the shared cache, so checking a copy costs no query. The
+# mirror is written while the row is still locked, so bumps reach it in order.
+
+
+def read_version(key):
+    number = cache.get(key)
+    if number is None:  # Not mirrored yet, or evicted
+        counter, _ = VersionCounter.objects.get_or_create(key=key)
+        cache.add(key, counter.number, None)
+        number = cache.get(key)
+    return number
+
+
+def bump_version(key):
+    """Increment the counter and return the new number."""
+    with transaction.atomic():
+        if not VersionCounter.objects.filter(key=key).update(number=F('number') + 1):
+            VersionCounter.objects.get_or_create(key=key)
+            VersionCounter.objects.filter(key=key).update(number=F('number') + 1)
+        number = VersionCounter.objects.values_list('number', flat=True).get(key=key)
+        cache.set(key, number, None)
+    return number
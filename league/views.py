@@ -1,17 +1,15 @@
 # league/views.py
-from django.shortcuts import render, redirect, get_object_or_404
-from django.http import JsonResponse  # Ensure this line is present
-from .models import Team, Player, DraftPick, Division, PlayerGameStat, Game, PlayerLog, PlayerNote, PlayerJournalEntry, PerformanceEvaluation
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse  # Ensure this line is present
+from .models import Team, Player, DraftPick, DraftSlot, Division, PlayerGameStat, Game, PlayerLog, PlayerNote, PlayerJournalEntry, PerformanceEvaluation
 from django.contrib.auth.decorators import login_required
-from .forms import PlayerForm, PlayerProfileForm, PlayerSignupForm, CoachCommentForm, PlayerCSVUploadForm
+from .forms import PlayerForm, PlayerProfileForm, PlayerSignupForm, CoachCommentForm, PlayerCSVUploadForm, DraftBoardUploadForm
 from django.contrib.auth.models import User
 import csv
 from io import TextIOWrapper
 from datetime import datetime
 from django.contrib import messages
 from django.shortcuts import render, redirect
-from django.db.models import Sum, Count
-from django.db.models.functions import Coalesce
 
 from collections import defaultdict
 from league.models import TeamLog, JoinTeamRequest
@@ -30,8 +28,28 @@ from django.contrib.sites.shortcuts import get_current_site
 from django.template.loader import render_to_string
 
 from .forms import PlayerSignupForm, JoinTeamRequestForm, PlayerGameStatForm
+from .draft_events import draft_event_stream, draft_version
+from .draft_state import get_draft_state
+from .draft import coach_pick_team, make_draft_pick, rollback_picks, DraftPickError
+from .draft_order import build_draft_slots
+from .draft_clock import division_deadline, start_clock_thread
+from .draft_snapshots import default_division_id, get_snapshot, render_board_html, render_board_json
+from .trades import TradeError, execute_trade
+from .rosters import available_players_page, parse_cursor
+from .stats import line_totals, player_stat_lines, stat_summary
+from .progress import player_progress
+from .box_scores import box_score_html
+from .standings import division_standings
+from .splits import player_splits
+from .leaderboards import CATEGORIES, get_leaderboard, min_innings_pitched, min_plate_appearances
+from .streaming import streaming_content
+from .draft_import import DraftBoardError, parse_draft_board, validate_draft_board, save_draft_board
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from django.utils.safestring import mark_safe
 from threading import Thread
 from django.contrib import messages
+from django.db import transaction
 from django.db.models import Q
 from django.contrib.admin.views.decorators import staff_member_required
 
@@ -113,6 +131,19 @@ def get_evaluation_detail(request, player_id, evaluation_id):
     return JsonResponse(data)
 
 
+@login_required
+def player_progress_view(request, player_id):
+    player = get_object_or_404(Player, id=player_id)
+    user = request.user
+
+    # Same access as the evaluations: the player themself, or a coach of one of their teams
+    is_self = hasattr(user, 'player_profile') and user.player_profile.id == player.id
+    if not is_self and not player.teams.filter(coaches=user).exists():
+        return JsonResponse({'error': "You do not have permission to view this player's progress."}, status=403)
+
+    return JsonResponse(player_progress(player))
+
+
 @login_required
 def player_logs_view(request):
     if not hasattr(request.user, 'player_profile'):
@@ -236,100 +267,19 @@ def coach_player_detail(request, player_id):
     shared_teams = player.teams.filter(id__in=coached_teams.values_list("id", flat=True))
 
     # === Per-Team Stats ===
+    # Totals come from the player's precomputed stat lines, one row per team
+    stat_lines = player_stat_lines(player)
     team_stats = []
     for team in shared_teams:
-        stats_qs = PlayerGameStat.objects.filter(player=player).filter(
-            game__team_home=team
-        ) | PlayerGameStat.objects.filter(
-            player=player,
-            game__team_away=team
-        )
-
-        stats = stats_qs.aggregate(
-            games_played=Count('game', distinct=True),
-            at_bats=Sum('at_bats'),
-            hits=Sum('hits'),
-            runs=Sum('runs'),
-            rbis=Sum('rbis'),
-            home_runs=Sum('home_runs'),
-            base_on_balls=Sum('base_on_balls'),
-            strikeouts=Sum('strikeouts'),
-            innings_pitched=Sum('innings_pitched'),
-            earned_runs=Sum('earned_runs'),
-        )
-
-        ab = stats['at_bats'] or 0
-        hits = stats['hits'] or 0
-        bb = stats['base_on_balls'] or 0
-        slg = hits  # Replace with total bases for real SLG
-        obp = (hits + bb) / (ab + bb) if (ab + bb) > 0 else 0
-        avg = hits / ab if ab > 0 else 0
-        ops = obp + slg
-        era = (stats['earned_runs'] or 0) * 9 / (stats['innings_pitched'] or 1)
-
-        team_stats.append({
-            'team': team,
-            'games_played': stats['games_played'] or 0,
-            'at_bats': ab,
-            'hits': hits,
-            'runs': stats['runs'] or 0,
-            'rbis': stats['rbis'] or 0,
-            'home_runs': stats['home_runs'] or 0,
-            'base_on_balls': bb,
-            'strikeouts': stats['strikeouts'] or 0,
-            'avg': f"{avg:.3f}",
-            'obp': f"{obp:.3f}",
-            'slg': f"{slg:.3f}",
-            'ops': f"{ops:.3f}",
-            'era': f"{era:.2f}",
-        })
+        stats = line_totals([stat_lines[team.id]] if team.id in stat_lines else [])
+        team_stats.append({'team': team, **stat_summary(stats)})
 
     # === Overall Stats ===
-    overall_stats_qs = PlayerGameStat.objects.filter(
-        player=player,
-        game__team_home__in=shared_teams
-    ) | PlayerGameStat.objects.filter(
-        player=player,
-        game__team_away__in=shared_teams
-    )
+    overall = line_totals(stat_lines[team.id] for team in shared_teams if team.id in stat_lines)
+    overall_stats = stat_summary(overall)
 
-    overall = overall_stats_qs.aggregate(
-        games_played=Count('game', distinct=True),
-        at_bats=Sum('at_bats'),
-        hits=Sum('hits'),
-        runs=Sum('runs'),
-        rbis=Sum('rbis'),
-        home_runs=Sum('home_runs'),
-        base_on_balls=Sum('base_on_balls'),
-        strikeouts=Sum('strikeouts'),
-        innings_pitched=Sum('innings_pitched'),
-        earned_runs=Sum('earned_runs'),
-    )
-
-    ab = overall['at_bats'] or 0
-    hits = overall['hits'] or 0
-    bb = overall['base_on_balls'] or 0
-    slg = hits  # Replace with total bases for real SLG
-    obp = (hits + bb) / (ab + bb) if (ab + bb) > 0 else 0
-    avg = hits / ab if ab > 0 else 0
-    ops = obp + slg
-    era = (overall['earned_runs'] or 0) * 9 / (overall['innings_pitched'] or 1)
-
-    overall_stats = {
-        'games_played': overall['games_played'] or 0,
-        'at_bats': ab,
-        'hits': hits,
-        'runs': overall['runs'] or 0,
-        'rbis': overall['rbis'] or 0,
-        'home_runs': overall['home_runs'] or 0,
-        'base_on_balls': bb,
-        'strikeouts': overall['strikeouts'] or 0,
-        'avg': f"{avg:.3f}",
-        'obp': f"{obp:.3f}",
-        'slg': f"{slg:.3f}",
-        'ops': f"{ops:.3f}",
-        'era': f"{era:.2f}",
-    }
+    # === Splits (home/away, by opponent, by month) over the same teams ===
+    splits = player_splits(player, team_ids=[team.id for team in shared_teams])
 
     evaluations = PerformanceEvaluation.objects.filter(player=player).order_by("-date")
 
@@ -339,6 +289,7 @@ def coach_player_detail(request, player_id):
         "shared_teams": shared_teams,
         "team_stats": team_stats,
         "overall_stats": overall_stats,
+        "splits": splits,
          "evaluations": evaluations,  # ✅ Add this line
     })
 
@@ -472,111 +423,40 @@ def player_dashboard(request):
         elif away_id in player_team_ids:
             team_games[stat.game.team_away.name].append(stat)
 
-    # Overall aggregate stats
-    agg = game_stats.aggregate(
-        at_bats=Coalesce(Sum("at_bats"), 0),
-        hits=Coalesce(Sum("hits"), 0),
-        runs=Coalesce(Sum("runs"), 0),
-        rbis=Coalesce(Sum("rbis"), 0),
-        home_runs=Coalesce(Sum("home_runs"), 0),
-        strikeouts=Coalesce(Sum("strikeouts"), 0),
-        base_on_balls=Coalesce(Sum("base_on_balls"), 0),
-        hit_by_pitch=Coalesce(Sum("hit_by_pitch"), 0),
-        sacrifice_flies=Coalesce(Sum("sacrifice_flies"), 0),
-        doubles=Coalesce(Sum("doubles"), 0),
-        triples=Coalesce(Sum("triples"), 0),
-        singles=Coalesce(Sum("singles"), 0),
-        earned_runs=Coalesce(Sum("earned_runs"), 0),
-        innings_pitched=Coalesce(Sum("innings_pitched"), 0.0),
-        walks_allowed=Coalesce(Sum("walks_allowed"), 0),
-        strikeouts_pitching=Coalesce(Sum("strikeouts_pitching"), 0),
-    )
+    # Overall and per-team totals come from the player's precomputed stat lines
+    stat_lines = player_stat_lines(player)
+    agg = line_totals(stat_lines.values())
 
-    ab = agg["at_bats"] or 1
-    avg = round(agg["hits"] / ab, 3)
-    tb = agg["singles"] + 2 * agg["doubles"] + 3 * agg["triples"] + 4 * agg["home_runs"]
-    slg = round(tb / ab, 3)
-    obp_denom = ab + agg["base_on_balls"] + agg["hit_by_pitch"] + agg["sacrifice_flies"] or 1
-    obp = round((agg["hits"] + agg["base_on_balls"] + agg["hit_by_pitch"]) / obp_denom, 3)
-    ops = round(obp + slg, 3)
-    era = round((agg["earned_runs"] * 9) / agg["innings_pitched"], 2) if agg["innings_pitched"] else 0
-    kbb = round(agg["strikeouts_pitching"] / agg["walks_allowed"], 2) if agg["walks_allowed"] else 0
+    rates = stat_summary(agg)
 
     # Per-team stat summaries
     team_stats = []
     for team in player.teams.all():
-        team_game_stats = game_stats.filter(
-            game__team_home=team
-        ) | game_stats.filter(
-            game__team_away=team
-        )
-
-        team_agg = team_game_stats.aggregate(
-            games_played=Count("game", distinct=True),
-            hits=Coalesce(Sum("hits"), 0),
-            at_bats=Coalesce(Sum("at_bats"), 0),
-            rbis=Coalesce(Sum("rbis"), 0),
-            home_runs=Coalesce(Sum("home_runs"), 0),
-            base_on_balls=Coalesce(Sum("base_on_balls"), 0),
-            hit_by_pitch=Coalesce(Sum("hit_by_pitch"), 0),
-            sacrifice_flies=Coalesce(Sum("sacrifice_flies"), 0),
-            doubles=Coalesce(Sum("doubles"), 0),
-            triples=Coalesce(Sum("triples"), 0),
-            singles=Coalesce(Sum("singles"), 0),
-            earned_runs=Coalesce(Sum("earned_runs"), 0),
-            innings_pitched=Coalesce(Sum("innings_pitched"), 0.0),
-        )
-
-        tab = team_agg["at_bats"] or 1
-        team_tb = team_agg["singles"] + 2 * team_agg["doubles"] + 3 * team_agg["triples"] + 4 * team_agg["home_runs"]
-        team_slg = round(team_tb / tab, 3)
-
-        team_obp_denom = tab + team_agg["base_on_balls"] + team_agg["hit_by_pitch"] + team_agg["sacrifice_flies"] or 1
-        team_obp = round((team_agg["hits"] + team_agg["base_on_balls"] + team_agg["hit_by_pitch"]) / team_obp_denom, 3)
-
-        team_ops = round(team_obp + team_slg, 3)
-        team_avg = round(team_agg["hits"] / tab, 3)
-        team_era = round((team_agg["earned_runs"] * 9) / team_agg["innings_pitched"], 2) if team_agg["innings_pitched"] else 0
-
-        team_stats.append({
-            "team_name": team.name,
-            "games_played": team_agg["games_played"],
-            "hits": team_agg["hits"],
-            "at_bats": team_agg["at_bats"],
-            "avg": team_avg,
-            "rbis": team_agg["rbis"],
-            "home_runs": team_agg["home_runs"],
-            "slg": team_slg,
-            "obp": team_obp,
-            "ops": team_ops,
-            "era": team_era,
-        })
+        team_agg = line_totals([stat_lines[team.id]] if team.id in stat_lines else [])
+        team_stats.append({"team_name": team.name, **stat_summary(team_agg)})
 
     return render(request, "league/player_dashboard.html", {
         "player": player,
         "game_stats": game_stats,
         "team_games": dict(team_games),
         "overall_stats": agg,
-        "batting_avg": avg,
-        "slg": slg,
-        "obp": obp,
-        "ops": ops,
-        "era": era,
-        "kbb": kbb,
+        "batting_avg": rates["avg"],
+        "slg": rates["slg"],
+        "obp": rates["obp"],
+        "ops": rates["ops"],
+        "era": rates["era"],
+        "kbb": rates["kbb"],
         "team_stats": team_stats,
         "pending_requests": pending_requests,
         "rejected_requests": rejected_requests,
     })
 
 def box_score_view(request, game_id):
-    game = get_object_or_404(Game, id=game_id)
-    home_team_stats = PlayerGameStat.objects.filter(game=game, player__teams=game.team_home)
-    away_team_stats = PlayerGameStat.objects.filter(game=game, player__teams=game.team_away)
+    game = get_object_or_404(Game.objects.select_related('team_home', 'team_away'), id=game_id)
 
     context = {
         'game': game,
-        'home_team_stats': home_team_stats,
-        'away_team_stats': away_team_stats,
+        'box_score': mark_safe(box_score_html(game)),  # Cached once the game is finalized
         "back_url": request.META.get("HTTP_REFERER", "/"),
     }
     return render(request, 'league/box_score.html', context)
@@ -689,6 +569,68 @@ def import_players(request):
     return render(request, 'league/import_players.html', {'form': form})
 
 
+@login_required
+def import_draft_board(request, division_id):
+    division = get_object_or_404(Division, id=division_id)
+    if not division.coordinators.filter(id=request.user.id).exists():
+        return render(request, 'league/no_permission.html')
+
+    errors = []
+    if request.method == 'POST':
+        form = DraftBoardUploadForm(request.POST, request.FILES)
+        if form.is_valid():
+            board_file = request.FILES['board_file']
+            try:
+                # The whole board is checked before anything is written; one bad row rejects it
+                picks, errors = validate_draft_board(division, parse_draft_board(board_file.name, board_file.read()))
+                if not picks and not errors:
+                    errors = ["The board is empty."]
+                if not errors:
+                    save_draft_board(division, picks)
+                    if division.is_open and division.draft_slots.exists():
+                        build_draft_slots(division)  # Re-plan the remaining slots around the imported picks
+                    messages.success(request, f"Imported {len(picks)} picks into {division}.")
+                    return redirect('import_draft_board', division_id=division.id)
+            except DraftBoardError as e:
+                errors = [str(e)]
+            except UnicodeDecodeError:
+                errors = ["The file must be UTF-8 encoded."]
+    else:
+        form = DraftBoardUploadForm()
+
+    return render(request, 'league/import_draft_board.html', {'division': division, 'form': form, 'errors': errors})
+
+
+@login_required
+def leaderboards(request, division_id):
+    division = get_object_or_404(Division.objects.select_related('league'), id=division_id)
+    league_wide = request.GET.get('scope') == 'league'
+    board = get_leaderboard(('league', division.league_id) if league_wide else ('division', division.id))
+
+    # Top lists are kept up to date as stats come in; this only reads them
+    categories = {'batting': [], 'pitching': []}
+    for key, (label, group, *_) in CATEGORIES.items():
+        categories[group].append({'key': key, 'label': label, 'leaders': board.top(key)})
+
+    return render(request, 'league/leaderboards.html', {
+        'division': division,
+        'league_wide': league_wide,
+        'sections': [('Batting', categories['batting']), ('Pitching', categories['pitching'])],
+        'min_plate_appearances': min_plate_appearances(),
+        'min_innings_pitched': min_innings_pitched(),
+    })
+
+
+@login_required
+def standings(request, division_id):
+    division = get_object_or_404(Division.objects.select_related('league'), id=division_id)
+    # TeamStanding rows are kept up to date as games are scored and finalized
+    return render(request, 'league/standings.html', {
+        'division': division,
+        'standings': division_standings(division),
+    })
+
+
 @login_required
 def player_detail(request, player_id):
     user = request.user
@@ -720,100 +662,16 @@ def player_detail(request, player_id):
     player_division_teams = player.teams.filter(id__in=team_ids_in_division)
 
     # === Per-Team Stats ===
+    # Totals come from the player's precomputed stat lines, one row per team
+    stat_lines = player_stat_lines(player)
     team_stats = []
     for team in player_division_teams:
-        stats_qs = PlayerGameStat.objects.filter(player=player).filter(
-            game__team_home=team
-        ) | PlayerGameStat.objects.filter(
-            player=player,
-            game__team_away=team
-        )
-
-        stats = stats_qs.aggregate(
-            games_played=Count('game', distinct=True),
-            at_bats=Sum('at_bats'),
-            hits=Sum('hits'),
-            runs=Sum('runs'),
-            rbis=Sum('rbis'),
-            home_runs=Sum('home_runs'),
-            base_on_balls=Sum('base_on_balls'),
-            strikeouts=Sum('strikeouts'),
-            innings_pitched=Sum('innings_pitched'),
-            earned_runs=Sum('earned_runs'),
-        )
-
-        ab = stats['at_bats'] or 0
-        hits = stats['hits'] or 0
-        bb = stats['base_on_balls'] or 0
-        slg = hits
-        obp = (hits + bb) / (ab + bb) if (ab + bb) > 0 else 0
-        avg = hits / ab if ab > 0 else 0
-        ops = obp + slg
-        era = (stats['earned_runs'] or 0) * 9 / (stats['innings_pitched'] or 1)
-
-        team_stats.append({
-            'team': team,
-            'games_played': stats['games_played'] or 0,
-            'at_bats': ab,
-            'hits': hits,
-            'runs': stats['runs'] or 0,
-            'rbis': stats['rbis'] or 0,
-            'home_runs': stats['home_runs'] or 0,
-            'base_on_balls': bb,
-            'strikeouts': stats['strikeouts'] or 0,
-            'avg': f"{avg:.3f}",
-            'obp': f"{obp:.3f}",
-            'slg': f"{slg:.3f}",
-            'ops': f"{ops:.3f}",
-            'era': f"{era:.2f}",
-        })
+        stats = line_totals([stat_lines[team.id]] if team.id in stat_lines else [])
+        team_stats.append({'team': team, **stat_summary(stats)})
 
     # === Overall Stats ===
-    overall_stats_qs = PlayerGameStat.objects.filter(
-        player=player,
-        game__team_home__in=player_division_teams
-    ) | PlayerGameStat.objects.filter(
-        player=player,
-        game__team_away__in=player_division_teams
-    )
-
-    overall = overall_stats_qs.aggregate(
-        games_played=Count('game', distinct=True),
-        at_bats=Sum('at_bats'),
-        hits=Sum('hits'),
-        runs=Sum('runs'),
-        rbis=Sum('rbis'),
-        home_runs=Sum('home_runs'),
-        base_on_balls=Sum('base_on_balls'),
-        strikeouts=Sum('strikeouts'),
-        innings_pitched=Sum('innings_pitched'),
-        earned_runs=Sum('earned_runs'),
-    )
-
-    ab = overall['at_bats'] or 0
-    hits = overall['hits'] or 0
-    bb = overall['base_on_balls'] or 0
-    slg = hits
-    obp = (hits + bb) / (ab + bb) if (ab + bb) > 0 else 0
-    avg = hits / ab if ab > 0 else 0
-    ops = obp + slg
-    era = (overall['earned_runs'] or 0) * 9 / (overall['innings_pitched'] or 1)
-
-    overall_stats = {
-        'games_played': overall['games_played'] or 0,
-        'at_bats': ab,
-        'hits': hits,
-        'runs': overall['runs'] or 0,
-        'rbis': overall['rbis'] or 0,
-        'home_runs': overall['home_runs'] or 0,
-        'base_on_balls': bb,
-        'strikeouts': overall['strikeouts'] or 0,
-        'avg': f"{avg:.3f}",
-        'obp': f"{obp:.3f}",
-        'slg': f"{slg:.3f}",
-        'ops': f"{ops:.3f}",
-        'era': f"{era:.2f}",
-    }
+    overall = line_totals(stat_lines[team.id] for team in player_division_teams if team.id in stat_lines)
+    overall_stats = stat_summary(overall)
 
     return render(request, "league/player_detail.html", {
         "player": player,
@@ -856,21 +714,13 @@ def dashboard(request, division_id=None):
         if not division:
             return render(request, 'league/no_division.html', {'divisions': divisions})
 
-    teams = Team.objects.filter(division=division).prefetch_related('players', 'coaches')
-
     # Sorting for Available Players
     sort_by = request.GET.get('sort_by', 'last_name')
     sort_order = request.GET.get('sort_order', 'asc')
-    order_prefix = '-' if sort_order == 'desc' else ''
     valid_sort_fields = ['first_name', 'last_name', 'rating']
     if sort_by not in valid_sort_fields:
         sort_by = 'last_name'
-    
-    available_players = Player.objects.filter(
-        division=division, team__isnull=True, teams__isnull=True
-    ).order_by(f"{order_prefix}{sort_by}")
 
-    draft_picks = DraftPick.objects.filter(division=division)
     is_coach = Team.objects.filter(coaches=user, division=division).exists()
     is_coordinator = division.coordinators.filter(id=user.id).exists()
 
@@ -898,11 +748,17 @@ def dashboard(request, division_id=None):
                         return render(request, 'league/no_permission.html')
                 
                 # Undraft: clear both team and teams
-                DraftPick.objects.filter(player=player, division=division).delete()
-                player.team = None
-                player.teams.clear()
-                player.draft_round = None
-                player.save()
+                with transaction.atomic():
+                    picks = DraftPick.objects.filter(player=player, division=division)
+                    reopened = DraftSlot.objects.filter(pick__in=picks).exists()
+                    picks.delete()
+                    player.team = None
+                    player.teams.clear()
+                    player.draft_round = None
+                    player.save()
+                if reopened:
+                    # Give the team its turn back. After the commit, so the draft state has caught up
+                    build_draft_slots(division)
             return redirect('dashboard_with_division', division_id=division.id)
         
         elif 'delete_player_id' in request.POST:
@@ -918,21 +774,27 @@ def dashboard(request, division_id=None):
                 player.delete()
             return redirect('dashboard_with_division', division_id=division.id)
 
-    # Team rosters: Use teams.players, fall back to player_set for transition
-    team_rosters = {}
-    for team in teams:
-        roster = list(team.players.all())  # Primary: ManyToMany
-        if not roster:  # Fallback to ForeignKey if teams is empty
-            roster = list(team.player_set.all())
-        team_rosters[team.id] = roster
+    # Teams, rosters (teams.players, falling back to player_set) and picks come from the shared draft state
+    state = get_draft_state(division.id)
+
+    # Available players are paged straight off the (division, drafted, sort key) index
+    after = parse_cursor(request.GET.get('after'), sort_by)
+    available_players, next_cursor = available_players_page(division, sort_by, descending=sort_order == 'desc', after=after)
+    if division.is_open:
+        start_clock_thread()
 
     return render(request, 'league/dashboard.html', {
         'division': division,
         'divisions': divisions,
-        'teams': teams,
+        'teams': state.teams,
         'available_players': available_players,
-        'draft_picks': draft_picks,
-        'team_rosters': team_rosters,
+        'available_count': len(state.available),
+        'next_cursor': next_cursor,
+        'is_first_page': not after,
+        'draft_picks': state.draft_picks(),
+        'team_rosters': state.team_rosters(),
+        'on_the_clock': state.on_the_clock(),
+        'pick_deadline': division_deadline(division.id) if division.is_open else None,
         'is_coach': is_coach,
         'is_coordinator': is_coordinator,
         'sort_by': sort_by,
@@ -956,6 +818,7 @@ def make_pick(request, player_id, division_id):
         return render(request, 'league/no_permission.html')
     
     if request.method == 'POST':
+        state = get_draft_state(division.id)
         if is_coordinator:
             # Coordinators can select a team via POST data
             team_id = request.POST.get('team_id')
@@ -963,36 +826,30 @@ def make_pick(request, player_id, division_id):
                 return render(request, 'league/select_team.html', {
                     'division': division,
                     'player': player,
-                    'teams': Team.objects.filter(division=division),
+                    'teams': state.teams,
+                    'roster_sizes': {team.id: state.roster_size(team.id) for team in state.teams},
+                    'on_the_clock': state.on_the_clock(),
                 })
             team = get_object_or_404(Team, id=team_id, division=division)
         else:
-            # Coaches use their own team
-            team = Team.objects.filter(coaches=request.user, division=division).first()
-        
-        if team and team.player_set.count() < team.max_players and not player.team:
-            last_pick = DraftPick.objects.filter(division=division).order_by('-pick_number').first()
-            pick_number = last_pick.pick_number + 1 if last_pick else 1
-            round_number = (pick_number - 1) // Team.objects.filter(division=division).count() + 1
-            DraftPick.objects.create(
-                division=division,
-                team=team,
-                player=player,
-                pick_number=pick_number,
-                round_number=round_number
-            )
-            player.team = team
-            player.teams.add(team)  # Add to ManyToManyField
-            player.draft_round = round_number
-            player.save()
+            team = coach_pick_team(state, request.user)
+
+        if team and state.roster_size(team.id) < team.max_players and not player.team:
+            try:
+                make_draft_pick(division, team, player, state.team_count)
+            except DraftPickError as e:
+                return render(request, 'league/pick_error.html', {'division': division, 'message': str(e)}, status=409)
             return redirect('dashboard_with_division', division_id=division_id)
     
     # If GET or team selection needed, show team selection for coordinators
     if is_coordinator:
+        state = get_draft_state(division.id)
         return render(request, 'league/select_team.html', {
             'division': division,
             'player': player,
-            'teams': Team.objects.filter(division=division),
+            'teams': state.teams,
+            'roster_sizes': {team.id: state.roster_size(team.id) for team in state.teams},
+            'on_the_clock': state.on_the_clock(),
         })
     return redirect('dashboard_with_division', division_id=division_id)
 
@@ -1108,43 +965,83 @@ def coach_comment(request, player_id, division_id):
 
 # league/views.py
 def public_draft(request, division_id=None):
-    if division_id:
-        division = get_object_or_404(Division, id=division_id)
-    else:
-        division = Division.objects.first()
-        if not division:
+    # Anonymous and read-only: answered from pre-rendered snapshots, so spectators never reach the ORM
+    is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+
+    if not division_id:
+        division_id = default_division_id()
+        if not division_id:
             return render(request, 'league/no_division.html', {'divisions': Division.objects.all()})
-    
-    teams = Team.objects.filter(division=division).prefetch_related('player_set', 'coaches')
-    team_rosters = {team.id: list(team.player_set.all()) for team in teams}
-    draft_picks = DraftPick.objects.filter(division=division)
-
-    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        draft_picks_data = [
-            {
-                'id': pick.id,  # Added for potential future use
-                'round_number': pick.round_number if pick.round_number != 999 else 'Trade',
-                'pick_number': pick.pick_number,
-                'team_name': pick.team.name,
-                'player_name': f"{pick.player.first_name} {pick.player.last_name}"
-            }
-            for pick in draft_picks
-        ]
-        return JsonResponse({
-            'draft_picks': draft_picks_data,
-            'last_updated': datetime.now().isoformat()
-        })
 
-    context = {
-        'division': division,
-        'draft_picks': draft_picks,
-        'divisions': Division.objects.all(),
-        'teams': teams,
-        'team_rosters': team_rosters,
-    }
-    return render(request, 'league/public_draft.html', context)
+    if is_ajax:
+        # Unchanged boards are answered from the cached draft version alone
+        version = draft_version(division_id)
+        etag = f'"{division_id}-{version["token"]}"'
+        not_modified = get_conditional_response(request, etag=etag, last_modified=int(version['modified']))
+        if not_modified:
+            return not_modified
+
+        # Delta mode: only picks after ?since=<pick_number>, plus the numbers removed up to it
+        try:
+            since = int(request.GET['since'])
+        except (KeyError, ValueError):
+            since = None
+        body = get_snapshot(
+            division_id,
+            'json' if since is None else f'json:since={since}',
+            lambda: render_board_json(get_object_or_404(Division, id=division_id), since),
+        )
+        response = HttpResponse(body, content_type='application/json')
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(version['modified'])
+        response['Cache-Control'] = 'no-cache'
+        patch_vary_headers(response, ['X-Requested-With'])
+        return response
+
+    body = get_snapshot(
+        division_id,
+        'html',
+        lambda: render_board_html(get_object_or_404(Division.objects.select_related('league'), id=division_id)),
+    )
+    return HttpResponse(body)
+
+async def public_draft_stream(request, division_id):
+    # Server-sent events: one small event per pick, undraft or trade. Async, so under
+    # ASGI a watching client holds no worker thread
+    division = await aget_object_or_404(Division, id=division_id)
+    try:
+        since = int(request.GET.get('since', 0))
+    except ValueError:
+        since = 0
+
+    response = StreamingHttpResponse(
+        streaming_content(request, draft_event_stream(division.id, request.headers.get('Last-Event-ID'), since)),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Don't let nginx buffer the stream
+    return response
 
 # league/views.py
+@login_required
+def rollback_draft_picks(request, division_id):
+    division = get_object_or_404(Division, id=division_id)
+    if not division.coordinators.filter(id=request.user.id).exists():
+        return render(request, 'league/no_permission.html')
+
+    if request.method == 'POST':
+        try:
+            count = int(request.POST.get('count', 1))
+        except ValueError:
+            count = 0
+        if count < 1:
+            return render(request, 'league/pick_error.html', {'division': division, 'message': 'Enter how many picks to roll back.'}, status=400)
+        try:
+            rollback_picks(division, count)
+        except DraftPickError as e:
+            return render(request, 'league/pick_error.html', {'division': division, 'message': str(e)}, status=409)
+    return redirect('dashboard_with_division', division_id=division.id)
+
 @login_required
 def toggle_draft_status(request, division_id):
     division = get_object_or_404(Division, id=division_id)
@@ -1154,11 +1051,20 @@ def toggle_draft_status(request, division_id):
     
     if request.method == 'POST':
         division.is_open = not division.is_open  # Toggle status
+        if division.is_open and request.POST.get('draft_order') in ('linear', 'snake'):
+            division.draft_order = request.POST['draft_order']
+        if division.is_open and 'pick_time_limit' in request.POST:
+            pick_time_limit = request.POST['pick_time_limit']
+            division.pick_time_limit = int(pick_time_limit) if pick_time_limit.isdigit() and int(pick_time_limit) > 0 else None
         division.save()
+        if division.is_open:
+            build_draft_slots(division)  # Precompute who picks when; starts the clock on slot one
+            start_clock_thread()
         return redirect('dashboard_with_division', division_id=division_id)
     
     context = {
         'division': division,
+        'draft_orders': Division._meta.get_field('draft_order').choices,
     }
     return render(request, 'league/toggle_draft.html', context)
 
@@ -1171,66 +1077,29 @@ def trade_players(request, division_id):
     if not division.coordinators.filter(id=request.user.id).exists():
         return render(request, 'league/no_permission.html')
     
-    teams = Team.objects.filter(division=division)
-    
     if request.method == 'POST':
-        player1_id = request.POST.get('player1_id')
-        player2_id = request.POST.get('player2_id', None)  # Optional for 1-for-1 or 1-for-none trades
-        
-        player1 = get_object_or_404(Player, id=player1_id, division=division)
-        player2 = Player.objects.filter(id=player2_id, division=division).first() if player2_id else None
-        
-        # Validate teams and roster limits
-        team1 = player1.team
-        if not team1 or team1.division != division:
-            return render(request, 'league/trade_error.html', {'message': 'Player 1 is not on a team in this division.'})
-        
-        team2 = player2.team if player2 else None
-        if player2 and (not team2 or team2.division != division):
-            return render(request, 'league/trade_error.html', {'message': 'Player 2 is not on a team in this division.'})
-        
-        # Check roster limits after trade
-        if team2 and team2.player_set.count() >= team2.max_players:
-            return render(request, 'league/trade_error.html', {'message': f'{team2.name} is already at max roster size.'})
-        if team1 and player2 and team1.player_set.count() >= team1.max_players:
-            return render(request, 'league/trade_error.html', {'message': f'{team1.name} is already at max roster size.'})
-        
-        # Execute the trade
-        last_pick = DraftPick.objects.filter(division=division).order_by('-pick_number').first()
-        pick_number = last_pick.pick_number + 1 if last_pick else 1
-        
-        # Trade Player 1 to Team 2 (if Team 2 exists)
-        if team2:
-            player1.team = team2
-            player1.save()
-            DraftPick.objects.create(
-                division=division,
-                team=team2,
-                player=player1,
-                pick_number=pick_number,
-                round_number=999  # Special round for trades
-            )
-            pick_number += 1
-        
-        # Trade Player 2 to Team 1 (if Player 2 exists)
-        if player2:
-            player2.team = team1
-            player2.save()
-            DraftPick.objects.create(
-                division=division,
-                team=team1,
-                player=player2,
-                pick_number=pick_number,
-                round_number=999  # Special round for trades
-            )
+        # One move_<player_id>=<team_id> field per player; any number of players and teams per trade
+        try:
+            moves = {
+                int(key[len('move_'):]): int(value)
+                for key, value in request.POST.items()
+                if key.startswith('move_') and value
+            }
+        except ValueError:
+            moves = {}
+        try:
+            execute_trade(division, moves)
+        except TradeError as e:
+            return render(request, 'league/trade_error.html', {'division': division, 'message': str(e)})
         
         return redirect('dashboard_with_division', division_id=division_id)
     
     # GET request: Show trade form
+    state = get_draft_state(division.id)
     context = {
         'division': division,
-        'teams': teams,
-        'players': Player.objects.filter(division=division, team__isnull=False).order_by('team__name', 'last_name', 'first_name'),
+        'teams': state.teams,
+        'team_rosters': state.team_rosters(),
     }
     return render(request, 'league/trade_players.html', context)
 